@@ -0,0 +1,174 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from json import dumps
+from os import cpu_count
+from platform import platform, python_version
+from random import Random
+from shutil import rmtree
+from sys import stdout
+from tempfile import mkdtemp
+from time import time
+
+from storage import StorageComponent, HierarchicalStorage, Storage
+from storage.storagecomponent import DefaultStrategy, HashDistributeStrategy
+
+STRATEGIES = {
+    'default': lambda: DefaultStrategy,
+    'hash': lambda: HashDistributeStrategy(),
+}
+PAYLOADS = {
+    'small': 200,
+    'large': 100 * 1024,
+}
+PARTNAMES = ['meta', 'data']
+
+
+def identifierFor(number):
+    return 'oai:bench:%08d' % number
+
+def timed(name, count, function):
+    start = time()
+    function()
+    seconds = time() - start
+    return dict(operation=name, count=count, seconds=seconds, perSecond=count / seconds if seconds else None)
+
+def benchmark(directory, strategyName, payloadName, parts, sampleSize, seed):
+    random = Random(seed)
+    strategy = STRATEGIES[strategyName]()
+    component = StorageComponent(directory, strategy=strategy, partsRemovedOnDelete=PARTNAMES)
+    identifiers = [identifierFor(i) for i in range(parts // len(PARTNAMES))]
+    data = 'x' * PAYLOADS[payloadName]
+    sample = [random.choice(identifiers) for i in range(min(sampleSize, len(identifiers)))]
+    results = []
+
+    def addData():
+        for identifier in identifiers:
+            for partname in PARTNAMES:
+                component.addData(identifier, partname, data)
+    results.append(timed('addData', len(identifiers) * len(PARTNAMES), addData))
+
+    def getData():
+        for identifier in sample:
+            component.getData(identifier, 'meta')
+    results.append(timed('getData', len(sample), getData))
+
+    def isAvailable():
+        for identifier in sample:
+            component.isAvailable(identifier, 'meta')
+            component.isAvailable(identifier, 'missing')
+    results.append(timed('isAvailable', 2 * len(sample), isAvailable))
+
+    def listIdentifiers():
+        for identifier in component.listIdentifiers(partname='meta'):
+            pass
+    results.append(timed('listIdentifiers', len(identifiers), listIdentifiers))
+
+    def listIdentifiersPrefix():
+        for identifier in component.listIdentifiers(identifierPrefix=identifierFor(0)[:-2]):
+            pass
+    results.append(timed('listIdentifiersPrefix', 1, listIdentifiersPrefix))
+
+    def iterate():
+        for name in HierarchicalStorage(Storage(directory)):
+            pass
+    results.append(timed('HierarchicalStorage.__iter__', len(identifiers) * len(PARTNAMES), iterate))
+
+    deleted = sample[:len(sample) // 2]
+    def delete():
+        for identifier in deleted:
+            component.deleteData(identifier)
+    results.append(timed('delete', len(deleted), delete))
+
+    def purge():
+        for identifier in deleted:
+            component.purge(identifier)
+    results.append(timed('purge', len(deleted), purge))
+
+    for result in results:
+        result.update(strategy=strategyName, payload=payloadName, payloadBytes=PAYLOADS[payloadName], parts=parts)
+    return results
+
+def writeParts(arguments):
+    directory, strategyName, identifiers, data = arguments
+    component = StorageComponent(directory, strategy=STRATEGIES[strategyName]())
+    for identifier in identifiers:
+        for partname in PARTNAMES:
+            component.addData(identifier, partname, data)
+
+def writersBenchmark(directory, strategyName, payloadName, parts, writers, processes):
+    identifiers = [identifierFor(i) for i in range(parts // len(PARTNAMES))]
+    data = 'x' * PAYLOADS[payloadName]
+    chunks = [(directory, strategyName, identifiers[i::writers], data) for i in range(writers)]
+    Executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with Executor(max_workers=writers) as executor:
+        result = timed('addData', len(identifiers) * len(PARTNAMES), lambda: list(executor.map(writeParts, chunks)))
+    result.update(strategy=strategyName, payload=payloadName, payloadBytes=PAYLOADS[payloadName], parts=parts, writers=writers, processes=processes)
+    return result
+
+def main(args=None):
+    parser = ArgumentParser(description='Benchmarks the storage package and prints the results as JSON.')
+    parser.add_argument('--parts', type=int, nargs='+', default=[1000, 10000], help='number of parts to store, e.g. 1000 10000000')
+    parser.add_argument('--strategy', nargs='+', choices=sorted(STRATEGIES), default=sorted(STRATEGIES))
+    parser.add_argument('--payload', nargs='+', choices=sorted(PAYLOADS), default=sorted(PAYLOADS))
+    parser.add_argument('--sample', type=int, default=1000, help='number of random reads, deletes and purges')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--writers', type=int, nargs='*', default=[], help='also measure concurrent addData with these numbers of writers, e.g. 1 2 4 8')
+    parser.add_argument('--processes', action='store_true', help='use processes instead of threads as concurrent writers')
+    parser.add_argument('--tempdir', default=None, help='directory on the filesystem under test')
+    parser.add_argument('--output', default=None, help='file to write the JSON to instead of stdout')
+    options = parser.parse_args(args)
+
+    results = []
+    for parts in options.parts:
+        for strategyName in options.strategy:
+            for payloadName in options.payload:
+                directory = mkdtemp(dir=options.tempdir)
+                try:
+                    results.extend(benchmark(directory, strategyName, payloadName, parts, options.sample, options.seed))
+                finally:
+                    rmtree(directory)
+                for writers in options.writers:
+                    directory = mkdtemp(dir=options.tempdir)
+                    try:
+                        results.append(writersBenchmark(directory, strategyName, payloadName, parts, writers, options.processes))
+                    finally:
+                        rmtree(directory)
+    report = dict(
+        environment=dict(python=python_version(), platform=platform(), cpus=cpu_count()),
+        arguments=vars(options),
+        results=results,
+    )
+    output = open(options.output, 'w') if options.output else stdout
+    try:
+        output.write(dumps(report, indent=4) + '\n')
+    finally:
+        if output is not stdout:
+            output.close()
+
+if __name__ == '__main__':
+    main()
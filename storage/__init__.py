@@ -30,5 +30,18 @@
 
 
 from .storage import Storage
+from .packstorage import PackStorage
 from .hierarchicalstorage import HierarchicalStorage, HierarchicalStorageError
 from .storagecomponent import StorageComponent
+from .partsindex import PartsIndex
+from .readcache import ReadCache
+from .asyncstoragecomponent import AsyncStorageComponent
+from .compression import ZlibCodec, LzmaCodec, ZstdCodec, Lz4Codec
+from .contentstore import ContentStore
+from .writeaheadlog import WriteAheadLog
+from .metrics import Metrics
+from .relayout import relayout
+from .stripedstoragecomponent import StripedStorageComponent
+from .scrubber import Scrubber
+from .fdcache import FdCache
+from .changefeed import ChangeFeed, ChangesTruncatedError
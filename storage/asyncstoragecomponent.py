@@ -0,0 +1,138 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from asyncio import get_running_loop, ensure_future, run_coroutine_threadsafe, Queue, CancelledError
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_BATCH_SIZE = 1000
+STREAM_QUEUE_SIZE = 16
+
+
+class AsyncStorageComponent(object):
+    """Awaitable front-end for a StorageComponent. Every disk access runs in
+    a bounded thread pool, so slow disks never stall the event loop."""
+
+    def __init__(self, storageComponent, maxWorkers=DEFAULT_MAX_WORKERS, executor=None):
+        self._storageComponent = storageComponent
+        self._executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix='storage') if executor is None else executor
+
+    async def addData(self, identifier, name, data):
+        return await self._run(self._storageComponent.addData, identifier, name, data)
+
+    async def addStream(self, identifier, name, chunks, checksum=None):
+        """Like StorageComponent.addStream; chunks may also be an async
+        iterable, of which at most STREAM_QUEUE_SIZE chunks are buffered.
+        When the call is cancelled the part is left unchanged."""
+        if not hasattr(chunks, '__aiter__'):
+            return await self._run(self._storageComponent.addStream, identifier, name, chunks, checksum=checksum)
+        loop = get_running_loop()
+        queue = Queue(maxsize=STREAM_QUEUE_SIZE)
+        feeder = ensure_future(_feed(chunks, queue))
+        try:
+            return await self._run(self._storageComponent.addStream, identifier, name, _drain(queue, loop), checksum=checksum)
+        finally:
+            feeder.cancel()
+            _abort(queue)
+
+    async def getData(self, identifier, name, offset=0, length=None):
+        return await self._run(self._storageComponent.getData, identifier, name, offset=offset, length=length)
+
+    async def size(self, identifier, partname):
+        return await self._run(self._storageComponent.size, identifier, partname)
+
+    async def deleteData(self, identifier, name=None):
+        return await self._run(self._storageComponent.deleteData, identifier, name=name)
+
+    async def deletePart(self, identifier, partname):
+        return await self._run(self._storageComponent.deletePart, identifier, partname)
+
+    async def purge(self, identifier):
+        return await self._run(self._storageComponent.purge, identifier)
+
+    async def isAvailable(self, identifier, partname):
+        return await self._run(self._storageComponent.isAvailable, identifier, partname)
+
+    async def exists(self, identifier, partname):
+        return (await self.isAvailable(identifier, partname)) == (True, True)
+
+    async def yieldRecord(self, identifier, partname, chunkSize=DEFAULT_CHUNK_SIZE, offset=0, length=None):
+        stream = await self._run(self._storageComponent.getStream, identifier, partname, offset=offset, length=length)
+        try:
+            while True:
+                data = await self._run(stream.read, chunkSize)
+                if not data:
+                    break
+                yield data
+        finally:
+            stream.close()
+
+    async def listIdentifiers(self, partname=None, identifierPrefix='', batchSize=DEFAULT_BATCH_SIZE):
+        identifiers = await self._run(self._storageComponent.listIdentifiers, partname=partname, identifierPrefix=identifierPrefix)
+        while True:
+            batch = await self._run(lambda: list(islice(identifiers, batchSize)))
+            for identifier in batch:
+                yield identifier
+            if len(batch) < batchSize:
+                break
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def _run(self, function, *args, **kwargs):
+        return await get_running_loop().run_in_executor(self._executor, partial(function, *args, **kwargs))
+
+
+_END = object()
+
+class _Failed(object):
+    def __init__(self, exception):
+        self.exception = exception
+
+async def _feed(chunks, queue):
+    try:
+        async for chunk in chunks:
+            await queue.put(chunk)
+    except Exception as e:
+        await queue.put(_Failed(e))
+    else:
+        await queue.put(_END)
+
+def _abort(queue):
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(_Failed(CancelledError('addStream was cancelled')))
+
+def _drain(queue, loop):
+    while True:
+        item = run_coroutine_threadsafe(queue.get(), loop).result()
+        if item is _END:
+            return
+        if isinstance(item, _Failed):
+            raise item.exception
+        yield item
@@ -0,0 +1,164 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os import makedirs, listdir, remove, fsync
+from os.path import join, isdir
+from bisect import bisect_right
+from itertools import islice
+from json import dumps, loads
+from threading import Lock
+from time import time
+import re
+
+from .storage import DURABILITY_NONE
+from .groupsync import GroupSync, directorySyncer
+
+DEFAULT_SEGMENT_SIZE = 100000
+DEFAULT_LIMIT = 1000
+ADD, DELETE, PURGE = 'add', 'delete', 'purge'
+SEGMENT_NAME = 'changes-%016d.log'
+SEGMENT_RE = re.compile(r'^changes-(\d{16})\.log$')
+
+
+class ChangesTruncatedError(Exception):
+    pass
+
+
+class ChangeFeed(object):
+    """Persistent, ordered log of the changes to a store. Every change gets
+    the next sequence number; a consumer remembers the last number it
+    processed and asks for the changes since. Changes only say what changed,
+    a consumer reads the current data itself.
+
+    The log is split into segment files named after their first sequence
+    number, so finding a position and dropping old changes is cheap. Line n
+    of a segment holds sequence number start + n, so reading from a
+    position skips lines without parsing them."""
+
+    def __init__(self, directory, segmentSize=DEFAULT_SEGMENT_SIZE, durability=DURABILITY_NONE):
+        if not isdir(directory):
+            makedirs(directory)
+        self._directory = directory
+        self._segmentSize = segmentSize
+        self._durability = durability
+        self._lock = Lock()
+        self._groupSync = GroupSync(self._fsync)
+        self._segments = self._segmentStarts()
+        self._lastSequence = 0
+        self._segmentLength = 0
+        if self._segments:
+            self._segmentLength = self._truncateTornTail(self._segments[-1])
+            self._lastSequence = self._segments[-1] + self._segmentLength - 1
+        self._file = None
+
+    def append(self, operation, identifier, partname):
+        """Records a change and returns its sequence number."""
+        with self._lock:
+            if self._file is None or self._segmentLength >= self._segmentSize:
+                self._openSegment()
+            self._lastSequence += 1
+            sequence = self._lastSequence
+            self._file.write(dumps([sequence, operation, identifier, partname, time()]) + '\n')
+            self._file.flush()
+            self._segmentLength += 1
+        if self._durability != DURABILITY_NONE:
+            self._groupSync.sync()
+        return sequence
+
+    def changesSince(self, sequence=0, limit=DEFAULT_LIMIT):
+        """Returns at most limit changes with a sequence number above
+        sequence, oldest first, as dicts with sequence, operation,
+        identifier, partname and timestamp. Raises ChangesTruncatedError
+        when changes after sequence were already dropped by truncate."""
+        with self._lock:
+            segments = list(self._segments)
+        if segments and sequence + 1 < segments[0]:
+            raise ChangesTruncatedError('Changes after %s were truncated, the first one kept is %s' % (sequence, segments[0]))
+        result = []
+        for start in segments[max(0, bisect_right(segments, sequence + 1) - 1):]:
+            for change in self._read(start, skip=max(0, sequence + 1 - start), limit=limit - len(result)):
+                result.append(dict(zip(['sequence', 'operation', 'identifier', 'partname', 'timestamp'], change)))
+            if len(result) == limit:
+                break
+        return result
+
+    def lastSequence(self):
+        return self._lastSequence
+
+    def truncate(self, sequence):
+        """Drops segments that only hold changes up to sequence."""
+        with self._lock:
+            while len(self._segments) > 1 and self._segments[1] <= sequence + 1:
+                remove(join(self._directory, SEGMENT_NAME % self._segments.pop(0)))
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _openSegment(self):
+        if self._file is not None:
+            if self._durability != DURABILITY_NONE:
+                fsync(self._file.fileno())
+            self._file.close()
+        created = not self._segments or self._segmentLength >= self._segmentSize
+        if created:
+            self._segments.append(self._lastSequence + 1)
+            self._segmentLength = 0
+        self._file = open(join(self._directory, SEGMENT_NAME % self._segments[-1]), 'a')
+        if created and self._durability != DURABILITY_NONE:
+            directorySyncer.sync(self._directory)
+
+    def _truncateTornTail(self, start):
+        """Cuts off an incomplete last line; returns the number of lines."""
+        with open(join(self._directory, SEGMENT_NAME % start), 'r+b') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+            return data.count(b'\n')
+
+    def _fsync(self):
+        with self._lock:
+            if self._file is not None:
+                fsync(self._file.fileno())
+
+    def _read(self, start, skip=0, limit=None):
+        """Returns at most limit changes of a segment after skipping the
+        first skip lines unparsed."""
+        changes = []
+        try:
+            with open(join(self._directory, SEGMENT_NAME % start)) as f:
+                for line in islice(f, skip, None if limit is None else skip + limit):
+                    if not line.endswith('\n'):
+                        break
+                    changes.append(loads(line))
+        except FileNotFoundError:
+            pass
+        return changes
+
+    def _segmentStarts(self):
+        return sorted(int(m.group(1)) for m in (SEGMENT_RE.match(name) for name in listdir(self._directory)) if m)
@@ -0,0 +1,272 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from codecs import getincrementaldecoder
+from collections import deque
+import zlib
+import lzma
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+MAGIC = b'\x89SCZ'
+CHUNK_SIZE = 64 * 1024
+DEFAULT_DICTIONARY_SIZE = 16 * 1024
+MAX_HEADER_SIZE = 64
+
+
+class ZlibCodec(object):
+    name = 'zlib'
+
+    def __init__(self, level=6, dictionary=None):
+        self._level = level
+        self._dictionary = dictionary
+
+    def compressor(self):
+        if self._dictionary is None:
+            return zlib.compressobj(self._level)
+        return zlib.compressobj(self._level, zdict=self._dictionary)
+
+    def decompressor(self):
+        if self._dictionary is None:
+            return _ZlibDecompressor(zlib.decompressobj())
+        return _ZlibDecompressor(zlib.decompressobj(zdict=self._dictionary))
+
+
+class LzmaCodec(object):
+    name = 'lzma'
+
+    def __init__(self, preset=6):
+        self._preset = preset
+
+    def compressor(self):
+        return lzma.LZMACompressor(preset=self._preset)
+
+    def decompressor(self):
+        return _BoundedDecompressor(lzma.LZMADecompressor())
+
+
+class ZstdCodec(object):
+    name = 'zstd'
+
+    def __init__(self, level=3, dictionary=None):
+        if zstandard is None:
+            raise ImportError('ZstdCodec needs the zstandard package')
+        self._level = level
+        self._dictionary = None if dictionary is None else zstandard.ZstdCompressionDict(dictionary)
+
+    @staticmethod
+    def trainDictionary(samples, size=DEFAULT_DICTIONARY_SIZE):
+        """Returns a dictionary trained on sample records (bytes), to be used
+        for both writing and reading small records of one partname."""
+        if zstandard is None:
+            raise ImportError('ZstdCodec needs the zstandard package')
+        return zstandard.train_dictionary(size, list(samples)).as_bytes()
+
+    def compressor(self):
+        return zstandard.ZstdCompressor(level=self._level, dict_data=self._dictionary).compressobj()
+
+    def decompressor(self):
+        return _Decompressor(zstandard.ZstdDecompressor(dict_data=self._dictionary).decompressobj().decompress)
+
+
+class Lz4Codec(object):
+    name = 'lz4'
+
+    def __init__(self):
+        if lz4 is None:
+            raise ImportError('Lz4Codec needs the lz4 package')
+
+    def compressor(self):
+        compressor = lz4.frame.LZ4FrameCompressor()
+        return _Compressor(compressor.begin(), compressor.compress, compressor.flush)
+
+    def decompressor(self):
+        return _BoundedDecompressor(lz4.frame.LZ4FrameDecompressor())
+
+
+def compress(codec, data):
+    compressor = codec.compressor()
+    return header(codec) + compressor.compress(data) + compressor.flush()
+
+def header(codec):
+    return MAGIC + codec.name.encode('ascii') + b'\n'
+
+
+class DecompressingStream(object):
+    """Reads a part written with a codec from a binary stream, decompressing
+    while reading. Parts without codec header are passed through as is.
+    At most chunkSize bytes are decompressed at a time, so reading a few
+    bytes of a highly compressed part does not inflate all of it."""
+
+    def __init__(self, stream, codec, binary=True, chunkSize=CHUNK_SIZE):
+        self._stream = stream
+        self._codec = codec
+        self._chunkSize = chunkSize
+        self._decoder = None if binary else getincrementaldecoder('utf-8')()
+        self._empty = b'' if binary else ''
+        self._chunks = deque()
+        self._offset = 0
+        self._buffered = 0
+        self._decompressor = None
+        self._started = False
+        self._eof = False
+
+    def read(self, size=-1):
+        while not self._eof and (size is None or size < 0 or self._buffered < size):
+            self._fill()
+        size = self._buffered if size is None or size < 0 else min(size, self._buffered)
+        return self._take(size)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while not self._buffered and not self._eof:
+            self._fill()
+        if not self._buffered:
+            raise StopIteration()
+        return self._take(len(self._chunks[0]) - self._offset)
+
+    def close(self):
+        self._eof = True
+        self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _take(self, size):
+        parts = []
+        self._buffered -= size
+        while size > 0:
+            chunk = self._chunks[0]
+            end = min(len(chunk), self._offset + size)
+            parts.append(chunk[self._offset:end])
+            size -= end - self._offset
+            if end == len(chunk):
+                self._chunks.popleft()
+                self._offset = 0
+            else:
+                self._offset = end
+        return parts[0] if len(parts) == 1 else self._empty.join(parts)
+
+    def _fill(self):
+        if not self._started:
+            self._started = True
+            raw = self._readHeader(self._stream.read(max(self._chunkSize, MAX_HEADER_SIZE)))
+        elif self._decompressor is None or self._decompressor.needsInput:
+            raw = self._stream.read(self._chunkSize)
+            self._eof = not raw
+        else:
+            raw = b''
+        if self._decompressor is None:
+            data = raw
+        elif self._eof:
+            data = self._decompressor.flush()
+        else:
+            data = self._decompressor.decompress(raw, self._chunkSize)
+        if self._decoder is not None:
+            data = self._decoder.decode(data, final=self._eof)
+        if data:
+            self._chunks.append(data)
+            self._buffered += len(data)
+
+    def _readHeader(self, raw):
+        if not raw.startswith(MAGIC):
+            return raw
+        end = raw.index(b'\n', len(MAGIC))
+        name = raw[len(MAGIC):end].decode('ascii')
+        codec = self._codec if self._codec is not None and self._codec.name == name else CODECS[name]()
+        self._decompressor = codec.decompressor()
+        return raw[end + 1:]
+
+
+class _Compressor(object):
+    def __init__(self, start, compress, flush):
+        self._start = start
+        self._compress = compress
+        self.flush = flush
+
+    def compress(self, data):
+        start, self._start = self._start, b''
+        return start + self._compress(data)
+
+
+class _Decompressor(object):
+    needsInput = True
+
+    def __init__(self, decompress):
+        self._decompress = decompress
+
+    def decompress(self, data, maxLength):
+        return self._decompress(data)
+
+    def flush(self):
+        return b''
+
+
+class _ZlibDecompressor(object):
+    def __init__(self, decompressobj):
+        self._decompressobj = decompressobj
+
+    @property
+    def needsInput(self):
+        return not self._decompressobj.unconsumed_tail
+
+    def decompress(self, data, maxLength):
+        return self._decompressobj.decompress(data or self._decompressobj.unconsumed_tail, maxLength)
+
+    def flush(self):
+        return self._decompressobj.flush()
+
+
+class _BoundedDecompressor(object):
+    def __init__(self, decompressor):
+        self._decompressor = decompressor
+
+    @property
+    def needsInput(self):
+        return self._decompressor.needs_input or self._decompressor.eof
+
+    def decompress(self, data, maxLength):
+        if self._decompressor.eof:
+            return b''
+        return self._decompressor.decompress(data, maxLength)
+
+    def flush(self):
+        return b''
+
+
+CODECS = dict((codec.name, codec) for codec in [ZlibCodec, LzmaCodec, ZstdCodec, Lz4Codec])
@@ -0,0 +1,161 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from hashlib import sha256
+from os import makedirs, remove, scandir, stat, rename
+from os.path import join, isfile, dirname
+from errno import ENOENT, EMLINK
+from shutil import copyfile
+
+from .storage import Sink, DURABILITY_NONE, isTemporary, temporaryPath, randomString
+
+INCOMING = 'incoming'
+
+
+class ContentStore(object):
+    """Stores payloads once, addressed by their sha256. Parts refer to a
+    payload by being a hardlink to it, so the link count of a payload is its
+    reference count and deleting a part drops a reference. The directory must
+    be on the same filesystem as the storage."""
+
+    def __init__(self, directory, durability=DURABILITY_NONE):
+        self._directory = directory
+        self._durability = durability
+        try:
+            makedirs(directory)
+        except OSError:
+            pass
+
+    def digest(self, data):
+        return sha256(data).hexdigest()
+
+    def path(self, digest):
+        return join(self._directory, digest[:2], digest[2:])
+
+    def linkTo(self, sink, data):
+        """Lets sink refer to the payload data, storing it first if needed."""
+        path = self.path(self.digest(data))
+        return self._linkStored(sink, path, data)
+
+    def _linkStored(self, sink, path, data=None):
+        while True:
+            if not isfile(path) and data is not None:
+                self._write(path, data)
+            try:
+                sink.link(path)
+                return path
+            except OSError as e:
+                if e.errno == EMLINK and data is not None:
+                    self._write(path, data)
+                elif e.errno == EMLINK:
+                    self._relink(path)
+                elif e.errno != ENOENT or data is None:
+                    raise
+
+    def linkChunks(self, sink, chunks):
+        """Like linkTo for payloads given as chunks of bytes; the payload is
+        written while it is hashed, never held in memory as a whole."""
+        incoming = join(self._directory, INCOMING)
+        try:
+            makedirs(incoming)
+        except OSError:
+            pass
+        digest = sha256()
+        tempSink = Sink(join(incoming, randomString()), binary=True, durability=self._durability)
+        try:
+            for chunk in chunks:
+                digest.update(chunk)
+                tempSink.send(chunk)
+        except BaseException:
+            tempSink.abort()
+            raise
+        tempSink.close()
+        path = self.path(digest.hexdigest())
+        try:
+            self._linkStored(sink, path)
+        except OSError as e:
+            if e.errno != ENOENT:
+                raise
+            try:
+                makedirs(dirname(path))
+            except OSError:
+                pass
+            sink.link(tempSink.name)
+            rename(tempSink.name, path)
+            return path
+        remove(tempSink.name)
+        return path
+
+    def references(self, digest):
+        try:
+            return stat(self.path(digest)).st_nlink - 1
+        except OSError as e:
+            if e.errno == ENOENT:
+                return 0
+            raise
+
+    def collect(self):
+        """Removes payloads no part refers to anymore. Returns the number of
+        payloads removed and their size in bytes."""
+        removed, size = 0, 0
+        for directory in _scandir(self._directory):
+            if not directory.is_dir() or directory.name == INCOMING:
+                continue
+            for entry in _scandir(directory.path):
+                if isTemporary(entry.name) or not entry.is_file():
+                    continue
+                entryStat = entry.stat()
+                if entryStat.st_nlink == 1:
+                    try:
+                        remove(entry.path)
+                    except OSError as e:
+                        if e.errno != ENOENT:
+                            raise
+                        continue
+                    removed += 1
+                    size += entryStat.st_size
+        return removed, size
+
+    def _relink(self, path):
+        copy = temporaryPath(path)
+        copyfile(path, copy)
+        rename(copy, path)
+
+    def _write(self, path, data):
+        try:
+            makedirs(dirname(path))
+        except OSError:
+            pass
+        sink = Sink(path, binary=True, durability=self._durability)
+        try:
+            sink.send(data)
+        finally:
+            sink.close()
+
+
+def _scandir(path):
+    with scandir(path) as entries:
+        return list(entries)
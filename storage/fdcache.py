@@ -0,0 +1,168 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os import open as osopen, close as osclose, fstat, stat, pread, O_RDONLY, O_DIRECTORY
+from os.path import dirname, basename
+from collections import OrderedDict
+from threading import Lock
+from errno import ENOENT
+
+DEFAULT_MAX_DIRECTORIES = 256
+DEFAULT_MAX_FILES = 256
+
+
+class FdCache(object):
+    """Keeps recently used directories and files open. Files are opened
+    relative to their cached directory, so only the last path component is
+    resolved, and read with pread from cached handles, so hot parts are not
+    opened at all.
+
+    Writes and deletes through StorageComponent invalidate the handle. A
+    handle of a file that was replaced or removed by another process is
+    detected by comparing its device and inode with those of the name in
+    the cached directory, and reopened. A directory that another process
+    replaced is noticed once the name is gone from the old one."""
+
+    def __init__(self, maxDirectories=DEFAULT_MAX_DIRECTORIES, maxFiles=DEFAULT_MAX_FILES):
+        self._maxDirectories = maxDirectories
+        self._maxFiles = maxFiles
+        self._lock = Lock()
+        self._directories = OrderedDict()
+        self._files = OrderedDict()
+
+    def read(self, path, offset=0, length=None):
+        """Returns length bytes from offset of the file at path, or up to the
+        end without length."""
+        handle = self._acquire(path)
+        try:
+            opened = fstat(handle.fd)
+            if not self._isCurrent(path, opened):
+                self._release(handle)
+                handle = None
+                self.invalidate(path)
+                handle = self._acquire(path)
+                opened = fstat(handle.fd)
+            end = opened.st_size if length is None else min(opened.st_size, offset + length)
+            chunks = []
+            while offset < end:
+                data = pread(handle.fd, end - offset, offset)
+                if not data:
+                    break
+                chunks.append(data)
+                offset += len(data)
+            return b''.join(chunks)
+        finally:
+            if handle is not None:
+                self._release(handle)
+
+    def invalidate(self, path):
+        with self._lock:
+            handle = self._files.pop(path, None)
+            if handle is not None:
+                handle.evict()
+
+    def clear(self):
+        with self._lock:
+            for handles in [self._files, self._directories]:
+                for handle in handles.values():
+                    handle.evict()
+                handles.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(directories=len(self._directories), files=len(self._files))
+
+    def _acquire(self, path):
+        with self._lock:
+            handle = self._files.get(path)
+            if handle is None:
+                handle = self._files[path] = _Handle(self._openFile(path))
+                if len(self._files) > self._maxFiles:
+                    self._files.popitem(last=False)[1].evict()
+            else:
+                self._files.move_to_end(path)
+            handle.refs += 1
+            return handle
+
+    def _release(self, handle):
+        with self._lock:
+            handle.refs -= 1
+            if handle.evicted and handle.refs == 0:
+                handle.close()
+
+    def _isCurrent(self, path, opened):
+        with self._lock:
+            directory = self._directoryHandle(dirname(path))
+            directory.refs += 1
+        try:
+            current = stat(basename(path), dir_fd=directory.fd)
+        except OSError as e:
+            if e.errno != ENOENT:
+                raise
+            return False
+        finally:
+            self._release(directory)
+        return (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino)
+
+    def _openFile(self, path):
+        directory, name = dirname(path), basename(path)
+        try:
+            return osopen(name, O_RDONLY, dir_fd=self._directoryFd(directory))
+        except OSError as e:
+            if e.errno != ENOENT:
+                raise
+        self._directories.pop(directory).evict()
+        return osopen(name, O_RDONLY, dir_fd=self._directoryFd(directory))
+
+    def _directoryFd(self, directory):
+        return self._directoryHandle(directory).fd
+
+    def _directoryHandle(self, directory):
+        handle = self._directories.get(directory)
+        if handle is None:
+            handle = self._directories[directory] = _Handle(osopen(directory, O_RDONLY | O_DIRECTORY))
+            if len(self._directories) > self._maxDirectories:
+                self._directories.popitem(last=False)[1].evict()
+        else:
+            self._directories.move_to_end(directory)
+        return handle
+
+
+class _Handle(object):
+    def __init__(self, fd):
+        self.fd = fd
+        self.refs = 0
+        self.evicted = False
+
+    def evict(self):
+        self.evicted = True
+        if self.refs == 0:
+            self.close()
+
+    def close(self):
+        if self.fd is not None:
+            osclose(self.fd)
+            self.fd = None
@@ -0,0 +1,116 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from os import open as osopen, close as osclose, fsync, sep, O_RDONLY
+from os.path import dirname
+from errno import ENOENT
+from threading import Condition, Lock
+
+
+class GroupSync(object):
+    """Lets concurrent callers share one sync: whoever asks while a sync is
+    in progress waits for the next one, which covers every request that
+    arrived in the meantime."""
+
+    def __init__(self, syncFunction):
+        self._syncFunction = syncFunction
+        self._condition = Condition()
+        self._requested = 0
+        self._synced = 0
+        self._syncing = False
+
+    def sync(self):
+        with self._condition:
+            self._requested += 1
+            ticket = self._requested
+            while self._synced < ticket:
+                if self._syncing:
+                    self._condition.wait()
+                    continue
+                self._syncing = True
+                target = self._requested
+                self._condition.release()
+                try:
+                    self._syncFunction()
+                finally:
+                    self._condition.acquire()
+                    self._syncing = False
+                    self._condition.notify_all()
+                self._synced = target
+
+
+class DirectorySyncer(object):
+    def __init__(self):
+        self._lock = Lock()
+        self._groups = {}
+
+    def sync(self, path):
+        with self._lock:
+            entry = self._groups.get(path)
+            if entry is None:
+                entry = self._groups[path] = [GroupSync(lambda: fsyncDirectory(path)), 0]
+            entry[1] += 1
+        try:
+            entry[0].sync()
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._groups[path]
+
+
+def fsyncDirectory(path):
+    fd = osopen(path, O_RDONLY)
+    try:
+        fsync(fd)
+    finally:
+        osclose(fd)
+
+def fsyncFiles(paths, root=None):
+    """Fsyncs the files at paths and then the directories holding them,
+    every directory once. With root also every directory between a file
+    and root, so directories created for the files are kept as well. Paths
+    that no longer exist are skipped."""
+    root = None if root is None else root.rstrip(sep)
+    directories = set()
+    for path in paths:
+        directory = dirname(path)
+        while directory not in directories:
+            directories.add(directory)
+            if root is None or len(directory) <= len(root):
+                break
+            directory = dirname(directory)
+        _fsyncExisting(path)
+    for directory in sorted(directories, reverse=True):
+        _fsyncExisting(directory)
+
+def _fsyncExisting(path):
+    try:
+        fsyncDirectory(path)
+    except OSError as e:
+        if e.errno != ENOENT:
+            raise
+
+directorySyncer = DirectorySyncer()
@@ -59,13 +59,47 @@ class HierarchicalStorage(object):
     @catchPutError
     def put(self, name):
         splitted = self._split(name)
+        return self._directory(splitted[:-1]).put(splitted[-1])
+
+    def putMany(self, names):
+        """Yields (index, sink) for every name, ordered by directory so each
+        directory is looked up or created only once. Names that cannot be
+        stored yield a HierarchicalStorageError instead of a sink, other
+        errors of the storage yield that error."""
+        splittedNames = []
+        for index, name in enumerate(names):
+            splitted = tuple(self._split(name))
+            splittedNames.append((splitted[:-1], index, name, splitted[-1]))
+        splittedNames.sort(key=lambda item: item[:2])
+        currentDirectory, storeHere = None, None
+        for directory, index, name, lastName in splittedNames:
+            try:
+                if directory != currentDirectory:
+                    storeHere = self._directory(directory)
+                    currentDirectory = directory
+                yield index, storeHere.put(lastName)
+            except KeyError as e:
+                yield index, HierarchicalStorageError("Name %s not allowed: %s" % (repr(name), str(e)))
+            except (OSError, ValueError) as e:
+                yield index, e
+
+    def _directory(self, storeNames):
         storeHere = self._storage
-        for storeName in splitted[:-1]:
+        for storeName in storeNames:
             try:
                 storeHere = storeHere.get(storeName)
             except KeyError:
-                storeHere = storeHere.put(storeName, self._storage.newStorage())
-        return storeHere.put(splitted[-1])
+                storeHere = self._createStorage(storeHere, storeName)
+        return storeHere
+
+    def _createStorage(self, storeHere, storeName):
+        try:
+            return storeHere.put(storeName, self._storage.newStorage())
+        except KeyError as e:
+            try:
+                return storeHere.get(storeName)  # created by a concurrent writer
+            except KeyError:
+                raise e
 
     @catchDoesNotExistError
     def get(self, name):
@@ -115,18 +149,15 @@ class HierarchicalStorage(object):
             return False
 
     def __iter__(self):
-        SKIP_BASENAME = 1
-        for item in self.allFilenamesIn(self._storage):
-            yield self._join(item[SKIP_BASENAME:])
+        for names in self._storage.walk():
+            yield self._join(names)
 
     def allFilenamesIn(self, storageOrFile):
-        if type(storageOrFile) == File:
+        if isinstance(storageOrFile, File):
             yield [storageOrFile.name]
         else:
-            aStorage = storageOrFile
-            for storageOrFile in aStorage:
-                for fileName in self.allFilenamesIn(storageOrFile):
-                    yield [aStorage.name] + fileName
+            for names in storageOrFile.walk():
+                yield [storageOrFile.name] + list(names)
 
     def glob(self, pattern):
         splitted = self._split(pattern)
@@ -139,8 +170,12 @@ class HierarchicalStorage(object):
                 eatenName.append(storeName)
                 store = store.get(storeName)
 
-        for item in self.allFilenamesIn(store):
-            yield self._join(eatenName + item[1:])
+        eatenName = tuple(eatenName)
+        if isinstance(store, File):
+            yield self._join(eatenName)
+            return
+        for names in store.walk():
+            yield self._join(eatenName + names)
 
 class HierarchicalStorageError(Exception):
     pass
@@ -0,0 +1,131 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from time import perf_counter
+from threading import Lock
+from traceback import print_exc
+
+
+class Metrics(object):
+    """Counts calls, errors, bytes and latencies per operation. Latencies go
+    into log2 buckets of microseconds. Hooks are called for every operation
+    with (operation, seconds, bytesRead, bytesWritten, error), to feed an
+    exporter such as Prometheus or StatsD. A failing hook is printed to
+    stderr and does not affect the operation."""
+
+    def __init__(self, hooks=None):
+        self._lock = Lock()
+        self._operations = {}
+        self._hooks = [] if hooks is None else list(hooks)
+
+    def addHook(self, hook):
+        self._hooks.append(hook)
+
+    def record(self, operation, seconds, bytesRead=0, bytesWritten=0, error=False):
+        bucket = int(seconds * 1000000).bit_length()
+        with self._lock:
+            counters = self._operations.get(operation)
+            if counters is None:
+                counters = self._operations[operation] = _Counters()
+            counters.count += 1
+            counters.errors += error
+            counters.seconds += seconds
+            counters.bytesRead += bytesRead
+            counters.bytesWritten += bytesWritten
+            counters.buckets[bucket] = counters.buckets.get(bucket, 0) + 1
+        for hook in self._hooks:
+            try:
+                hook(operation, seconds, bytesRead, bytesWritten, error)
+            except Exception:
+                print_exc()
+
+    def stats(self):
+        with self._lock:
+            return dict((operation, counters.asDict()) for operation, counters in self._operations.items())
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+    def instrument(self, obj, methodName, operation, read=None, written=None, iterate=False):
+        """Replaces obj.methodName on the instance by a measured version, so
+        objects without metrics pay nothing. read(result) and
+        written(*args, **kwargs) give the bytes; with iterate the returned
+        iterator is measured until it is exhausted or closed, and read is
+        given every item."""
+        method = getattr(obj, methodName)
+        def measured(*args, **kwargs):
+            start = perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                self.record(operation, perf_counter() - start, error=True)
+                raise
+            if iterate:
+                return self._measureIterator(operation, start, result, read)
+            self.record(operation, perf_counter() - start,
+                    bytesRead=0 if read is None else read(result),
+                    bytesWritten=0 if written is None else written(*args, **kwargs))
+            return result
+        setattr(obj, methodName, measured)
+
+    def _measureIterator(self, operation, start, iterator, read):
+        error = False
+        bytesRead = 0
+        try:
+            for item in iterator:
+                if read is not None:
+                    bytesRead += read(item)
+                yield item
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.record(operation, perf_counter() - start, bytesRead=bytesRead, error=error)
+
+
+def byteLength(data):
+    """Length of data in bytes, of str data as utf-8."""
+    return len(data.encode('utf-8') if isinstance(data, str) else data)
+
+
+class _Counters(object):
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.bytesRead = 0
+        self.bytesWritten = 0
+        self.buckets = {}
+
+    def asDict(self):
+        return dict(
+            count=self.count,
+            errors=self.errors,
+            seconds=self.seconds,
+            bytesRead=self.bytesRead,
+            bytesWritten=self.bytesWritten,
+            histogram=dict((1 << bucket, n) for bucket, n in sorted(self.buckets.items())))
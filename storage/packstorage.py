@@ -0,0 +1,466 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from os import makedirs, listdir, remove, fstat, ftruncate, pread, fsync, O_WRONLY, O_RDONLY, O_CREAT, O_APPEND
+from os import open as osopen, write as oswrite, close as osclose
+from os.path import join, isdir, basename
+from errno import ENOENT
+from struct import Struct
+from threading import RLock, Lock
+from io import StringIO, BytesIO
+from zlib import crc32
+import re
+
+from escaping import unescapeFilename
+
+from .storage import File, DirectoryNotEmptyError, DURABILITY_NONE, DURABILITY_FILE_AND_DIR
+from .groupsync import GroupSync, fsyncDirectory, fsyncFiles
+
+DEFAULT_MAX_SEGMENT_SIZE = 1024 ** 3
+DIRECTORY = object()
+PUT, MKDIR, DELETE = 1, 2, 3
+OPS = (PUT, MKDIR, DELETE)
+HEADER = Struct('>BIQI')
+NAME_LENGTH = Struct('>H')
+SEGMENT_NAME = 'segment-%08d.pack'
+SEGMENT_RE = re.compile(r'^segment-(\d{8})\.pack$')
+
+
+class PackStorage(object):
+    """Storage compatible backend that appends all parts to a few large
+    segment files instead of creating a file per part.
+
+    Directories only exist in an in memory index which is rebuilt from the
+    segment files when the storage is opened. With a durability other than
+    none every change is fsynced, concurrent writers share one fsync.
+
+    Threads may write concurrently; a pack directory must not be opened by
+    more than one process at a time."""
+
+    def __init__(self, basedir=None, maxSegmentSize=DEFAULT_MAX_SEGMENT_SIZE, binary=False, durability=DURABILITY_NONE, _pack=None, _path=()):
+        self._binary = binary
+        if _pack is None:
+            assert basedir, 'PackStorage needs a basedir'
+            _pack = Pack(basedir, maxSegmentSize=maxSegmentSize, durability=durability)
+        self._pack = _pack
+        self._path = _path
+        self.name = _path[-1] if _path else unescapeFilename(basename(_pack.basedir))
+
+    def asBinary(self):
+        return PackStorage(binary=True, _pack=self._pack, _path=self._path)
+
+    def newStorage(self):
+        return PackStorage(binary=self._binary, _pack=self._pack, _path=None)
+
+    def put(self, name, aStorage=None):
+        if not name:
+            raise KeyError('Empty name')
+        path = self._path + (name,)
+        if aStorage is not None:
+            if aStorage is self or aStorage._pack is not self._pack or aStorage._path is not None:
+                raise ValueError('Cannot put Storage inside itself.')
+            self._pack.makedir(path)
+            aStorage._path = path
+            aStorage.name = name
+            return aStorage
+        if self._pack.isdir(path):
+            raise KeyError('Key already exists: ' + name)
+        return PackSink(self._pack, path, binary=self._binary)
+
+    def get(self, name):
+        if not name:
+            raise KeyError('Empty name')
+        path = self._path + (name,)
+        if self._pack.isdir(path):
+            return PackStorage(binary=self._binary, _pack=self._pack, _path=path)
+        elif self._pack.isfile(path):
+            return PackFile(self._pack, path, binary=self._binary)
+        raise KeyError(name)
+
+    def getStorage(self, name):
+        if not name:
+            raise KeyError('Empty name')
+        return PackStorage(binary=self._binary, _pack=self._pack, _path=self._path + (name,))
+
+    def getFile(self, name):
+        if not name:
+            raise KeyError('Empty name')
+        return PackFile(self._pack, self._path + (name,), binary=self._binary)
+
+    def __contains__(self, name):
+        return (self._path + (name,)) in self._pack
+
+    def delete(self, name):
+        path = self._path + (name,)
+        if not path in self._pack:
+            raise KeyError(name)
+        self._pack.delete(path)
+
+    def purge(self, name):
+        path = self._path + (name,)
+        if not path in self._pack:
+            raise KeyError(name)
+        if self._pack.children(path):
+            raise DirectoryNotEmptyError(name)
+        self._pack.delete(path)
+
+    def __iter__(self):
+        for name in self._pack.children(self._path):
+            try:
+                yield self.get(name)
+            except KeyError:
+                pass
+
+    def walk(self):
+        stack = [((), self._path)]
+        while stack:
+            names, path = stack.pop()
+            for name in self._pack.children(path):
+                entryNames = names + (name,)
+                if self._pack.isdir(path + (name,)):
+                    stack.append((entryNames, path + (name,)))
+                else:
+                    yield entryNames
+
+    def compact(self):
+        self._pack.compact()
+
+    def sync(self):
+        self._pack.sync()
+
+
+class PackSink(object):
+    def __init__(self, pack, path, binary=False):
+        self._pack = pack
+        self._path = path
+        self._binary = binary
+        self._data = []
+        self.name = path[-1]
+
+    def send(self, data):
+        self._data.append(data)
+
+    def close(self):
+        data = b''.join(self._data) if self._binary else ''.join(self._data).encode('utf-8')
+        self._data = None
+        self._pack.write(self._path, data)
+
+    def abort(self):
+        self._data = None
+
+
+class PackFile(File):
+    def __init__(self, pack, path, binary=False):
+        self._pack = pack
+        self.path = path
+        self.name = path[-1]
+        self._binary = binary
+        self._done, self._open, self._nextdata = False, None, None
+
+    def _opendata(self):
+        if self._open == None and not self._done:
+            data = self._pack.read(self.path)
+            if data is None:
+                raise IOError(ENOENT, 'No such part', '/'.join(self.path))
+            self._open = BytesIO(data) if self._binary else StringIO(data.decode('utf-8'))
+        return self._open
+
+    def mmap(self):
+        return memoryview(self.readRange(0))
+
+    def readRange(self, offset, length=None):
+        data = self._pack.read(self.path, offset, length)
+        if data is None:
+            raise IOError(ENOENT, 'No such part', '/'.join(self.path))
+        return data
+
+    def size(self):
+        size = self._pack.size(self.path)
+        if size is None:
+            raise IOError(ENOENT, 'No such part', '/'.join(self.path))
+        return size
+
+
+class Pack(object):
+    """Append only segment files with an index of (segment, offset, length)
+    per path. Every record is self describing and has a crc32 over header,
+    path and data, so the index is rebuilt by scanning the segments and a
+    torn or zero filled tail is recognised and cut off.
+
+    Readers hold a reference to the segment they read from, so compact can
+    remove segments while they are read."""
+
+    def __init__(self, basedir, maxSegmentSize=DEFAULT_MAX_SEGMENT_SIZE, durability=DURABILITY_NONE):
+        self.basedir = basedir
+        self._maxSegmentSize = maxSegmentSize
+        self._durability = durability
+        isdir(basedir) or makedirs(basedir)
+        self._lock = RLock()
+        self._groupSync = GroupSync(self._fsyncSegment)
+        self._entries = {(): DIRECTORY}
+        self._children = {(): set()}
+        self._readFds = {}
+        self._readFdsLock = Lock()
+        self._writeFd = None
+        self._unsynced = set()
+        self._load()
+
+    def __contains__(self, path):
+        return path in self._entries
+
+    def isdir(self, path):
+        return self._entries.get(path) is DIRECTORY
+
+    def isfile(self, path):
+        entry = self._entries.get(path)
+        return entry is not None and entry is not DIRECTORY
+
+    def children(self, path):
+        with self._lock:
+            return sorted(self._children.get(path, ()))
+
+    def makedir(self, path):
+        with self._lock:
+            if self.isfile(path) or self._children.get(path):
+                raise KeyError('Key already exists: ' + path[-1])
+            self._append(MKDIR, path)
+        self._sync()
+
+    def write(self, path, data):
+        with self._lock:
+            if self.isdir(path):
+                raise KeyError('Key already exists: ' + path[-1])
+            if not self.isdir(path[:-1]):
+                raise KeyError(path[-2] if len(path) > 1 else path[-1])
+            self._append(PUT, path, data)
+        self._sync()
+
+    def delete(self, path):
+        with self._lock:
+            self._append(DELETE, path)
+        self._sync()
+
+    def read(self, path, offset=0, length=None):
+        with self._readFdsLock:
+            location = self._entries.get(path)
+            if location is None or location is DIRECTORY:
+                return None
+            segment, start, size = location
+            handle = self._readFd(segment)
+            handle.refs += 1
+        try:
+            offset = min(offset, size)
+            length = size - offset if length is None else min(length, size - offset)
+            return pread(handle.fd, length, start + offset)
+        finally:
+            with self._readFdsLock:
+                handle.release()
+
+    def size(self, path):
+        location = self._entries.get(path)
+        if location is None or location is DIRECTORY:
+            return None
+        return location[2]
+
+    def compact(self):
+        """Rewrites all live parts into new segments and removes the old
+        ones. Replaying the old segments followed by the new ones yields the
+        same index, so a crash halfway leaves a consistent store."""
+        with self._lock:
+            oldSegments = self._segmentNumbers()
+            self._openSegment(oldSegments[-1] + 1 if oldSegments else 0)
+            for path in sorted(self._entries):
+                if path == ():
+                    continue
+                if self.isdir(path):
+                    self._append(MKDIR, path)
+                else:
+                    self._append(PUT, path, self.read(path))
+            fsync(self._writeFd)
+            with self._readFdsLock:
+                for number in oldSegments:
+                    handle = self._readFds.pop(number, None)
+                    handle is None or handle.evict()
+                    remove(self._segmentPath(number))
+
+    def sync(self):
+        """Fsyncs the segments written since the last sync."""
+        with self._lock:
+            numbers, self._unsynced = self._unsynced, set()
+        fsyncFiles(self._segmentPath(number) for number in sorted(numbers))
+
+    def close(self):
+        with self._lock, self._readFdsLock:
+            for handle in list(self._readFds.values()):
+                handle.evict()
+            self._readFds.clear()
+            if self._writeFd is not None:
+                osclose(self._writeFd)
+                self._writeFd = None
+
+    def __del__(self):
+        if hasattr(self, '_lock'):
+            self.close()
+
+    def _append(self, op, path, data=b''):
+        key = _encodePath(path)
+        record = HEADER.pack(op, len(key), len(data), _crc(op, key, data)) + key + data
+        if self._writeSize > 0 and self._writeSize + len(record) > self._maxSegmentSize:
+            self._openSegment(self._writeSegment + 1)
+        offset = self._writeSize + HEADER.size + len(key)
+        view = memoryview(record)
+        while view:
+            view = view[oswrite(self._writeFd, view):]
+        self._writeSize += len(record)
+        self._unsynced.add(self._writeSegment)
+        self._apply(op, path, (self._writeSegment, offset, len(data)))
+
+    def _apply(self, op, path, location):
+        if op == DELETE:
+            self._remove(path)
+            return
+        if path in self._entries and (op == PUT) != (self._entries[path] is not DIRECTORY):
+            self._remove(path)
+        parent = path[:-1]
+        if not parent in self._children:
+            self._apply(MKDIR, parent, None)
+        self._children[parent].add(path[-1])
+        if op == MKDIR:
+            self._entries[path] = DIRECTORY
+            self._children.setdefault(path, set())
+        else:
+            self._entries[path] = location
+
+    def _remove(self, path):
+        if self._entries.pop(path, None) is DIRECTORY:
+            for name in self._children.pop(path):
+                self._remove(path + (name,))
+        self._children.get(path[:-1], set()).discard(path[-1])
+
+    def _load(self):
+        numbers = self._segmentNumbers()
+        for number in numbers:
+            self._scan(number)
+        self._openSegment(numbers[-1] if numbers else 0)
+
+    def _scan(self, number):
+        """Indexes the records of a segment up to the first one that is
+        incomplete or does not match its crc, and truncates it there."""
+        offset = 0
+        with open(self._segmentPath(number), 'rb') as f:
+            size = fstat(f.fileno()).st_size
+            while offset + HEADER.size <= size:
+                op, keyLength, dataLength, crc = HEADER.unpack(f.read(HEADER.size))
+                dataOffset = offset + HEADER.size + keyLength
+                if op not in OPS or keyLength == 0 or dataOffset + dataLength > size:
+                    break
+                key = f.read(keyLength)
+                data = f.read(dataLength)
+                if crc != _crc(op, key, data):
+                    break
+                path = _decodePath(key)
+                if path is None:
+                    break
+                self._apply(op, path, (number, dataOffset, dataLength))
+                offset = dataOffset + dataLength
+        if offset < size:
+            writeFd = osopen(self._segmentPath(number), O_WRONLY)
+            try:
+                ftruncate(writeFd, offset)
+            finally:
+                osclose(writeFd)
+
+    def _sync(self):
+        if self._durability != DURABILITY_NONE:
+            self._groupSync.sync()
+
+    def _fsyncSegment(self):
+        with self._lock:
+            fsync(self._writeFd)
+
+    def _openSegment(self, number):
+        if self._writeFd is not None:
+            self._durability == DURABILITY_NONE or fsync(self._writeFd)
+            osclose(self._writeFd)
+        self._writeFd = osopen(self._segmentPath(number), O_WRONLY | O_CREAT | O_APPEND, 0o644)
+        self._writeSegment = number
+        self._writeSize = fstat(self._writeFd).st_size
+        if self._durability == DURABILITY_FILE_AND_DIR:
+            fsyncDirectory(self.basedir)
+
+    def _readFd(self, number):
+        handle = self._readFds.get(number)
+        if handle is None:
+            handle = self._readFds[number] = _Segment(osopen(self._segmentPath(number), O_RDONLY))
+        return handle
+
+    def _segmentNumbers(self):
+        return sorted(int(m.group(1)) for m in (SEGMENT_RE.match(name) for name in listdir(self.basedir)) if m)
+
+    def _segmentPath(self, number):
+        return join(self.basedir, SEGMENT_NAME % number)
+
+
+class _Segment(object):
+    def __init__(self, fd):
+        self.fd = fd
+        self.refs = 0
+        self.evicted = False
+
+    def release(self):
+        self.refs -= 1
+        if self.evicted and self.refs == 0:
+            osclose(self.fd)
+
+    def evict(self):
+        self.evicted = True
+        if self.refs == 0:
+            osclose(self.fd)
+
+
+def _crc(op, key, data):
+    return crc32(data, crc32(key, crc32(HEADER.pack(op, len(key), len(data), 0))))
+
+def _encodePath(path):
+    return b''.join(NAME_LENGTH.pack(len(n)) + n for n in (name.encode('utf-8') for name in path))
+
+def _decodePath(key):
+    """Returns the path encoded in key, or None when key is no valid
+    encoding of a path."""
+    path = []
+    offset = 0
+    while offset < len(key):
+        if offset + NAME_LENGTH.size > len(key):
+            return None
+        (length,) = NAME_LENGTH.unpack_from(key, offset)
+        offset += NAME_LENGTH.size
+        if length == 0 or offset + length > len(key):
+            return None
+        try:
+            path.append(key[offset:offset + length].decode('utf-8'))
+        except UnicodeDecodeError:
+            return None
+        offset += length
+    return tuple(path) or None
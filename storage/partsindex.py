@@ -0,0 +1,284 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from sys import intern
+from bisect import bisect_left, bisect_right
+from json import dumps, loads
+from os import rename, fsync, remove
+from os.path import isfile, dirname, abspath
+from threading import RLock
+
+from .groupsync import fsyncDirectory
+
+BLOCK_SIZE = 1000
+MIN_JOURNAL_LENGTH = 10000
+ADD, REMOVE, PURGE = 'add', 'remove', 'purge'
+
+
+class PartsIndex(object):
+    """Map of identifier to its sorted partnames, used by StorageComponent to
+    answer existence questions and to list identifiers without touching
+    disk. Identifiers are kept sorted, so prefix and range scans cost the
+    size of the result.
+
+    Like the directories on disk, an identifier stays known after its last
+    part is deleted and only disappears when it is purged.
+
+    With a path the index survives restarts: changes are appended to a
+    journal which is compacted into a sorted snapshot now and then. Only an
+    index that was closed is trusted when opened again; after a crash the
+    store may hold parts the index missed, so needsRebuild() is true."""
+
+    def __init__(self, path=None):
+        self._path = path
+        self._lock = RLock()
+        self._parts = {}
+        self._identifiers = SortedKeys()
+        self._journal = None
+        self._journalLength = 0
+        self._loaded = False
+        self._clean = False
+        if path is not None:
+            self._load()
+
+    def needsRebuild(self):
+        return not (self._loaded and self._clean)
+
+    def rebuild(self, identifiersAndPartnames):
+        with self._lock:
+            self._parts = {}
+            self._identifiers = SortedKeys()
+            for identifier, partname in identifiersAndPartnames:
+                self._add(identifier, partname)
+            self._loaded = True
+            self._clean = True
+            if self._path is not None:
+                self.save()
+
+    def add(self, identifier, partname):
+        with self._lock:
+            if self._add(identifier, partname):
+                self._log(ADD, identifier, partname)
+
+    def remove(self, identifier, partname):
+        with self._lock:
+            if self._remove(identifier, partname):
+                self._log(REMOVE, identifier, partname)
+
+    def purge(self, identifier, partname):
+        with self._lock:
+            if self._purge(identifier, partname):
+                self._log(PURGE, identifier, partname)
+
+    def isAvailable(self, identifier, partname):
+        parts = self._parts.get(identifier)
+        if parts is None:
+            return False, False
+        return True, partname is None or partname in parts
+
+    def parts(self, identifier):
+        return self._parts.get(identifier, ())
+
+    def identifiers(self, prefix='', partname=None, after=None):
+        """Yields sorted identifiers with at least one part (or the given
+        partname) starting with prefix. Passing the last identifier seen as
+        after resumes a previous listing."""
+        if after is None or after < prefix:
+            keys = self._identifiers.iterFrom(prefix)
+        else:
+            keys = self._identifiers.iterFrom(after, inclusive=False)
+        for identifier in keys:
+            if not identifier.startswith(prefix):
+                return
+            parts = self._parts.get(identifier)
+            if parts and (partname is None or partname in parts):
+                yield identifier
+
+    def save(self):
+        with self._lock:
+            tmpPath = self._path + '.tmp'
+            with open(tmpPath, 'w') as f:
+                for identifier in self._identifiers.iterFrom(''):
+                    f.write(dumps([identifier, self._parts[identifier]]) + '\n')
+                f.flush()
+                fsync(f.fileno())
+            rename(tmpPath, self._path)
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = open(self._journalPath(), 'w')
+            self._journalLength = 0
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self.save()
+                self._journal.close()
+                self._journal = None
+                with open(self._cleanPath(), 'w') as f:
+                    fsync(f.fileno())
+                fsyncDirectory(dirname(abspath(self._path)))
+
+    def __contains__(self, identifier_partname):
+        return self.isAvailable(*identifier_partname) == (True, True)
+
+    def __len__(self):
+        return len(self._parts)
+
+    def _add(self, identifier, partname):
+        parts = self._parts.get(identifier)
+        if parts is None:
+            self._identifiers.add(identifier)
+            parts = self._parts[identifier] = ()
+        if partname is None or partname in parts:
+            return False
+        self._parts[identifier] = tuple(sorted(parts + (intern(partname),)))
+        return True
+
+    def _remove(self, identifier, partname):
+        parts = self._parts.get(identifier)
+        if parts is None or not partname in parts:
+            return False
+        self._parts[identifier] = tuple(p for p in parts if p != partname)
+        return True
+
+    def _purge(self, identifier, partname):
+        changed = self._remove(identifier, partname)
+        if self._parts.get(identifier, True):
+            return changed
+        del self._parts[identifier]
+        self._identifiers.remove(identifier)
+        return True
+
+    def _log(self, op, identifier, partname):
+        if self._journal is None:
+            return
+        self._journal.write(dumps([op, identifier, partname]) + '\n')
+        self._journal.flush()
+        self._journalLength += 1
+        if self._journalLength > max(MIN_JOURNAL_LENGTH, len(self._parts)):
+            self.save()
+
+    def _load(self):
+        self._clean = isfile(self._cleanPath())
+        if self._clean:
+            remove(self._cleanPath())
+            fsyncDirectory(dirname(abspath(self._path)))
+        if isfile(self._path):
+            with open(self._path) as f:
+                for line in f:
+                    identifier, parts = loads(line)
+                    self._parts[identifier] = tuple(intern(p) for p in parts)
+            self._identifiers = SortedKeys(sorted(self._parts))
+            self._loaded = True
+        if isfile(self._journalPath()):
+            apply = {ADD: self._add, REMOVE: self._remove, PURGE: self._purge}
+            with open(self._journalPath()) as f:
+                for line in f:
+                    try:
+                        op, identifier, partname = loads(line)
+                    except ValueError:
+                        break
+                    apply[op](identifier, partname)
+            self._loaded = True
+        self._journal = open(self._journalPath(), 'a')
+
+    def _journalPath(self):
+        return self._path + '.journal'
+
+    def _cleanPath(self):
+        return self._path + '.clean'
+
+
+class SortedKeys(object):
+    """Sorted collection of keys stored as a list of bounded blocks, so an
+    insert or removal only shifts one block."""
+
+    def __init__(self, sortedKeys=()):
+        keys = list(sortedKeys)
+        self._blocks = [keys[i:i + BLOCK_SIZE] for i in range(0, len(keys), BLOCK_SIZE)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._length = len(keys)
+
+    def add(self, key):
+        if not self._blocks:
+            self._blocks.append([key])
+            self._maxes.append(key)
+            self._length = 1
+            return
+        i = min(bisect_left(self._maxes, key), len(self._blocks) - 1)
+        block = self._blocks[i]
+        j = bisect_left(block, key)
+        if j < len(block) and block[j] == key:
+            return
+        block.insert(j, key)
+        self._maxes[i] = block[-1]
+        self._length += 1
+        if len(block) > 2 * BLOCK_SIZE:
+            self._blocks[i:i + 1] = [block[:BLOCK_SIZE], block[BLOCK_SIZE:]]
+            self._maxes[i:i + 1] = [block[BLOCK_SIZE - 1], block[-1]]
+
+    def remove(self, key):
+        i = bisect_left(self._maxes, key)
+        if i == len(self._blocks):
+            return
+        block = self._blocks[i]
+        j = bisect_left(block, key)
+        if j == len(block) or block[j] != key:
+            return
+        del block[j]
+        self._length -= 1
+        if block:
+            self._maxes[i] = block[-1]
+        else:
+            del self._blocks[i]
+            del self._maxes[i]
+
+    def iterFrom(self, key, inclusive=True):
+        while True:
+            keys = self._keysFrom(key, inclusive)
+            if not keys:
+                return
+            for result in keys:
+                yield result
+            key, inclusive = keys[-1], False
+
+    def _keysFrom(self, key, inclusive):
+        find = bisect_left if inclusive else bisect_right
+        i = find(self._maxes, key)
+        if i == len(self._blocks):
+            return []
+        block = self._blocks[i]
+        return block[find(block, key):]
+
+    def __contains__(self, key):
+        i = bisect_left(self._maxes, key)
+        if i == len(self._blocks):
+            return False
+        block = self._blocks[i]
+        j = bisect_left(block, key)
+        return j < len(block) and block[j] == key
+
+    def __len__(self):
+        return self._length
@@ -0,0 +1,93 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from collections import OrderedDict
+from threading import Lock
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 100000
+
+class ReadCache(object):
+    """LRU cache of part data bounded by total size and number of entries.
+
+    Data read before an invalidation is never stored after it: callers take
+    a token() before reading from disk and hand it to put()."""
+
+    def __init__(self, maxBytes=DEFAULT_MAX_BYTES, maxEntries=DEFAULT_MAX_ENTRIES):
+        self._maxBytes = maxBytes
+        self._maxEntries = maxEntries
+        self._entries = OrderedDict()
+        self._size = 0
+        self._invalidations = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def token(self):
+        return self._invalidations
+
+    def put(self, key, data, token):
+        if len(data) > self._maxBytes:
+            return
+        with self._lock:
+            if token != self._invalidations:
+                return
+            self._remove(key)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self._maxBytes or len(self._entries) > self._maxEntries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._invalidations += 1
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += 1
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, evictions=self.evictions, entries=len(self._entries), bytes=self._size)
+
+    def _remove(self, key):
+        data = self._entries.pop(key, None)
+        if data is not None:
+            self._size -= len(data)
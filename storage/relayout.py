@@ -0,0 +1,154 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os import listdir, makedirs, remove, stat
+from os.path import join, isdir, dirname, samestat, exists
+from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor
+from errno import ENOENT
+
+from escaping import escapeFilename, unescapeFilename
+
+from .storage import Storage, Sink, isTemporary
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def relayout(source, target, sourceStrategy, targetStrategy, maxWorkers=DEFAULT_MAX_WORKERS, removeStale=True):
+    """Lays out the parts of the store in source anew in target, using
+    targetStrategy. Parts are hardlinked, not copied, so source and target
+    must be on one filesystem. Top level directories are done in parallel.
+
+    The store may be used while this runs. Every pass only links what changed
+    since the previous one and, with removeStale, removes what was deleted,
+    so an interrupted run is resumed by running again. To switch over, stop
+    writing, run a last (quick) pass and open the store in target.
+
+    Returns the numbers of parts linked, unchanged and removed."""
+    if not isdir(target):
+        makedirs(target)
+    with ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix='storage-relayout') as executor:
+        counts = list(executor.map(
+                lambda top: _linkTree(source, target, top, sourceStrategy, targetStrategy),
+                _topNames(source)))
+        if removeStale:
+            counts.extend(executor.map(
+                    lambda top: _removeStale(source, target, top, sourceStrategy, targetStrategy),
+                    _topNames(target)))
+    return dict((key, sum(count[key] for count in counts)) for key in ['linked', 'unchanged', 'removed'])
+
+
+def _linkTree(source, target, top, sourceStrategy, targetStrategy):
+    count = dict(linked=0, unchanged=0, removed=0)
+    sidecar = hasattr(targetStrategy, 'joinLeaf')
+    for identifier, partname in _parts(source, top, sourceStrategy):
+        sourcePath = _path(source, sourceStrategy.split((identifier, partname)))
+        if sidecar:
+            _writeSidecar(_path(target, targetStrategy.split((identifier, None))), identifier)
+        if _link(sourcePath, _path(target, targetStrategy.split((identifier, partname)))):
+            count['linked'] += 1
+        else:
+            count['unchanged'] += 1
+    return count
+
+
+def _removeStale(source, target, top, sourceStrategy, targetStrategy):
+    count = dict(linked=0, unchanged=0, removed=0)
+    for identifier, partname in _parts(target, top, targetStrategy):
+        if not exists(_path(source, sourceStrategy.split((identifier, partname)))):
+            try:
+                remove(_path(target, targetStrategy.split((identifier, partname))))
+                count['removed'] += 1
+            except OSError as e:
+                if e.errno != ENOENT:
+                    raise
+    return count
+
+
+def _link(sourcePath, targetPath):
+    try:
+        sourceStat = stat(sourcePath)
+        if samestat(sourceStat, stat(targetPath)):
+            return False
+    except OSError as e:
+        if e.errno != ENOENT:
+            raise
+    makedirs(dirname(targetPath), exist_ok=True)
+    sink = Sink(targetPath, binary=True)
+    try:
+        sink.link(sourcePath)
+    except OSError as e:
+        if e.errno != ENOENT:
+            raise
+        return False
+    sink.close()
+    return True
+
+
+def _writeSidecar(path, identifier):
+    if exists(path):
+        return
+    makedirs(dirname(path), exist_ok=True)
+    sink = Sink(path, binary=True)
+    try:
+        sink.send(identifier.encode('utf-8'))
+    finally:
+        sink.close()
+
+
+def _parts(directory, top, strategy):
+    if not hasattr(strategy, 'joinLeaf'):
+        for names in _walk(directory, top):
+            yield strategy.join(list(names))
+        return
+    for leaf, items in groupby(_walk(directory, top), key=lambda names: names[:-1]):
+        names = [item[-1] for item in items]
+        readIdentifier = lambda name: _readIdentifier(_path(directory, leaf + (name,)))
+        for identifier, partname in strategy.joinLeaf(names, readIdentifier):
+            yield identifier, partname
+
+
+def _walk(directory, top):
+    path = join(directory, escapeFilename(top))
+    if not isdir(path):
+        walked = [()]
+    else:
+        walked = Storage(path).walk()
+    for names in walked:
+        yield (top,) + names
+
+
+def _readIdentifier(path):
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+
+def _path(directory, names):
+    return join(directory, *[escapeFilename(name) for name in names])
+
+
+def _topNames(directory):
+    return sorted(unescapeFilename(name) for name in listdir(directory) if not isTemporary(name))
@@ -0,0 +1,171 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os import walk, listdir, remove, stat
+from os.path import join, isdir, basename
+from time import monotonic, sleep, time
+from threading import Lock, Thread
+from concurrent.futures import ThreadPoolExecutor
+from zlib import crc32
+
+from .storage import readChecksum, isTemporary
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_ORPHAN_AGE = 3600
+READ_SIZE = 1024 * 1024
+
+
+class Scrubber(object):
+    """Reads every file of a store and compares it with the checksum that was
+    recorded when it was written, to find bit rot and truncated parts early.
+    Temporary files of sinks older than orphanAge seconds are left over from
+    crashed writers and reported as orphaned.
+
+    Top level directories are scrubbed in parallel; maxBytesPerSecond limits
+    the reading of all workers together, so scrubbing can run next to normal
+    use."""
+
+    def __init__(self, directory, maxWorkers=DEFAULT_MAX_WORKERS, maxBytesPerSecond=None, orphanAge=DEFAULT_ORPHAN_AGE, removeOrphans=False, metrics=None):
+        self._directory = directory
+        self._maxWorkers = maxWorkers
+        self._throttle = None if maxBytesPerSecond is None else _Throttle(maxBytesPerSecond)
+        self._orphanAge = orphanAge
+        self._removeOrphans = removeOrphans
+        self._metrics = metrics
+        self._lock = Lock()
+        self._thread = None
+        self._stopped = False
+        self._reset()
+
+    def run(self):
+        """Scrubs the whole store and returns the report."""
+        self._reset()
+        tops = sorted(listdir(self._directory))
+        self._progress['directories'] = len(tops)
+        with ThreadPoolExecutor(max_workers=self._maxWorkers, thread_name_prefix='storage-scrub') as executor:
+            list(executor.map(self._scrubTop, tops))
+        return self.report()
+
+    def start(self):
+        self._stopped = False
+        self._thread = Thread(target=self.run, name='storage-scrubber', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def isRunning(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def progress(self):
+        with self._lock:
+            return dict(self._progress, corrupt=len(self._corrupt), orphaned=len(self._orphaned))
+
+    def report(self):
+        with self._lock:
+            return dict(self._progress, corrupt=list(self._corrupt), orphaned=list(self._orphaned))
+
+    def _reset(self):
+        with self._lock:
+            self._progress = dict(directories=0, directoriesDone=0, files=0, bytes=0, verified=0, unchecked=0)
+            self._corrupt = []
+            self._orphaned = []
+
+    def _scrubTop(self, top):
+        path = join(self._directory, top)
+        if isdir(path):
+            for directory, directories, files in walk(path):
+                for name in files:
+                    if self._stopped:
+                        return
+                    self._scrubFile(join(directory, name))
+        else:
+            self._scrubFile(path)
+        self._count('directoriesDone')
+
+    def _scrubFile(self, path):
+        if isTemporary(basename(path)):
+            self._checkOrphan(path)
+            return
+        start = monotonic()
+        size = 0
+        crc = 0
+        try:
+            with open(path, 'rb') as f:
+                expected = readChecksum(f.fileno())
+                while True:
+                    data = f.read(READ_SIZE)
+                    if not data:
+                        break
+                    if self._throttle is not None:
+                        self._throttle.consume(len(data))
+                    size += len(data)
+                    if expected is not None:
+                        crc = crc32(data, crc)
+        except FileNotFoundError:
+            return
+        corrupt = expected is not None and crc != expected
+        with self._lock:
+            self._progress['files'] += 1
+            self._progress['bytes'] += size
+            self._progress['unchecked' if expected is None else 'verified'] += 1
+            if corrupt:
+                self._corrupt.append(path)
+        if self._metrics is not None:
+            self._metrics.record('scrub', monotonic() - start, bytesRead=size, error=corrupt)
+
+    def _checkOrphan(self, path):
+        try:
+            if time() - stat(path).st_mtime < self._orphanAge:
+                return
+            if self._removeOrphans:
+                remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._orphaned.append(path)
+
+    def _count(self, key):
+        with self._lock:
+            self._progress[key] += 1
+
+
+class _Throttle(object):
+    def __init__(self, bytesPerSecond):
+        self._rate = float(bytesPerSecond)
+        self._lock = Lock()
+        self._next = monotonic()
+
+    def consume(self, size):
+        with self._lock:
+            now = monotonic()
+            start = max(now, self._next)
+            self._next = start + size / self._rate
+        if start > now:
+            sleep(start - now)
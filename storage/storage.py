@@ -29,27 +29,51 @@
 #
 ## end license ##
 
-from os.path import join, isdir, basename, isfile
-from os import makedirs, rename, remove, listdir, rmdir
+from os.path import join, isdir, basename, isfile, dirname, getsize
+from os import makedirs, rename, remove, rmdir, fsync, fstat, scandir, link
 from tempfile import gettempdir
-from errno import ENAMETOOLONG, EINVAL, ENOENT, EISDIR, ENOTDIR, ENOTEMPTY, EEXIST
+from errno import ENAMETOOLONG, EINVAL, ENOENT, EISDIR, ENOTDIR, ENOTEMPTY, EEXIST, EIO
 from shutil import rmtree
 import re
 from random import choice
+from mmap import mmap, ACCESS_READ
+from zlib import crc32
+from io import RawIOBase, BufferedReader, TextIOWrapper
+import os
 
 from escaping import escapeFilename, unescapeFilename
 
+from .groupsync import directorySyncer
+
 
 defaultTempdir = gettempdir()
 
+DURABILITY_NONE = 'none'
+DURABILITY_FILE = 'file-fsync'
+DURABILITY_FILE_AND_DIR = 'file-and-dir-fsync'
+FILE_CHUNK_SIZE = 4096
+CHECKSUMS_NONE = 'none'
+CHECKSUMS_RECORD = 'record'
+CHECKSUMS_VERIFY = 'verify'
+CHECKSUM_XATTR = 'user.storage.crc32'
+TEMPORARY_PATTERN = re.compile(r'^\..+,[a-zA-Z0-9]{6},t$')
+
 
 
 class DirectoryNotEmptyError(Exception):
     pass
 
+class ChecksumError(IOError):
+    pass
+
 
 class Storage(object):
-    def __init__(self, basedir=None, tempdir=defaultTempdir, checkExists=True):
+    def __init__(self, basedir=None, tempdir=defaultTempdir, checkExists=True, binary=False, durability=DURABILITY_NONE, checksums=CHECKSUMS_NONE):
+        assert durability in DURABILITIES, 'Unknown durability %s' % repr(durability)
+        assert checksums in CHECKSUMS, 'Unknown checksums %s' % repr(checksums)
+        self._binary = binary
+        self._durability = durability
+        self._checksums = checksums
         if not basedir:
             self._basedir = self._createRandomDirectory(tempdir=tempdir)
             self._own = True
@@ -61,20 +85,25 @@ class Storage(object):
         self.name = unescapeFilename(basename(self._basedir))
 
     def __del__(self):
-        if self._own:
+        if getattr(self, '_own', False):
             rmtree(self._basedir)
 
     def _createRandomDirectory(self, tempdir=defaultTempdir):
-        randomName = '.' + ''.join([choice(CHARS_FOR_RANDOM) for i in range(0,6)])
+        randomName = '.' + randomString()
         fullname = join(tempdir, randomName)
         makedirs(fullname)
         return fullname
 
+    def asBinary(self):
+        return Storage(self._basedir, checkExists=False, binary=True, durability=self._durability, checksums=self._checksums)
+
     def newStorage(self):
-        return Storage(tempdir = self._basedir)
+        return Storage(tempdir = self._basedir, binary=self._binary, durability=self._durability, checksums=self._checksums)
 
     def _transferOwnership(self, path):
         rename(self._basedir, path)
+        if self._durability == DURABILITY_FILE_AND_DIR:
+            directorySyncer.sync(dirname(path))
         self._basedir = path
         self._own = False
         self.name = unescapeFilename(basename(self._basedir))
@@ -88,7 +117,7 @@ class Storage(object):
                 aStorage._transferOwnership(path)
                 return aStorage
             else:
-                return Sink(path)
+                return Sink(path, binary=self._binary, durability=self._durability, checksum=self._checksums != CHECKSUMS_NONE)
         except (OSError,IOError) as e:
             if e.errno == ENAMETOOLONG:
                 raise KeyError('Name too long: ' + name)
@@ -103,22 +132,22 @@ class Storage(object):
             raise KeyError('Empty name')
         path = join(self._basedir, escapeFilename(name))
         if isdir(path):
-            return Storage(path)
+            return Storage(path, binary=self._binary, durability=self._durability, checksums=self._checksums)
         elif isfile(path):
-            return File(path)
+            return File(path, binary=self._binary, verify=self._checksums == CHECKSUMS_VERIFY)
         raise KeyError(name)
 
     def getStorage(self, name):
         if not name:
             raise KeyError('Empty name')
         path = join(self._basedir, escapeFilename(name))
-        return Storage(path, checkExists=False)
+        return Storage(path, checkExists=False, binary=self._binary, durability=self._durability, checksums=self._checksums)
 
     def getFile(self, name):
         if not name:
             raise KeyError('Empty name')
         path = join(self._basedir, escapeFilename(name))
-        return File(path)
+        return File(path, binary=self._binary, verify=self._checksums == CHECKSUMS_VERIFY)
 
     def __contains__(self, name):
         path = join(self._basedir, escapeFilename(name))
@@ -154,36 +183,120 @@ class Storage(object):
             raise
 
     def __iter__(self):
-        for item in listdir(self._basedir):
-            yield self.get(unescapeFilename(item))
+        with scandir(self._basedir) as entries:
+            for entry in entries:
+                if isTemporary(entry.name):
+                    continue
+                if entry.is_dir():
+                    yield Storage(entry.path, checkExists=False, binary=self._binary, durability=self._durability, checksums=self._checksums)
+                else:
+                    yield File(entry.path, binary=self._binary, verify=self._checksums == CHECKSUMS_VERIFY)
+
+    def walk(self):
+        """Yields a tuple of names for every file below this storage. Files
+        of one directory are yielded together; temporary files of unfinished
+        sinks are skipped."""
+        stack = [((), self._basedir)]
+        while stack:
+            names, path = stack.pop()
+            with scandir(path) as entries:
+                for entry in entries:
+                    if isTemporary(entry.name):
+                        continue
+                    entryNames = names + (unescapeFilename(entry.name),)
+                    if entry.is_dir():
+                        stack.append((entryNames, entry.path))
+                    else:
+                        yield entryNames
 
 class Sink(object):
-    def __init__(self, path):
-        self._openpath = path
-        if isfile(path):
-            self._openpath += ',t'
+    """Writes to a temporary file that replaces the target on close, so a
+    part is either complete or absent after a crash. Every sink has its own
+    temporary file, concurrent writers of one part do not interfere."""
+
+    def __init__(self, path, binary=False, durability=DURABILITY_NONE, checksum=False):
+        if isdir(path):
+            raise IOError(EISDIR, 'Is a directory', path)
+        self._openpath = temporaryPath(path)
+        self._durability = durability
         self._fd = None
-        fd = open(self._openpath, 'w')
+        self._linked = False
+        self._crc = None
+        fd = open(self._openpath, 'wb' if binary else 'w')
         self.send = fd.write
+        if checksum:
+            self._crc = 0
+            self._write = fd.write
+            self.send = self._sendWithChecksum
         self.name = path
         self.fileno = fd.fileno
+        self._flush = fd.flush
         self._close = fd.close
 
+    def link(self, path):
+        """Makes the target a hardlink to path instead of writing data."""
+        if not self._linked:
+            self._linked = True
+            self._close()
+            remove(self._openpath)
+        link(path, self._openpath)
+
+    def abort(self):
+        """Discards what was written, leaving the target untouched."""
+        if not self._linked:
+            self._close()
+        try:
+            remove(self._openpath)
+        except OSError as e:
+            if e.errno != ENOENT:
+                raise
+
+    def _sendWithChecksum(self, data):
+        self._crc = crc32(data if isinstance(data, bytes) else data.encode('utf-8'), self._crc)
+        self._write(data)
+
     def close(self):
-        self._close()
+        if not self._linked:
+            if self._crc is not None:
+                self._flush()
+                writeChecksum(self.fileno(), self._crc)
+            if self._durability != DURABILITY_NONE:
+                self._flush()
+                fsync(self.fileno())
+            self._close()
         rename(self._openpath, self.name)
+        if self._durability == DURABILITY_FILE_AND_DIR:
+            directorySyncer.sync(dirname(self.name))
 
 class File(object):
-    def __init__(self, path):
+    chunkSize = FILE_CHUNK_SIZE
+    _verify = False
+
+    def __init__(self, path, binary=False, chunkSize=None, verify=False):
         self.path = path
         self.name = unescapeFilename(basename(path))
+        self._binary = binary
+        self._verify = verify
+        if chunkSize is not None:
+            self.chunkSize = chunkSize
         self._done, self._open, self._nextdata = False, None, None
 
     def _opendata(self):
         if self._open == None and not self._done:
-            self._open = open(self.path)
+            self._open = self._openVerifying() if self._verify else None
+            if self._open is None:
+                self._open = open(self.path, 'rb' if self._binary else 'r')
         return self._open
 
+    def _openVerifying(self):
+        f = open(self.path, 'rb')
+        expected = readChecksum(f.fileno())
+        if expected is None:
+            f.close()
+            return None
+        reader = BufferedReader(_ChecksumReader(f, expected))
+        return reader if self._binary else TextIOWrapper(reader)
+
     def __getattr__(self, attr):
         return getattr(self._opendata(), attr)
 
@@ -194,8 +307,8 @@ class File(object):
         if not self._done:
             f = self._opendata()
             if self._nextdata is None:
-                self._nextdata = f.read(4096)
-            x, self._nextdata = self._nextdata, f.read(4096)
+                self._nextdata = f.read(self.chunkSize)
+            x, self._nextdata = self._nextdata, f.read(self.chunkSize)
             if not self._nextdata:
                 self.close()
             if x:
@@ -208,11 +321,88 @@ class File(object):
     def __exit__(self, *args):
         self.close()
 
+    def size(self):
+        return getsize(self.path)
+
+    def readRange(self, offset, length=None):
+        """Returns length bytes from offset, or up to the end without length."""
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return f.read(-1 if length is None else length)
+
+    def mmap(self):
+        """Returns the bytes of the file as a read only memory map, without
+        copying them. The map stays valid after the file is replaced or
+        removed; close it when done. With verify the recorded checksum is
+        compared over the whole map first."""
+        with open(self.path, 'rb') as f:
+            expected = readChecksum(f.fileno()) if self._verify else None
+            if fstat(f.fileno()).st_size == 0:
+                data = memoryview(b'')
+            else:
+                data = mmap(f.fileno(), 0, access=ACCESS_READ)
+        if expected is not None and crc32(data) != expected:
+            data.release() if isinstance(data, memoryview) else data.close()
+            raise ChecksumError(EIO, 'Checksum mismatch', self.path)
+        return data
+
     def close(self):
         self._done = True
         if self._open:
             self._open.close()
             self._open = None
 
+class _ChecksumReader(RawIOBase):
+    """Computes the crc32 while reading and raises ChecksumError at the end
+    of the file when it differs from the recorded one."""
+
+    def __init__(self, f, expected):
+        self._f = f
+        self._expected = expected
+        self._crc = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self._f.readinto(buffer)
+        if n:
+            self._crc = crc32(memoryview(buffer)[:n], self._crc)
+        elif self._crc != self._expected:
+            raise ChecksumError(EIO, 'Checksum mismatch', self._f.name)
+        return n
+
+    def close(self):
+        self._f.close()
+        RawIOBase.close(self)
+
+
+def writeChecksum(fileOrFd, crc):
+    """Records crc32 in an extended attribute; silently skipped where the
+    platform or filesystem has no extended attributes."""
+    try:
+        os.setxattr(fileOrFd, CHECKSUM_XATTR, b'%08x' % crc)
+    except (OSError, AttributeError):
+        pass
+
+def readChecksum(fileOrFd):
+    try:
+        return int(os.getxattr(fileOrFd, CHECKSUM_XATTR), 16)
+    except (OSError, AttributeError, ValueError):
+        return None
+
+def temporaryPath(path):
+    """Names a temporary file next to path. The name starts with a dot,
+    which escapeFilename never yields, so it cannot clash with a key."""
+    return join(dirname(path), '.%s,%s,t' % (basename(path), randomString()))
+
+def isTemporary(name):
+    return TEMPORARY_PATTERN.match(name) is not None
+
+def randomString():
+    return ''.join([choice(CHARS_FOR_RANDOM) for i in range(0,6)])
+
+DURABILITIES = (DURABILITY_NONE, DURABILITY_FILE, DURABILITY_FILE_AND_DIR)
+CHECKSUMS = (CHECKSUMS_NONE, CHECKSUMS_RECORD, CHECKSUMS_VERIFY)
 CHARS_FOR_RANDOM = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ01234567890'
 
@@ -33,10 +33,36 @@
 #
 ## end license ##
 
-from hashlib import sha1
+from hashlib import sha1, md5, blake2b, new as newHash
+from itertools import groupby
+from collections import OrderedDict
+from threading import Lock
+from io import UnsupportedOperation, StringIO, BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from os import sendfile
+from errno import ENOENT, EINVAL, ENOSYS
+from select import select
 
-from .hierarchicalstorage import HierarchicalStorage
-from .storage import Storage
+from .hierarchicalstorage import HierarchicalStorage, HierarchicalStorageError
+from .storage import Storage, ChecksumError, DURABILITY_NONE, CHECKSUMS_NONE, CHECKSUMS_VERIFY
+from .groupsync import fsyncFiles
+from .compression import compress, header, DecompressingStream
+from .writeaheadlog import DELETED
+from .changefeed import ADD, DELETE, PURGE, DEFAULT_LIMIT
+from .metrics import byteLength
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+DEFAULT_BATCH_SIZE = 1000
+SENDFILE_BLOCKSIZE = 1024 * 1024
+DEFAULT_READ_WORKERS = 4
+MIN_CHUNK_SIZE = 4096
+STREAM_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+KNOWN_IDENTIFIERS = 10000
 
 class DefaultStrategy(object):
 
@@ -57,25 +83,120 @@ class DefaultStrategy(object):
 defaultSplit = DefaultStrategy.split
 defaultJoin = DefaultStrategy.join
 
+HASH_FUNCTIONS = {
+    'sha1': lambda data: sha1(data).hexdigest(),
+    'md5': lambda data: md5(data).hexdigest(),
+    'blake2b': lambda data: blake2b(data, digest_size=16).hexdigest(),
+    'xxh64': lambda data: xxhash.xxh64_hexdigest(data),
+}
+
 class HashDistributeStrategy(object):
+    """Spreads identifiers evenly over directories by their hash, depth
+    levels of width hex characters each; by default two levels of two
+    characters of the sha1. Since the hash cannot be reversed
+    StorageComponent stores the identifier itself in the (identifier, None)
+    entry, joinLeaf uses it to enumerate the store. Stores written before
+    that entry existed are completed with
+    StorageComponent.backfillIdentifiers."""
+
+    def __init__(self, depth=2, width=2, hashName='sha1'):
+        if hashName not in HASH_FUNCTIONS:
+            raise ValueError('Unknown hash %s' % repr(hashName))
+        if hashName == 'xxh64' and xxhash is None:
+            raise ImportError('Hash xxh64 needs the xxhash package')
+        self._hash = HASH_FUNCTIONS[hashName]
+        assert depth * width <= len(self._hash(b'')), 'Hash too short for depth %s and width %s' % (depth, width)
+        self._slices = [slice(level * width, (level + 1) * width) for level in range(depth)]
 
     def split(self, identifier_partname):
         (identifier, partname) = identifier_partname
-        hash = sha1(identifier.encode('utf-8')).hexdigest()
+        hash = self._hash(identifier.encode('utf-8'))
         if partname is None:
             partname = ""
-        return hash[0:2], hash[2:4], hash + '.' + partname
+        return tuple(hash[s] for s in self._slices) + (hash + '.' + partname,)
 
     def join(self, _):
         raise KeyError("Unable to join due to hashing of identifiers")
 
+    def joinLeaf(self, names, readIdentifier):
+        identifiers = {}
+        parts = []
+        for name in names:
+            hash, dot, partname = name.partition('.')
+            if not dot:
+                continue
+            if partname:
+                parts.append((hash, partname))
+            else:
+                identifiers[hash] = readIdentifier(name)
+        for hash, partname in parts:
+            if hash in identifiers:
+                yield identifiers[hash], partname
+
+    def unidentified(self, names):
+        """Yields the hashes in names that have parts but no identifier."""
+        hashes, identified = set(), set()
+        for name in names:
+            hash, dot, partname = name.partition('.')
+            if dot:
+                (hashes if partname else identified).add(hash)
+        return iter(sorted(hashes - identified))
+
 class StorageComponent(object):
-    def __init__(self, directory, partsRemovedOnDelete=None, partsRemovedOnPurge=None, name=None, strategy=DefaultStrategy):
+    def __init__(self, directory, partsRemovedOnDelete=None, partsRemovedOnPurge=None, name=None, strategy=DefaultStrategy, storageClass=Storage, binary=False, partsIndex=None, durability=DURABILITY_NONE, readCache=None, codecs=None, contentStore=None, writeAheadLog=None, metrics=None, checksums=CHECKSUMS_NONE, fdCache=None, changeFeed=None):
         assert type(directory) == str, 'Please use directory as first parameter'
-        self._storage = HierarchicalStorage(Storage(directory), strategy.split, strategy.join)
+        assert contentStore is None or storageClass is Storage, 'A contentStore needs storageClass Storage'
+        assert fdCache is None or storageClass is Storage, 'An fdCache needs storageClass Storage'
+        assert fdCache is None or binary, 'An fdCache needs binary mode'
+        storageKwargs = dict(binary=binary, durability=durability)
+        if checksums != CHECKSUMS_NONE:
+            storageKwargs['checksums'] = checksums
+        self._root = storageClass(directory, **storageKwargs)
+        self._directory = directory
+        self._storage = HierarchicalStorage(self._root, strategy.split, strategy.join)
+        self._strategy = strategy
+        self._identifierSidecar = hasattr(strategy, 'joinLeaf')
+        self._knownIdentifiers = OrderedDict()
+        self._knownIdentifiersLock = Lock()
+        self._binary = binary
+        self._codecs = {} if codecs is None else dict(codecs)
+        self._binaryStorage = HierarchicalStorage(self._root.asBinary(), strategy.split, strategy.join) if self._codecs else None
         self._partsRemovedOnDelete = set([]) if partsRemovedOnDelete is None else set(partsRemovedOnDelete)
         self._partsRemovedOnPurge = self._partsRemovedOnDelete if partsRemovedOnPurge is None else self._partsRemovedOnDelete.union(set(partsRemovedOnPurge))
         self._name = name
+        self._readCache = readCache
+        self._contentStore = contentStore
+        self._readExecutors = {}
+        self._readExecutorsLock = Lock()
+        self._fdCache = None if checksums == CHECKSUMS_VERIFY else fdCache
+        self._changeFeed = changeFeed
+        self._partsIndex = partsIndex
+        self._writeAheadLog = writeAheadLog
+        if writeAheadLog is not None:
+            writeAheadLog.open(self._applyLogged)
+        if partsIndex is not None and partsIndex.needsRebuild():
+            self._checkpoint()
+            partsIndex.rebuild(self._globStorage(('', None)))
+        if metrics is not None:
+            self._instrument(metrics)
+
+    def _instrument(self, metrics):
+        metrics.instrument(self, 'addData', 'put', written=lambda identifier, name, data: byteLength(data))
+        metrics.instrument(self, 'addMany', 'putMany')
+        metrics.instrument(self, 'getData', 'get', read=byteLength)
+        metrics.instrument(self, 'getMany', 'getMany', read=lambda datas: sum(byteLength(data) for data in datas if data is not None))
+        metrics.instrument(self, 'getStream', 'open')
+        metrics.instrument(self, 'yieldRecord', 'stream', read=byteLength, iterate=True)
+        metrics.instrument(self, 'isAvailable', 'contains')
+        metrics.instrument(self, 'deletePart', 'delete')
+        metrics.instrument(self, 'purge', 'purge')
+        metrics.instrument(self, 'glob', 'glob', iterate=True)
+        for storage in [self._storage, self._binaryStorage]:
+            if storage is not None:
+                for methodName in ['put', 'get', 'getFile', 'delete', 'purge']:
+                    metrics.instrument(storage, methodName, 'storage.' + methodName)
+                for methodName in ['putMany', 'glob']:
+                    metrics.instrument(storage, methodName, 'storage.' + methodName, iterate=True)
 
     def observable_name(self):
         return self._name
@@ -83,11 +204,182 @@ class StorageComponent(object):
     def addData(self, identifier, name, data):
         if not identifier:
             raise ValueError("Empty identifier is not allowed.")
-        sink = self._storage.put((identifier, name))
+        self._registerIdentifier(identifier)
+        if self._writeAheadLog is not None and not all(self._strategy.split((identifier, name))):
+            raise HierarchicalStorageError("Name %r not allowed" % ((identifier, name),))
+        self._changed(ADD, identifier, name)
         try:
-            sink.send(data)
+            if self._writeAheadLog is None:
+                self._storePart(identifier, name, data)
+            else:
+                self._writeAheadLog.put((identifier, name), data)
         finally:
+            self._invalidate(identifier, name)
+        if self._partsIndex is not None:
+            self._partsIndex.add(identifier, name)
+
+    def _storePart(self, identifier, name, data):
+        storage, data = self._encode(name, data)
+        sink = storage.put((identifier, name))
+        try:
+            self._send(sink, data)
+        except BaseException:
+            sink.abort()
+            raise
+        sink.close()
+
+    def addStream(self, identifier, name, chunks, checksum=None):
+        """Stores a part from an iterable of chunks or a file object, one chunk
+        at a time. The part is replaced only when all chunks were written; on
+        an error nothing changes. Returns dict(size=...) with the total
+        length of the chunks and, for a hashlib algorithm name in checksum,
+        the hexdigest of the data as checksum."""
+        if not identifier:
+            raise ValueError("Empty identifier is not allowed.")
+        self._registerIdentifier(identifier)
+        self._checkpoint([(identifier, name)])
+        codec = self._codecs.get(name)
+        storage = self._storage if codec is None else self._binaryStorage
+        digest = None if checksum is None else newHash(checksum)
+        result = dict(size=0)
+        def encoded():
+            compressor = None if codec is None else codec.compressor()
+            if compressor is not None:
+                yield header(codec)
+            for chunk in _chunks(chunks):
+                result['size'] += len(chunk)
+                data = chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+                if digest is not None:
+                    digest.update(data)
+                if compressor is not None:
+                    yield compressor.compress(data)
+                else:
+                    yield data if self._contentStore is not None else chunk
+            if compressor is not None:
+                yield compressor.flush()
+        self._changed(ADD, identifier, name)
+        sink = storage.put((identifier, name))
+        try:
+            try:
+                if self._contentStore is None:
+                    for data in encoded():
+                        sink.send(data)
+                else:
+                    self._contentStore.linkChunks(sink, encoded())
+            except BaseException:
+                sink.abort()
+                raise
             sink.close()
+        finally:
+            self._invalidate(identifier, name)
+        if self._partsIndex is not None:
+            self._partsIndex.add(identifier, name)
+        if digest is not None:
+            result['checksum'] = digest.hexdigest()
+        return result
+
+    def addMany(self, identifiersPartnamesAndData, batchSize=DEFAULT_BATCH_SIZE, fsync=False):
+        """Stores (identifier, partname, data) items in batches. Returns a list
+        with for every item None or the exception that prevented storing it.
+        With fsync the files of each batch, and the directories created for
+        them, are flushed to disk before the next batch is written."""
+        if self._writeAheadLog is not None:
+            return [self._addLogged(*item) for item in identifiersPartnamesAndData]
+        results = []
+        batch = []
+        for item in identifiersPartnamesAndData:
+            batch.append(item)
+            if len(batch) == batchSize:
+                results.extend(self._addBatch(batch, fsync))
+                batch = []
+        if batch:
+            results.extend(self._addBatch(batch, fsync))
+        return results
+
+    def _addLogged(self, identifier, name, data):
+        try:
+            self.addData(identifier, name, data)
+        except Exception as e:
+            return e
+
+    def _addBatch(self, batch, fsync):
+        results = [None] * len(batch)
+        valid = []
+        for i, (identifier, name, data) in enumerate(batch):
+            if not identifier:
+                results[i] = ValueError("Empty identifier is not allowed.")
+                continue
+            try:
+                self._registerIdentifier(identifier)
+            except (OSError, ValueError, HierarchicalStorageError) as e:
+                results[i] = e
+                continue
+            valid.append(i)
+        encoded = dict((i, self._encode(batch[i][1], batch[i][2])) for i in valid)
+        written = []
+        for storage in [self._storage, self._binaryStorage]:
+            indices = [i for i in valid if encoded[i][0] is storage]
+            if indices:
+                written.extend(self._putBatch(storage, batch, indices, encoded, results))
+        if fsync:
+            if isinstance(self._root, Storage):
+                if self._identifierSidecar:
+                    written.extend(self._storage.getFile((batch[i][0], None)).path for i in valid)
+                fsyncFiles(written, root=self._directory)
+            else:
+                self._root.sync()
+        return results
+
+    def _putBatch(self, storage, batch, indices, encoded, results):
+        written = []
+        for index, sink in storage.putMany([batch[i][:2] for i in indices]):
+            i = indices[index]
+            if isinstance(sink, Exception):
+                results[i] = sink
+                continue
+            identifier, name = batch[i][:2]
+            data = encoded[i][1]
+            self._changed(ADD, identifier, name)
+            try:
+                try:
+                    self._send(sink, data)
+                except BaseException:
+                    sink.abort()
+                    raise
+                try:
+                    sink.close()
+                finally:
+                    self._invalidate(identifier, name)
+            except Exception as e:
+                results[i] = e
+                continue
+            written.append(sink.name)
+            if self._partsIndex is not None:
+                self._partsIndex.add(identifier, name)
+        return written
+
+    def _send(self, sink, data):
+        if self._contentStore is None:
+            sink.send(data)
+        else:
+            self._contentStore.linkTo(sink, data if isinstance(data, bytes) else data.encode('utf-8'))
+
+    def _encode(self, name, data):
+        codec = self._codecs.get(name)
+        if codec is None:
+            return self._storage, data
+        return self._binaryStorage, compress(codec, data if self._binary else data.encode('utf-8'))
+
+    def _openPart(self, identifier, partname):
+        logged = self._logged(identifier, partname)
+        if logged is DELETED:
+            raise IOError(ENOENT, 'No such part', '%s/%s' % (identifier, partname))
+        if logged is not None:
+            return BytesIO(logged) if self._binary else StringIO(logged)
+        codec = self._codecs.get(partname)
+        if codec is None:
+            return self._storage.getFile((identifier, partname))
+        return DecompressingStream(self._binaryStorage.getFile((identifier, partname)), codec, binary=self._binary)
 
     def add(self, identifier, partname, data):
         self.addData(identifier=identifier, name=partname, data=data)
@@ -103,8 +395,15 @@ class StorageComponent(object):
         yield
 
     def deletePart(self, identifier, partname):
-        if (identifier, partname) in self._storage:
-            self._storage.delete((identifier, partname))
+        if self._hasPart(identifier, partname):
+            self._changed(DELETE, identifier, partname)
+            if self._writeAheadLog is None:
+                self._storage.delete((identifier, partname))
+            else:
+                self._writeAheadLog.delete((identifier, partname))
+            self._invalidate(identifier, partname)
+            if self._partsIndex is not None:
+                self._partsIndex.remove(identifier, partname)
 
     def deleteData(self, identifier, name=None):
         names = self._partsRemovedOnDelete if name is None else [name]
@@ -115,46 +414,327 @@ class StorageComponent(object):
     def purge(self, identifier):
         if not identifier:
             raise ValueError("Empty identifier is not allowed.")
+        self._checkpoint([(identifier, partname) for partname in self._partsRemovedOnPurge])
         for partname in self._partsRemovedOnPurge:
-            if (identifier, partname) in self._storage:
+            if self._hasPart(identifier, partname):
+                self._changed(PURGE, identifier, partname)
                 self._storage.purge((identifier, partname))
+                self._invalidate(identifier, partname)
+                if self._partsIndex is not None:
+                    self._partsIndex.purge(identifier, partname)
+        if self._identifierSidecar:
+            self._purgeIdentifier(identifier)
+
+    def backfillIdentifiers(self, identifiers):
+        """Stores the identifier entry for those of identifiers that have
+        parts but no entry, as in stores written before HashDistributeStrategy
+        needed it. Hashes cannot be reversed, so the identifiers have to come
+        from elsewhere; unidentifiedHashes tells which are still missing.
+        Returns the number of entries stored."""
+        assert self._identifierSidecar, 'Only needed for a strategy with joinLeaf'
+        stored = 0
+        for identifier in identifiers:
+            if (identifier, None) not in self._storage and self._hasStoredParts(identifier):
+                self._storeIdentifier(identifier)
+                stored += 1
+        if stored and self._partsIndex is not None:
+            self._partsIndex.rebuild(self._globStorage(('', None)))
+        return stored
+
+    def unidentifiedHashes(self):
+        """Yields the hashes of stored parts without identifier entry."""
+        for directory, items in groupby(self._root.walk(), key=lambda item: item[:-1]):
+            for hash in self._strategy.unidentified(item[-1] for item in items):
+                yield hash
+
+    def _registerIdentifier(self, identifier):
+        if not self._identifierSidecar:
+            return
+        with self._knownIdentifiersLock:
+            if identifier in self._knownIdentifiers:
+                self._knownIdentifiers.move_to_end(identifier)
+                return
+        if self._partsIndex is not None:
+            known = self._partsIndex.isAvailable(identifier, None)[0]
+        else:
+            known = (identifier, None) in self._storage
+        if not known:
+            self._storeIdentifier(identifier)
+        with self._knownIdentifiersLock:
+            self._knownIdentifiers[identifier] = True
+            if len(self._knownIdentifiers) > KNOWN_IDENTIFIERS:
+                self._knownIdentifiers.popitem(last=False)
+
+    def _storeIdentifier(self, identifier):
+        sink = self._storage.put((identifier, None))
+        try:
+            sink.send(identifier.encode('utf-8') if self._binary else identifier)
+        except BaseException:
+            sink.abort()
+            raise
+        sink.close()
+
+    def _purgeIdentifier(self, identifier):
+        if self._writeAheadLog is not None and self._writeAheadLog.hasIdentifier(identifier):
+            return
+        if self._hasStoredParts(identifier):
+            return
+        with self._knownIdentifiersLock:
+            self._knownIdentifiers.pop(identifier, None)
+        if (identifier, None) in self._storage:
+            self._storage.purge((identifier, None))
+
+    def _hasStoredParts(self, identifier):
+        splitted = self._strategy.split((identifier, None))
+        try:
+            leaf = self._root
+            for name in splitted[:-1]:
+                leaf = leaf.get(name)
+        except KeyError:
+            return False
+        sidecar = splitted[-1]
+        return any(item.name.startswith(sidecar) and item.name != sidecar for item in leaf)
+
+    def changesSince(self, sequence=0, limit=DEFAULT_LIMIT):
+        """Returns the changes after sequence from the change feed."""
+        return self._changeFeed.changesSince(sequence, limit)
+
+    def _changed(self, operation, identifier, partname):
+        # recorded before the change is made: after a crash a consumer may
+        # see a change that did not happen, but never misses one that did
+        if self._changeFeed is not None:
+            self._changeFeed.append(operation, identifier, partname)
+
+    def _logged(self, identifier, partname):
+        return None if self._writeAheadLog is None else self._writeAheadLog.get((identifier, partname))
+
+    def _applyLogged(self, key, data):
+        if data is not DELETED:
+            self._storePart(key[0], key[1], data)
+        elif key in self._storage:
+            self._storage.delete(key)
+        if self._fdCache is not None:
+            self._invalidate(*key)
+        if isinstance(self._root, Storage):
+            return self._storage.getFile(key).path
+
+    def _checkpoint(self, keys=None):
+        if self._writeAheadLog is not None:
+            self._writeAheadLog.checkpoint(keys)
+
+    def _checkpointMatching(self, prefix, wantedPartname):
+        if self._writeAheadLog is not None:
+            self._checkpoint([(identifier, partname) for (identifier, partname) in self._writeAheadLog.keys()
+                    if identifier.startswith(prefix) and (wantedPartname == None or wantedPartname == partname)])
+
+    def _invalidate(self, identifier, partname):
+        if self._readCache is not None:
+            self._readCache.invalidate((identifier, partname))
+        if self._fdCache is not None:
+            try:
+                self._fdCache.invalidate(self._storage.getFile((identifier, partname)).path)
+            except KeyError:
+                pass
+
+    def _readAll(self, identifier, name, offset=0, length=None):
+        if self._fdCache is not None and name not in self._codecs and self._logged(identifier, name) is None:
+            return self._fdCache.read(self._storage.getFile((identifier, name)).path, offset, length)
+        with _range(self._openPart(identifier, name), offset, length) as stream:
+            return stream.read()
+
+    def _hasPart(self, identifier, partname):
+        if self._partsIndex is not None:
+            return (identifier, partname) in self._partsIndex
+        logged = self._logged(identifier, partname)
+        if logged is not None:
+            return logged is not DELETED
+        return (identifier, partname) in self._storage
 
     def isAvailable(self, identifier, partname):
         """returns (hasId, hasPartName)"""
-        if (identifier, partname) in self._storage:
+        if self._partsIndex is not None:
+            return self._partsIndex.isAvailable(identifier, partname)
+        if self._hasPart(identifier, partname):
             return True, True
         elif (identifier, None) in self._storage:
             return True, False
+        elif self._writeAheadLog is not None and self._writeAheadLog.hasIdentifier(identifier):
+            return True, False
         return False, False
 
     def write(self, sink, identifier, partname):
-        stream = self._storage.getFile((identifier, partname))
+        stream = self._openPart(identifier, partname)
         try:
+            if self._binary and _sendfile(stream, sink):
+                return
             for line in stream:
                 sink.write(line)
         finally:
             stream.close()
 
-    def yieldRecord(self, identifier, partname):
-        stream = self._storage.getFile((identifier, partname))
-        for data in stream:
-            yield data
-        stream.close()
+    def yieldRecord(self, identifier, partname, chunkSize=None, offset=0, length=None):
+        """Yields the part in chunks of chunkSize. Without chunkSize chunks
+        start small and grow, so small parts are sent right away and large
+        parts are read in few large chunks."""
+        self._checkRange(offset, length)
+        stream = _range(self._openPart(identifier, partname), offset, length)
+        try:
+            size = MIN_CHUNK_SIZE if chunkSize is None else chunkSize
+            while True:
+                data = stream.read(size)
+                if not data:
+                    break
+                yield data
+                if chunkSize is None:
+                    size = min(size * 2, MAX_CHUNK_SIZE)
+        finally:
+            stream.close()
 
-    def getStream(self, identifier, partname):
-        return self._storage.getFile((identifier, partname))
+    def getBuffer(self, identifier, partname):
+        """Returns the bytes of a part as a buffer; for files in a Storage
+        a read only memory map, so large parts are not copied. With
+        CHECKSUMS_VERIFY the map is checked before it is returned."""
+        if partname in self._codecs or self._logged(identifier, partname) is not None:
+            stream = self._openPart(identifier, partname)
+            try:
+                data = stream.read()
+            finally:
+                stream.close()
+            return memoryview(data if self._binary else data.encode('utf-8'))
+        return self._storage.getFile((identifier, partname)).mmap()
 
-    def getData(self, identifier, name):
+    def getStream(self, identifier, partname, offset=0, length=None):
+        """Returns a stream of the part, or of length bytes from offset.
+        Ranges are supported in binary mode only."""
+        self._checkRange(offset, length)
+        if self._readCache is not None:
+            data = self._readCache.get((identifier, partname))
+            if data is not None:
+                return _range(BytesIO(data) if self._binary else StringIO(data), offset, length)
+        return _range(self._openPart(identifier, partname), offset, length)
+
+    def getData(self, identifier, name, offset=0, length=None):
+        self._checkRange(offset, length)
+        ranged = offset != 0 or length is not None
+        if self._readCache is not None:
+            data = self._readCache.get((identifier, name))
+            if data is not None:
+                return data[offset:None if length is None else offset + length] if ranged else data
+            token = self._readCache.token()
         if self.isAvailable(identifier, name) == (True, True):
-            with self.getStream(identifier=identifier, partname=name) as stream:
-                return stream.read()
+            if ranged:
+                return self._readRange(identifier, name, offset, length)
+            data = self._readAll(identifier, name)
+            if self._readCache is not None:
+                self._readCache.put((identifier, name), data, token)
+            return data
+        raise KeyError(identifier)
+
+    def size(self, identifier, partname):
+        """Returns the size of the data of the part in bytes, the same bytes
+        a range counts. A compressed part is decompressed to count them,
+        other parts are not read."""
+        logged = self._logged(identifier, partname)
+        if logged is not None and logged is not DELETED:
+            return len(logged if isinstance(logged, bytes) else logged.encode('utf-8'))
+        if logged is None:
+            codec = self._codecs.get(partname)
+            try:
+                if codec is None:
+                    return self._storage.getFile((identifier, partname)).size()
+                with DecompressingStream(self._binaryStorage.getFile((identifier, partname)), codec) as stream:
+                    return sum(len(chunk) for chunk in stream)
+            except (KeyError, IOError):
+                pass
         raise KeyError(identifier)
 
-    def listIdentifiers(self, partname=None, identifierPrefix=''):
-        return (identifier for identifier, ignored in self.glob((identifierPrefix, partname)))
+    def _checkRange(self, offset, length):
+        if not self._binary and (offset != 0 or length is not None):
+            raise ValueError('Ranges are only supported in binary mode')
+
+    def _readRange(self, identifier, name, offset, length):
+        if self._binary and name not in self._codecs and self._logged(identifier, name) is None:
+            if self._fdCache is not None:
+                return self._readAll(identifier, name, offset, length)
+            return self._storage.getFile((identifier, name)).readRange(offset, length)
+        with _range(self._openPart(identifier, name), offset, length) as stream:
+            return stream.read()
+
+    def getMany(self, identifiersAndPartnames, maxWorkers=DEFAULT_READ_WORKERS):
+        """Returns the data for a list of (identifier, partname) in the same
+        order, with None for missing parts. Reads are done in directory order
+        by a small pool of threads; a part that fails its checksum raises
+        ChecksumError."""
+        wanted = list(identifiersAndPartnames)
+        results = [None] * len(wanted)
+        toRead = []
+        for i, key in enumerate(wanted):
+            if self._readCache is not None:
+                data = self._readCache.get(key)
+                if data is not None:
+                    results[i] = data
+                    continue
+            if self._partsIndex is not None and key not in self._partsIndex:
+                continue
+            toRead.append(i)
+        toRead.sort(key=lambda i: self._strategy.split(wanted[i]))
+        token = None if self._readCache is None else self._readCache.token()
+        read = lambda i: self._readPart(wanted[i], token)
+        if maxWorkers <= 1 or len(toRead) <= 1:
+            datas = map(read, toRead)
+        else:
+            datas = self._executor(maxWorkers).map(read, toRead)
+        for i, data in zip(toRead, datas):
+            results[i] = data
+        return results
+
+    def _readPart(self, key, token):
+        try:
+            data = self._readAll(*key)
+        except ChecksumError:
+            raise
+        except (KeyError, IOError, HierarchicalStorageError):
+            return None
+        if self._readCache is not None:
+            self._readCache.put(key, data, token)
+        return data
+
+    def _executor(self, maxWorkers):
+        with self._readExecutorsLock:
+            executor = self._readExecutors.get(maxWorkers)
+            if executor is None:
+                executor = self._readExecutors[maxWorkers] = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix='storage-read')
+            return executor
+
+    def close(self):
+        """Stops the threads getMany reads with."""
+        with self._readExecutorsLock:
+            executors, self._readExecutors = list(self._readExecutors.values()), {}
+        for executor in executors:
+            executor.shutdown(wait=True)
+
+    def listIdentifiers(self, partname=None, identifierPrefix='', after=None):
+        if self._partsIndex is not None:
+            return self._partsIndex.identifiers(prefix=identifierPrefix, partname=partname, after=after)
+        identifiers = (identifier for identifier, ignored in self.glob((identifierPrefix, partname)))
+        if after is not None:
+            return (identifier for identifier in sorted(set(identifiers)) if identifier > after)
+        return identifiers
 
     def glob(self, identifier_partname):
         (prefix, wantedPartname) = identifier_partname
+        if self._partsIndex is not None:
+            return ((identifier, partname)
+                    for identifier in self._partsIndex.identifiers(prefix=prefix, partname=wantedPartname)
+                    for partname in self._partsIndex.parts(identifier)
+                    if wantedPartname == None or wantedPartname == partname)
+        self._checkpointMatching(prefix, wantedPartname)
+        return self._globStorage(identifier_partname)
+
+    def _globStorage(self, identifier_partname):
+        (prefix, wantedPartname) = identifier_partname
+        if self._identifierSidecar:
+            return self._globSidecars(prefix, wantedPartname)
         def filterPrefixAndPart(identifier_partname):
             (identifier, partname) = identifier_partname
             return identifier.startswith(prefix) and (wantedPartname == None or wantedPartname == partname)
@@ -162,3 +742,86 @@ class StorageComponent(object):
         return ((identifier, partname) for (identifier, partname) in self._storage.glob((prefix, wantedPartname))
                 if filterPrefixAndPart((identifier, partname)))
 
+    def _globSidecars(self, prefix, wantedPartname):
+        for directory, items in groupby(self._root.walk(), key=lambda item: item[:-1]):
+            names = [item[-1] for item in items]
+            for identifier, partname in self._strategy.joinLeaf(names, lambda name: self._readSidecar(directory + (name,))):
+                if identifier.startswith(prefix) and (wantedPartname == None or wantedPartname == partname):
+                    yield identifier, partname
+
+    def _readSidecar(self, names):
+        store = self._root
+        for name in names[:-1]:
+            store = store.getStorage(name)
+        with store.getFile(names[-1]) as f:
+            identifier = f.read()
+        return identifier.decode('utf-8') if self._binary else identifier
+
+
+def _range(stream, offset, length):
+    if offset:
+        try:
+            stream.seek(offset)
+        except (AttributeError, UnsupportedOperation):
+            while offset > 0:
+                data = stream.read(min(offset, STREAM_CHUNK_SIZE))
+                if not data:
+                    break
+                offset -= len(data)
+    return stream if length is None else _LimitedStream(stream, length)
+
+
+class _LimitedStream(object):
+    def __init__(self, stream, length):
+        self._stream = stream
+        self._remaining = length
+
+    def read(self, size=-1):
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._stream.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def __iter__(self):
+        return iter(lambda: self.read(STREAM_CHUNK_SIZE), self._stream.read(0))
+
+    def close(self):
+        self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _chunks(chunks):
+    if not hasattr(chunks, 'read'):
+        return chunks
+    return iter(lambda: chunks.read(STREAM_CHUNK_SIZE), chunks.read(0))
+
+def _sendfile(stream, sink):
+    """Sends stream to sink with sendfile. Returns False when sendfile
+    cannot be used for them, with stream positioned at what is left to copy."""
+    try:
+        outFd = sink.fileno()
+        inFd = stream.fileno()
+    except (AttributeError, UnsupportedOperation):
+        return False
+    if hasattr(sink, 'flush'):
+        sink.flush()
+    offset = 0
+    while True:
+        try:
+            sent = sendfile(outFd, inFd, offset, SENDFILE_BLOCKSIZE)
+        except BlockingIOError:
+            select([], [outFd], [])
+            continue
+        except OSError as e:
+            if e.errno not in (EINVAL, ENOSYS):
+                raise
+            stream.seek(offset)
+            return False
+        if sent == 0:
+            return True
+        offset += sent
@@ -0,0 +1,374 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from bisect import bisect
+from hashlib import md5
+from heapq import merge
+from json import dumps, loads
+from os import fsync, sep
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+
+from .storage import Sink, DURABILITY_FILE_AND_DIR
+from .storagecomponent import StorageComponent
+
+DEFAULT_VIRTUAL_NODES = 128
+TOMBSTONES_SUFFIX = '.tombstones'
+PER_VOLUME_KWARGS = ('partsIndex', 'writeAheadLog', 'readCache', 'changeFeed', 'fdCache', 'contentStore')
+
+
+class StripedStorageComponent(object):
+    """Spreads one store over several volumes, directories usually on
+    different disks. Identifiers are assigned to volumes by consistent
+    hashing, so adding a volume moves only the identifiers that now belong
+    to it. All parts of one identifier live on the same volume.
+
+    A volume marked unhealthy, or that fails with an IOError, is skipped:
+    writes go to the next volume on the ring and reads look there as well.
+    Reads take the first volume along the ring that has the part. Deletes
+    for an unhealthy volume, including of the copies a write to a later
+    volume replaces, are journaled in '<directory>.tombstones' next to the
+    healthy volumes and done before it is healthy again, also after a
+    restart. rebalance() moves parts back to the volume they belong to.
+
+    Other keyword arguments are passed to the StorageComponent of every
+    volume. Components that keep state of one store, like a partsIndex or
+    writeAheadLog, cannot be shared by volumes; volumeKwargs is called with
+    the directory of a volume and returns those keyword arguments for it."""
+
+    def __init__(self, directories, name=None, virtualNodes=DEFAULT_VIRTUAL_NODES, volumeKwargs=None, **kwargs):
+        shared = sorted(set(kwargs).intersection(PER_VOLUME_KWARGS))
+        assert not shared, 'Give %s per volume with volumeKwargs' % ', '.join(shared)
+        self._name = name
+        self._virtualNodes = virtualNodes
+        self._kwargs = kwargs
+        self._volumeKwargs = volumeKwargs
+        self._lock = Lock()
+        self._volumes = {}
+        self._healthy = {}
+        self._tombstones = _Tombstones()
+        self._ring = []
+        for directory in directories:
+            self._tombstones.load(directory)
+        for directory in directories:
+            self.addVolume(directory, rebalance=False)
+
+    def observable_name(self):
+        return self._name
+
+    def addVolume(self, directory, rebalance=True):
+        """Adds a volume; with rebalance the parts that belong to it now are
+        moved there."""
+        kwargs = dict(self._kwargs)
+        if self._volumeKwargs is not None:
+            kwargs.update(self._volumeKwargs(directory))
+        component = StorageComponent(directory, **kwargs)
+        with self._lock:
+            self._tombstones.load(directory)
+            self._volumes[directory] = component
+            self._healthy[directory] = False
+            self._ring = sorted(self._ring + [(_position('%s#%s' % (directory, i)), directory) for i in range(self._virtualNodes)])
+        try:
+            self.setHealthy(directory, True)
+        except IOError:
+            self.setHealthy(directory, False)
+        if rebalance:
+            return self.rebalance()
+
+    def setHealthy(self, directory, healthy):
+        if not healthy:
+            self._healthy[directory] = False
+            return
+        self._deleteTombstoned(directory)
+        with self._lock:
+            self._healthy[directory] = True
+        self._deleteTombstoned(directory)
+
+    def health(self):
+        return dict(self._healthy)
+
+    def volumeFor(self, identifier):
+        return self._preferred(identifier)[0]
+
+    def addData(self, identifier, name, data):
+        if not identifier:
+            raise ValueError("Empty identifier is not allowed.")
+        for directory in self._preferred(identifier):
+            try:
+                result = self._volumes[directory].addData(identifier, name, data)
+            except IOError:
+                self.setHealthy(directory, False)
+                continue
+            self._shadow(identifier, name, directory)
+            return result
+        raise IOError('No healthy volume for %s' % repr(identifier))
+
+    def add(self, identifier, partname, data):
+        self.addData(identifier=identifier, name=partname, data=data)
+        return
+        yield
+
+    def delete(self, identifier):
+        if not identifier:
+            raise ValueError("Empty identifier is not allowed.")
+        self.deleteData(identifier)
+        return
+        yield
+
+    def deletePart(self, identifier, partname):
+        self._deleteEverywhere('deletePart', identifier, partname)
+
+    def deleteData(self, identifier, name=None):
+        self._deleteEverywhere('deleteData', identifier, name)
+
+    def purge(self, identifier):
+        self._deleteEverywhere('purge', identifier)
+
+    def isAvailable(self, identifier, partname):
+        """returns (hasId, hasPartName)"""
+        hasId = False
+        for directory in self._preferred(identifier):
+            available = self._volumes[directory].isAvailable(identifier, partname)
+            if available == (True, True):
+                return available
+            hasId = hasId or available[0]
+        return hasId, False
+
+    def getData(self, identifier, name, offset=0, length=None):
+        return self._volumeWith(identifier, name).getData(identifier, name, offset=offset, length=length)
+
+    def getStream(self, identifier, partname, offset=0, length=None):
+        return self._volumeWith(identifier, partname).getStream(identifier, partname, offset=offset, length=length)
+
+    def yieldRecord(self, identifier, partname, chunkSize=None, offset=0, length=None):
+        return self._volumeWith(identifier, partname).yieldRecord(identifier, partname, chunkSize=chunkSize, offset=offset, length=length)
+
+    def size(self, identifier, partname):
+        return self._volumeWith(identifier, partname).size(identifier, partname)
+
+    def write(self, sink, identifier, partname):
+        return self._volumeWith(identifier, partname).write(sink, identifier, partname)
+
+    def getMany(self, identifiersAndPartnames):
+        results = []
+        for identifier, partname in identifiersAndPartnames:
+            try:
+                results.append(self.getData(identifier, partname))
+            except KeyError:
+                results.append(None)
+        return results
+
+    def listIdentifiers(self, partname=None, identifierPrefix='', after=None):
+        """Lists identifiers of all volumes in sorted order; the volumes are
+        listed in parallel."""
+        return _unique(self._merged(lambda component: set(component.listIdentifiers(partname=partname, identifierPrefix=identifierPrefix, after=after))))
+
+    def glob(self, identifier_partname):
+        return _unique(self._merged(lambda component: set(component.glob(identifier_partname))))
+
+    def rebalance(self):
+        """Does the journaled deletes and moves parts not on the volume they
+        belong to. The copy that is read now is the one moved. Returns the
+        number of parts moved."""
+        for directory in list(self._volumes):
+            if self._healthy[directory]:
+                self._deleteTombstoned(directory)
+        moved = 0
+        for directory, component in list(self._volumes.items()):
+            if not self._healthy[directory]:
+                continue
+            for identifier, partname in list(component.glob(('', None))):
+                target = self._preferred(identifier)[0]
+                if target == directory:
+                    continue
+                targetComponent = self._volumes[target]
+                if not targetComponent.isAvailable(identifier, partname)[1]:
+                    targetComponent.addData(identifier, partname, self._volumeWith(identifier, partname).getData(identifier, partname))
+                    moved += 1
+                component.deletePart(identifier, partname)
+        return moved
+
+    def close(self):
+        for component in list(self._volumes.values()):
+            component.close()
+
+    def _merged(self, listing):
+        components = self._components()
+        with ThreadPoolExecutor(max_workers=max(1, len(components)), thread_name_prefix='storage-list') as executor:
+            listings = list(executor.map(lambda component: sorted(listing(component)), components))
+        return merge(*listings)
+
+    def _volumeWith(self, identifier, partname):
+        for directory in self._preferred(identifier):
+            component = self._volumes[directory]
+            if component.isAvailable(identifier, partname)[1]:
+                return component
+        raise KeyError(identifier)
+
+    def _shadow(self, identifier, partname, written):
+        """Journals deletes of the part for the unhealthy volumes before
+        the written one, their copies are older."""
+        with self._lock:
+            for directory in self._ringOrder(identifier):
+                if directory == written:
+                    break
+                if not self._healthy[directory]:
+                    self._tombstones.add(directory, 'deletePart', (identifier, partname))
+
+    def _deleteEverywhere(self, method, *args):
+        for directory, component in list(self._volumes.items()):
+            with self._lock:
+                if not self._healthy[directory]:
+                    self._tombstones.add(directory, method, args)
+                    continue
+            getattr(component, method)(*args)
+
+    def _deleteTombstoned(self, directory):
+        with self._lock:
+            tombstones = self._tombstones.pending(directory)
+        if not tombstones:
+            return
+        component = self._volumes[directory]
+        done = tombstones[0][0]
+        try:
+            for seq, method, args in tombstones:
+                getattr(component, method)(*args)
+                done = seq + 1
+        finally:
+            with self._lock:
+                self._tombstones.clear(directory, done)
+
+    def _preferred(self, identifier):
+        return [directory for directory in self._ringOrder(identifier) if self._healthy[directory]]
+
+    def _ringOrder(self, identifier):
+        ring = self._ring
+        start = bisect(ring, (_position(identifier),))
+        order = []
+        for i in range(len(ring)):
+            directory = ring[(start + i) % len(ring)][1]
+            if directory not in order:
+                order.append(directory)
+                if len(order) == len(self._volumes):
+                    break
+        return order
+
+    def _components(self):
+        return [component for directory, component in self._volumes.items() if self._healthy[directory]]
+
+
+def _position(key):
+    return int(md5(key.encode('utf-8')).hexdigest()[:16], 16)
+
+def _unique(items):
+    previous = None
+    for item in items:
+        if item != previous:
+            yield item
+            previous = item
+
+
+class _Tombstones(object):
+    """Deletes waiting for unhealthy volumes. Each is appended to the
+    journals of all other volumes that can be written, so one lost disk
+    does not lose them; loading merges the journals. A line {"volume",
+    "clearedBefore"} marks the deletes of a volume with a lower seq as
+    done."""
+
+    def __init__(self):
+        self._directories = []
+        self._pending = {}
+        self._cleared = {}
+        self._seq = 0
+
+    def load(self, directory):
+        if directory in self._directories:
+            return
+        self._directories.append(directory)
+        try:
+            with open(_journalPath(directory)) as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                record = loads(line)
+            except ValueError:
+                continue
+            volume = record['volume']
+            if 'clearedBefore' in record:
+                self._cleared[volume] = max(self._cleared.get(volume, 0), record['clearedBefore'])
+                self._seq = max(self._seq, record['clearedBefore'])
+            else:
+                self._seq = max(self._seq, record['seq'])
+                self._pending.setdefault(volume, {})[record['seq']] = (record['method'], tuple(record['args']))
+
+    def pending(self, volume):
+        cleared = self._cleared.get(volume, 0)
+        return [(seq, method, args) for seq, (method, args) in sorted(self._pending.get(volume, {}).items()) if seq >= cleared]
+
+    def add(self, volume, method, args):
+        self._seq += 1
+        self._pending.setdefault(volume, {})[self._seq] = (method, args)
+        line = dumps(dict(seq=self._seq, volume=volume, method=method, args=list(args))) + '\n'
+        written = 0
+        for directory in self._directories:
+            if directory == volume:
+                continue
+            try:
+                with open(_journalPath(directory), 'a') as f:
+                    f.write(line)
+                    f.flush()
+                    fsync(f.fileno())
+                written += 1
+            except OSError:
+                pass
+        if not written:
+            raise IOError('No healthy volume to journal %s of %s' % (method, repr(args)))
+
+    def clear(self, volume, before):
+        self._cleared[volume] = max(self._cleared.get(volume, 0), before)
+        for seq in [seq for seq in self._pending.get(volume, {}) if seq < before]:
+            del self._pending[volume][seq]
+        lines = [dumps(dict(volume=volume, clearedBefore=before)) for volume, before in sorted(self._cleared.items())]
+        for volume in sorted(self._pending):
+            lines.extend(dumps(dict(seq=seq, volume=volume, method=method, args=list(args))) for seq, (method, args) in sorted(self._pending[volume].items()))
+        data = ''.join(line + '\n' for line in lines)
+        for directory in self._directories:
+            try:
+                sink = Sink(_journalPath(directory), durability=DURABILITY_FILE_AND_DIR)
+            except OSError:
+                continue
+            try:
+                sink.send(data)
+            except OSError:
+                sink.abort()
+                continue
+            sink.close()
+
+
+def _journalPath(directory):
+    return directory.rstrip(sep) + TOMBSTONES_SUFFIX
@@ -0,0 +1,265 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os import makedirs, listdir, remove, fsync, O_WRONLY, O_CREAT, O_APPEND
+from os import open as osopen, write as oswrite, close as osclose
+from os.path import join, isdir
+from struct import Struct
+from threading import RLock, Lock, Event, Thread
+from json import dumps, loads
+import re
+
+from .storage import DURABILITY_NONE, DURABILITY_FILE
+from .groupsync import GroupSync, fsyncFiles
+
+DEFAULT_CHECKPOINT_INTERVAL = 1.0
+DEFAULT_MAX_ENTRIES = 10000
+DELETED = object()
+PUT_BYTES, PUT_TEXT, DELETE, APPLIED = 1, 2, 3, 4
+HEADER = Struct('>BII')
+SEGMENT_NAME = 'wal-%08d.log'
+SEGMENT_RE = re.compile(r'^wal-(\d{8})\.log$')
+
+
+class WriteAheadLog(object):
+    """Logs mutations of (identifier, partname) keys by appending them to a
+    log file, and keeps them in memory so they can be read at once. A
+    background checkpointer stores them in the storage and then removes the
+    log segments that covered them. After a crash the log is replayed.
+
+    Checkpointing some keys leaves the segments in place and logs a small
+    applied record for each, so replay does not bring them back; segments
+    are removed, oldest first, once none of their mutations is pending.
+
+    With a durability other than none every mutation is fsynced before it
+    returns; concurrent writers share one fsync."""
+
+    def __init__(self, directory, durability=DURABILITY_FILE, checkpointInterval=DEFAULT_CHECKPOINT_INTERVAL, maxEntries=DEFAULT_MAX_ENTRIES):
+        if not isdir(directory):
+            makedirs(directory)
+        self._directory = directory
+        self._durability = durability
+        self._checkpointInterval = checkpointInterval
+        self._maxEntries = maxEntries
+        self._lock = RLock()
+        self._checkpointLock = Lock()
+        self._groupSync = GroupSync(self._fsync)
+        self._wakeup = Event()
+        self._overlay = {}
+        self._recordSegments = {}
+        self._pending = {}
+        self._identifiers = {}
+        self._apply = None
+        self._fd = None
+        self._segment = None
+        self._thread = None
+        self._closed = False
+        self.errors = []
+
+    def open(self, apply):
+        """Replays the log and starts checkpointing. apply(key, data) stores
+        data for key, or deletes the part when data is DELETED, and returns
+        the path of the file it changed."""
+        self._apply = apply
+        segments = self._segments()
+        for segment in segments:
+            self._replay(segment)
+        self._openSegment(segments[-1] + 1 if segments else 0)
+        if self._checkpointInterval is not None:
+            self._thread = Thread(target=self._run, name='storage-checkpoint', daemon=True)
+            self._thread.start()
+
+    def put(self, key, data):
+        self._append(key, data)
+
+    def delete(self, key):
+        self._append(key, DELETED)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._overlay.get(key, default)
+
+    def hasIdentifier(self, identifier):
+        with self._lock:
+            return identifier in self._identifiers
+
+    def __len__(self):
+        return len(self._overlay)
+
+    def keys(self):
+        with self._lock:
+            return list(self._overlay)
+
+    def checkpoint(self, keys=None):
+        """Stores all logged mutations, or only those for keys, and removes
+        the log segments that have no pending mutations left. Mutations that
+        could not be stored stay logged; the first error is raised after the
+        others were stored."""
+        with self._checkpointLock:
+            with self._lock:
+                if keys is None:
+                    snapshot = dict(self._overlay)
+                    if not snapshot and self._segments() == [self._segment]:
+                        return
+                    self._openSegment(self._segment + 1)
+                else:
+                    snapshot = dict((key, self._overlay[key]) for key in keys if key in self._overlay)
+                    if not snapshot:
+                        return
+            failed = []
+            paths = []
+            for key, data in sorted(snapshot.items(), key=lambda item: item[0]):
+                try:
+                    paths.append(self._apply(key, data))
+                except Exception as e:
+                    failed.append((key, e))
+            if self._durability != DURABILITY_NONE:
+                fsyncFiles(path for path in paths if path is not None)
+            failedKeys = set(key for key, e in failed)
+            with self._lock:
+                applied = []
+                for key, data in snapshot.items():
+                    if key not in failedKeys and self._overlay.get(key) is data:
+                        applied.append((key, self._drop(key)))
+                removable = []
+                for segment in self._segments():
+                    if segment >= self._segment or self._pending.get(segment):
+                        break
+                    removable.append(segment)
+                kept = [key for key, segment in applied if not segment in removable]
+                for key in kept:
+                    self._write(self._record(key, None, op=APPLIED))
+                if kept and self._durability != DURABILITY_NONE:
+                    fsync(self._fd)
+                for segment in removable:
+                    self._pending.pop(segment, None)
+            for segment in removable:
+                remove(join(self._directory, SEGMENT_NAME % segment))
+            if failed:
+                raise failed[0][1]
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        try:
+            self.checkpoint()
+        finally:
+            with self._lock:
+                osclose(self._fd)
+                self._fd = None
+                if not self._overlay:
+                    remove(join(self._directory, SEGMENT_NAME % self._segment))
+
+    def _append(self, key, data):
+        with self._lock:
+            self._write(self._record(key, data))
+            self._set(key, data, self._segment)
+            full = len(self._overlay) >= self._maxEntries
+        if self._durability != DURABILITY_NONE:
+            self._groupSync.sync()
+        if full:
+            self._wakeup.set()
+
+    def _set(self, key, data, segment):
+        self._drop(key)
+        self._overlay[key] = data
+        self._recordSegments[key] = segment
+        self._pending[segment] = self._pending.get(segment, 0) + 1
+        if data is not DELETED:
+            self._identifiers[key[0]] = self._identifiers.get(key[0], 0) + 1
+
+    def _drop(self, key):
+        """Removes key from the overlay; returns the segment of its record."""
+        if key not in self._overlay:
+            return None
+        data = self._overlay.pop(key)
+        segment = self._recordSegments.pop(key)
+        self._pending[segment] -= 1
+        if data is not DELETED:
+            count = self._identifiers.pop(key[0]) - 1
+            if count:
+                self._identifiers[key[0]] = count
+        return segment
+
+    def _record(self, key, data, op=None):
+        keyData = dumps(list(key)).encode('utf-8')
+        if data is DELETED or op == APPLIED:
+            return HEADER.pack(op or DELETE, len(keyData), 0) + keyData
+        op, value = (PUT_TEXT, data.encode('utf-8')) if isinstance(data, str) else (PUT_BYTES, data)
+        return HEADER.pack(op, len(keyData), len(value)) + keyData + value
+
+    def _write(self, record):
+        view = memoryview(record)
+        while view:
+            view = view[oswrite(self._fd, view):]
+
+    def _fsync(self):
+        with self._lock:
+            fsync(self._fd)
+
+    def _openSegment(self, segment):
+        if self._fd is not None:
+            if self._durability != DURABILITY_NONE:
+                fsync(self._fd)
+            osclose(self._fd)
+        self._fd = osopen(join(self._directory, SEGMENT_NAME % segment), O_WRONLY | O_CREAT | O_APPEND, 0o644)
+        self._segment = segment
+
+    def _replay(self, segment):
+        with open(join(self._directory, SEGMENT_NAME % segment), 'rb') as f:
+            data = f.read()
+        offset = 0
+        while offset + HEADER.size <= len(data):
+            op, keyLength, valueLength = HEADER.unpack_from(data, offset)
+            start = offset + HEADER.size
+            end = start + keyLength + valueLength
+            if op not in (PUT_BYTES, PUT_TEXT, DELETE, APPLIED) or end > len(data):
+                break
+            try:
+                key = tuple(loads(data[start:start + keyLength].decode('utf-8')))
+                value = data[start + keyLength:end]
+                if op == APPLIED:
+                    self._drop(key)
+                else:
+                    self._set(key, DELETED if op == DELETE else value.decode('utf-8') if op == PUT_TEXT else value, segment)
+            except ValueError:
+                break
+            offset = end
+
+    def _segments(self):
+        return sorted(int(m.group(1)) for m in (SEGMENT_RE.match(name) for name in listdir(self._directory)) if m)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self._checkpointInterval)
+            self._wakeup.clear()
+            if not self._closed:
+                try:
+                    self.checkpoint()
+                except Exception as e:
+                    self.errors.append(e)
@@ -39,6 +39,20 @@ from storagetest import StorageTest
 from hierarchicalstoragetest import HierarchicalStorageTest
 from storagecomponenttest import StorageComponentTest
 from storageadaptertest import StorageAdapterTest
+from packstoragetest import PackStorageTest
+from partsindextest import PartsIndexTest
+from groupsynctest import GroupSyncTest
+from readcachetest import ReadCacheTest
+from asyncstoragecomponenttest import AsyncStorageComponentTest
+from compressiontest import CompressionTest
+from contentstoretest import ContentStoreTest
+from writeaheadlogtest import WriteAheadLogTest
+from metricstest import MetricsTest
+from relayouttest import RelayoutTest
+from stripedstoragecomponenttest import StripedStorageComponentTest
+from scrubbertest import ScrubberTest
+from fdcachetest import FdCacheTest
+from changefeedtest import ChangeFeedTest
 
 if __name__ == '__main__':
     main()
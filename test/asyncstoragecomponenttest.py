@@ -0,0 +1,118 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from seecr.test import SeecrTestCase
+
+from asyncio import run, gather, ensure_future, sleep, Event, CancelledError
+from os import listdir
+from os.path import join
+
+from storage import StorageComponent, AsyncStorageComponent
+
+
+class AsyncStorageComponentTest(SeecrTestCase):
+    def setUp(self):
+        SeecrTestCase.setUp(self)
+        self.storageComponent = StorageComponent(self.tempdir, partsRemovedOnDelete=['part'])
+        self.asyncComponent = AsyncStorageComponent(self.storageComponent, maxWorkers=2)
+
+    def tearDown(self):
+        self.asyncComponent.close()
+        SeecrTestCase.tearDown(self)
+
+    def testAddGetDelete(self):
+        async def test():
+            await self.asyncComponent.addData('id:1', 'part', 'data')
+            self.assertEqual('data', await self.asyncComponent.getData('id:1', 'part'))
+            self.assertEqual((True, True), await self.asyncComponent.isAvailable('id:1', 'part'))
+            self.assertTrue(await self.asyncComponent.exists('id:1', 'part'))
+            await self.asyncComponent.deleteData('id:1')
+            self.assertFalse(await self.asyncComponent.exists('id:1', 'part'))
+            await self.asyncComponent.addData('id:1', 'part', 'data')
+            await self.asyncComponent.deletePart('id:1', 'part')
+            self.assertEqual((True, False), await self.asyncComponent.isAvailable('id:1', 'part'))
+            await self.asyncComponent.addData('id:1', 'part', 'data')
+            await self.asyncComponent.purge('id:1')
+            self.assertEqual((False, False), await self.asyncComponent.isAvailable('id:1', 'part'))
+        run(test())
+
+    def testConcurrentRequests(self):
+        async def test():
+            await gather(*[self.asyncComponent.addData('id:%s' % i, 'part', 'data%s' % i) for i in range(10)])
+            return await gather(*[self.asyncComponent.getData('id:%s' % i, 'part') for i in range(10)])
+        self.assertEqual(['data%s' % i for i in range(10)], run(test()))
+
+    def testAddStream(self):
+        async def chunks():
+            for i in range(100):
+                yield 'chunk%s ' % i
+        async def failing():
+            yield 'new'
+            raise RuntimeError('broken')
+        async def test():
+            self.assertEqual(dict(size=790), await self.asyncComponent.addStream('id:1', 'part', chunks()))
+            self.assertEqual(dict(size=3), await self.asyncComponent.addStream('id:2', 'part', iter(['old'])))
+            with self.assertRaises(RuntimeError):
+                await self.asyncComponent.addStream('id:2', 'part', failing())
+        run(test())
+        self.assertTrue(self.storageComponent.getData('id:1', 'part').endswith('chunk99 '))
+        self.assertEqual('old', self.storageComponent.getData('id:2', 'part'))
+
+    def testCancelledAddStreamLeavesPartUnchanged(self):
+        self.storageComponent.addData('id:1', 'part', 'old')
+        async def stalled():
+            yield 'new'
+            await Event().wait()
+        async def test():
+            task = ensure_future(self.asyncComponent.addStream('id:1', 'part', stalled()))
+            for i in range(100):
+                await sleep(0.01)
+                if len(listdir(join(self.tempdir, 'id', '1'))) == 2:
+                    break
+            task.cancel()
+            with self.assertRaises(CancelledError):
+                await task
+            for i in range(100):
+                await sleep(0.01)
+                if len(listdir(join(self.tempdir, 'id', '1'))) == 1:
+                    break
+            self.assertEqual(['part'], listdir(join(self.tempdir, 'id', '1')))
+        run(test())
+        self.assertEqual('old', self.storageComponent.getData('id:1', 'part'))
+
+    def testYieldRecord(self):
+        self.storageComponent.addData('id:1', 'part', 'abcdefghij')
+        async def test():
+            return [data async for data in self.asyncComponent.yieldRecord('id:1', 'part', chunkSize=4)]
+        self.assertEqual(['abcd', 'efgh', 'ij'], run(test()))
+
+    def testListIdentifiers(self):
+        for i in range(5):
+            self.storageComponent.addData('id:%s' % i, 'part', 'data')
+        self.storageComponent.addData('other:1', 'part', 'data')
+        async def test(**kwargs):
+            return [identifier async for identifier in self.asyncComponent.listIdentifiers(batchSize=2, **kwargs)]
+        self.assertEqual(set('id:%s' % i for i in range(5)), set(run(test(identifierPrefix='id:'))))
+        self.assertEqual(6, len(run(test())))
@@ -0,0 +1,126 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os import listdir
+from os.path import join
+
+from seecr.test import SeecrTestCase
+
+from storage import StorageComponent, ChangeFeed, ChangesTruncatedError
+from storage import changefeed
+from storage.storage import DURABILITY_FILE
+
+
+class ChangeFeedTest(SeecrTestCase):
+    def changes(self, feed, sequence=0, limit=100):
+        return [(c['sequence'], c['operation'], c['identifier'], c['partname']) for c in feed.changesSince(sequence, limit)]
+
+    def testAppendAndChangesSince(self):
+        feed = ChangeFeed(self.tempdir)
+        self.assertEqual(0, feed.lastSequence())
+        self.assertEqual(1, feed.append('add', 'id:1', 'rdf'))
+        self.assertEqual(2, feed.append('delete', 'id:1', 'rdf'))
+        self.assertEqual(3, feed.append('add', 'id:2', 'rdf'))
+        self.assertEqual([(1, 'add', 'id:1', 'rdf'), (2, 'delete', 'id:1', 'rdf'), (3, 'add', 'id:2', 'rdf')], self.changes(feed))
+        self.assertEqual([(2, 'delete', 'id:1', 'rdf')], self.changes(feed, 1, limit=1))
+        self.assertEqual([], self.changes(feed, 3))
+        self.assertTrue(feed.changesSince(0)[0]['timestamp'] > 0)
+
+    def testSegmentsAndTruncate(self):
+        feed = ChangeFeed(self.tempdir, segmentSize=2)
+        for i in range(5):
+            feed.append('add', 'id:%s' % i, 'rdf')
+        self.assertEqual(['changes-0000000000000001.log', 'changes-0000000000000003.log', 'changes-0000000000000005.log'], sorted(listdir(self.tempdir)))
+        self.assertEqual([4, 5], [c[0] for c in self.changes(feed, 3)])
+        self.assertEqual([3, 4], [c[0] for c in self.changes(feed, 2, limit=2)])
+        feed.truncate(3)
+        self.assertEqual(['changes-0000000000000003.log', 'changes-0000000000000005.log'], sorted(listdir(self.tempdir)))
+        self.assertEqual([3, 4, 5], [c[0] for c in self.changes(feed, 2)])
+        self.assertRaises(ChangesTruncatedError, lambda: feed.changesSince(1))
+        self.assertRaises(ChangesTruncatedError, lambda: feed.changesSince(0))
+
+    def testChangesSinceParsesOnlyTheChangesReturned(self):
+        feed = ChangeFeed(self.tempdir, segmentSize=1000)
+        for i in range(1500):
+            feed.append('add', 'id:%s' % i, 'part')
+        parsed = []
+        originalLoads = changefeed.loads
+        changefeed.loads = lambda line: parsed.append(line) or originalLoads(line)
+        try:
+            self.assertEqual([(998, 'add', 'id:997', 'part'), (999, 'add', 'id:998', 'part'), (1000, 'add', 'id:999', 'part'), (1001, 'add', 'id:1000', 'part')], self.changes(feed, 997, limit=4))
+        finally:
+            changefeed.loads = originalLoads
+        self.assertEqual(4, len(parsed))
+
+    def testDurableSegments(self):
+        feed = ChangeFeed(self.tempdir, segmentSize=2, durability=DURABILITY_FILE)
+        for i in range(5):
+            feed.append('add', 'id:%s' % i, 'rdf')
+        feed.close()
+        self.assertEqual(3, len(listdir(self.tempdir)))
+        self.assertEqual(5, ChangeFeed(self.tempdir, segmentSize=2).lastSequence())
+
+    def testReopenContinuesAndIgnoresTornLine(self):
+        feed = ChangeFeed(self.tempdir, segmentSize=2)
+        for i in range(3):
+            feed.append('add', 'id:%s' % i, 'rdf')
+        feed.close()
+        with open(join(self.tempdir, 'changes-0000000000000003.log'), 'a') as f:
+            f.write('[4, "add"')
+        feed = ChangeFeed(self.tempdir, segmentSize=2)
+        self.assertEqual(3, feed.lastSequence())
+        self.assertEqual(4, feed.append('add', 'id:3', 'rdf'))
+        self.assertEqual(5, feed.append('add', 'id:4', 'rdf'))
+        self.assertEqual([3, 4, 5], [c[0] for c in self.changes(feed, 2)])
+
+    def testStorageComponent(self):
+        feed = ChangeFeed(join(self.tempdir, 'changes'))
+        s = StorageComponent(join(self.tempdir, 'store'), partsRemovedOnDelete=['rdf'], changeFeed=feed)
+        s.addData(identifier='id:1', name='rdf', data='data')
+        s.addMany([('id:2', 'rdf', 'data'), ('', 'rdf', 'data')])
+        s.addStream('id:3', 'rdf', iter(['data']))
+        s.deleteData(identifier='id:1')
+        s.deleteData(identifier='id:9')
+        s.purge(identifier='id:2')
+        self.assertEqual([
+                (1, 'add', 'id:1', 'rdf'),
+                (2, 'add', 'id:2', 'rdf'),
+                (3, 'add', 'id:3', 'rdf'),
+                (4, 'delete', 'id:1', 'rdf'),
+                (5, 'purge', 'id:2', 'rdf'),
+            ], [(c['sequence'], c['operation'], c['identifier'], c['partname']) for c in s.changesSince(0)])
+        self.assertEqual([4], [c['sequence'] for c in s.changesSince(3, limit=1)])
+
+    def testChangeIsRecordedBeforeTheWrite(self):
+        feed = ChangeFeed(join(self.tempdir, 'changes'))
+        s = StorageComponent(join(self.tempdir, 'store'), changeFeed=feed)
+        def chunks():
+            self.assertEqual([(1, 'add', 'id:1', 'rdf')], self.changes(feed))
+            yield 'data'
+        s.addStream('id:1', 'rdf', chunks())
+        self.assertRaises(TypeError, lambda: s.addData(identifier='id:2', name='rdf', data=b'bytes'))
+        self.assertEqual([(2, 'add', 'id:2', 'rdf')], self.changes(feed, 1))
+        self.assertRaises(KeyError, lambda: s.getData(identifier='id:2', name='rdf'))
@@ -0,0 +1,119 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from io import BytesIO
+from os.path import join
+
+from seecr.test import SeecrTestCase
+
+from storage import StorageComponent, PackStorage, ZlibCodec, LzmaCodec
+from storage.compression import compress, DecompressingStream, MAGIC
+
+
+class CompressionTest(SeecrTestCase):
+    def testCompressAndDecompress(self):
+        for codec in [ZlibCodec(), LzmaCodec()]:
+            data = b'<record>' + b'data' * 1000 + b'</record>'
+            compressed = compress(codec, data)
+            self.assertTrue(compressed.startswith(MAGIC + codec.name.encode('ascii') + b'\n'))
+            self.assertTrue(len(compressed) < len(data))
+            self.assertEqual(data, DecompressingStream(BytesIO(compressed), codec).read())
+
+    def testStreamingWithSmallChunks(self):
+        data = bytes(range(256)) * 100
+        stream = DecompressingStream(BytesIO(compress(ZlibCodec(), data)), ZlibCodec(), chunkSize=10)
+        self.assertEqual(data[:5], stream.read(5))
+        self.assertEqual(data[5:], b''.join(stream))
+
+    def testDecompressesOneChunkAtATime(self):
+        data = b'\x00' * (10 * 1024 * 1024)
+        for codec in [ZlibCodec(), LzmaCodec()]:
+            stream = DecompressingStream(BytesIO(compress(codec, data)), codec, chunkSize=4096)
+            self.assertEqual(b'\x00' * 10, stream.read(10))
+            self.assertTrue(stream._buffered < 4096, stream._buffered)
+            total = 10
+            for chunk in stream:
+                self.assertTrue(len(chunk) <= 4096, len(chunk))
+                total += len(chunk)
+            self.assertEqual(len(data), total)
+
+    def testTextModeReadsCharacters(self):
+        data = 'aé€𝄞' * 1000
+        for codec in [ZlibCodec(), LzmaCodec()]:
+            stream = DecompressingStream(BytesIO(compress(codec, data.encode('utf-8'))), codec, binary=False, chunkSize=7)
+            self.assertEqual(data[:3], stream.read(3))
+            self.assertEqual(data[3:10], stream.read(7))
+            self.assertEqual(data[10:], ''.join(stream))
+
+    def testUncompressedDataPassesThrough(self):
+        self.assertEqual(b'plain', DecompressingStream(BytesIO(b'plain'), ZlibCodec()).read())
+        self.assertEqual('plain', DecompressingStream(BytesIO(b'plain'), ZlibCodec(), binary=False).read())
+
+    def testTextModeDecodesUtf8AcrossChunks(self):
+        data = '€' * 100
+        stream = DecompressingStream(BytesIO(compress(ZlibCodec(), data.encode('utf-8'))), ZlibCodec(), binary=False, chunkSize=1)
+        self.assertEqual(data, stream.read())
+
+    def testZlibDictionary(self):
+        dictionary = b'<record><title></title><creator></creator></record>'
+        codec = ZlibCodec(dictionary=dictionary)
+        data = b'<record><title>t</title><creator>c</creator></record>'
+        compressed = compress(codec, data)
+        self.assertTrue(len(compressed) < len(compress(ZlibCodec(), data)))
+        self.assertEqual(data, DecompressingStream(BytesIO(compressed), codec).read())
+
+    def testStorageComponentCompressesPart(self):
+        s = StorageComponent(self.tempdir, partsRemovedOnDelete=['rdf'], codecs={'rdf': ZlibCodec()})
+        data = '<rdf>' + 'triple' * 1000 + '</rdf>'
+        s.addData(identifier='id:1', name='rdf', data=data)
+        s.addData(identifier='id:1', name='meta', data='<meta/>')
+        with open(join(self.tempdir, 'id', '1', 'rdf'), 'rb') as f:
+            self.assertTrue(f.read().startswith(MAGIC))
+        with open(join(self.tempdir, 'id', '1', 'meta'), 'rb') as f:
+            self.assertEqual(b'<meta/>', f.read())
+        self.assertEqual(data, s.getData(identifier='id:1', name='rdf'))
+        self.assertEqual(data, s.getStream(identifier='id:1', partname='rdf').read())
+        self.assertEqual(data, ''.join(s.yieldRecord(identifier='id:1', partname='rdf')))
+        self.assertEqual('<meta/>', s.getData(identifier='id:1', name='meta'))
+
+    def testStorageComponentReadsPartsWrittenBeforeCompression(self):
+        StorageComponent(self.tempdir).addData(identifier='id:1', name='rdf', data='<old/>')
+        s = StorageComponent(self.tempdir, codecs={'rdf': ZlibCodec()})
+        self.assertEqual('<old/>', s.getData(identifier='id:1', name='rdf'))
+
+    def testAddManyCompressesBinary(self):
+        s = StorageComponent(self.tempdir, binary=True, codecs={'rdf': LzmaCodec()})
+        self.assertEqual([None, None], s.addMany([('id:1', 'rdf', b'<rdf/>'), ('id:1', 'meta', b'<meta/>')]))
+        self.assertEqual(b'<rdf/>', s.getData(identifier='id:1', name='rdf'))
+        self.assertEqual(b'<meta/>', s.getData(identifier='id:1', name='meta'))
+        sink = BytesIO()
+        s.write(sink, 'id:1', 'rdf')
+        self.assertEqual(b'<rdf/>', sink.getvalue())
+
+    def testPackStorage(self):
+        s = StorageComponent(self.tempdir, storageClass=PackStorage, codecs={'rdf': ZlibCodec()})
+        s.addData(identifier='id:1', name='rdf', data='<rdf/>')
+        self.assertEqual('<rdf/>', s.getData(identifier='id:1', name='rdf'))
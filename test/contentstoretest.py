@@ -0,0 +1,99 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os import stat, listdir
+from os.path import join
+
+from seecr.test import SeecrTestCase
+
+from storage import StorageComponent, ContentStore, ZlibCodec
+
+
+class ContentStoreTest(SeecrTestCase):
+    def setUp(self):
+        SeecrTestCase.setUp(self)
+        self.content = ContentStore(join(self.tempdir, 'content'))
+        self.s = StorageComponent(join(self.tempdir, 'store'), partsRemovedOnDelete=['license'], contentStore=self.content)
+
+    def testIdenticalPartsAreStoredOnce(self):
+        self.s.addData(identifier='id1', name='license', data='CC0')
+        self.s.addData(identifier='id2', name='license', data='CC0')
+        self.s.addData(identifier='id3', name='license', data='CC-BY')
+        digest = self.content.digest(b'CC0')
+        self.assertEqual(2, self.content.references(digest))
+        self.assertEqual(1, self.content.references(self.content.digest(b'CC-BY')))
+        self.assertEqual(stat(self.content.path(digest)).st_ino, stat(join(self.tempdir, 'store', 'id1', 'license')).st_ino)
+        self.assertEqual('CC0', self.s.getData(identifier='id2', name='license'))
+
+    def testDeleteAndOverwriteDropReferences(self):
+        self.s.addData(identifier='id1', name='license', data='CC0')
+        self.s.addData(identifier='id2', name='license', data='CC0')
+        digest = self.content.digest(b'CC0')
+        self.s.deletePart(identifier='id1', partname='license')
+        self.assertEqual(1, self.content.references(digest))
+        self.s.addData(identifier='id2', name='license', data='CC-BY')
+        self.assertEqual(0, self.content.references(digest))
+        self.assertEqual('CC-BY', self.s.getData(identifier='id2', name='license'))
+
+    def testCollectRemovesUnreferencedPayloads(self):
+        self.s.addData(identifier='id1', name='license', data='CC0')
+        self.s.addData(identifier='id2', name='license', data='CC-BY')
+        self.s.purge(identifier='id1')
+        self.assertEqual((1, 3), self.content.collect())
+        self.assertEqual(0, self.content.references(self.content.digest(b'CC0')))
+        self.assertEqual(1, self.content.references(self.content.digest(b'CC-BY')))
+        self.assertEqual((0, 0), self.content.collect())
+
+    def testPayloadRemovedByCollectIsWrittenAgain(self):
+        self.s.addData(identifier='id1', name='license', data='CC0')
+        self.s.deletePart(identifier='id1', partname='license')
+        self.content.collect()
+        self.s.addData(identifier='id2', name='license', data='CC0')
+        self.assertEqual(1, self.content.references(self.content.digest(b'CC0')))
+        self.assertEqual('CC0', self.s.getData(identifier='id2', name='license'))
+
+    def testAddMany(self):
+        self.assertEqual([None, None], self.s.addMany([('id1', 'license', 'CC0'), ('id2', 'license', 'CC0')]))
+        self.assertEqual(2, self.content.references(self.content.digest(b'CC0')))
+        self.assertEqual(['id1', 'id2'], sorted(listdir(join(self.tempdir, 'store'))))
+
+    def testWithCompression(self):
+        s = StorageComponent(join(self.tempdir, 'compressed'), binary=True, contentStore=self.content, codecs={'rdf': ZlibCodec()})
+        s.addData(identifier='id1', name='rdf', data=b'<rdf/>')
+        s.addData(identifier='id2', name='rdf', data=b'<rdf/>')
+        self.assertEqual(b'<rdf/>', s.getData(identifier='id2', name='rdf'))
+        self.assertEqual(1, len(listdir(join(self.tempdir, 'content'))))
+
+    def testAddStream(self):
+        self.s.addData(identifier='id1', name='license', data='CC0')
+        self.assertEqual(dict(size=3), self.s.addStream('id2', 'license', iter(['C', 'C0'])))
+        self.assertEqual(dict(size=5), self.s.addStream('id3', 'license', iter(['CC', '-BY'])))
+        self.assertEqual(2, self.content.references(self.content.digest(b'CC0')))
+        self.assertEqual(1, self.content.references(self.content.digest(b'CC-BY')))
+        self.assertEqual('CC-BY', self.s.getData(identifier='id3', name='license'))
+        self.assertEqual([], listdir(join(self.tempdir, 'content', 'incoming')))
+        self.s.purge('id3')
+        self.assertEqual((1, 5), self.content.collect())
@@ -0,0 +1,134 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os import rename, remove, makedirs, link
+from os.path import join
+from shutil import rmtree
+
+from seecr.test import SeecrTestCase
+
+from storage import StorageComponent, FdCache
+from storage import fdcache
+
+
+class FdCacheTest(SeecrTestCase):
+    def write(self, name, data):
+        with open(join(self.tempdir, name), 'wb') as f:
+            f.write(data)
+
+    def testReadKeepsHandlesOpen(self):
+        cache = FdCache()
+        self.write('a', b'0123456789')
+        self.assertEqual(b'0123456789', cache.read(join(self.tempdir, 'a')))
+        self.assertEqual(b'345', cache.read(join(self.tempdir, 'a'), 3, 3))
+        self.assertEqual(b'89', cache.read(join(self.tempdir, 'a'), 8, 10))
+        self.assertEqual(dict(directories=1, files=1), cache.stats())
+
+    def testLruEviction(self):
+        cache = FdCache(maxDirectories=1, maxFiles=2)
+        makedirs(join(self.tempdir, 'sub'))
+        for name in ['a', 'b', 'sub/c']:
+            self.write(name, name.encode())
+            self.assertEqual(name.encode(), cache.read(join(self.tempdir, name)))
+        self.assertEqual(dict(directories=1, files=2), cache.stats())
+        self.assertEqual(b'a', cache.read(join(self.tempdir, 'a')))
+        cache.clear()
+        self.assertEqual(dict(directories=0, files=0), cache.stats())
+
+    def testCachedReadResolvesOnlyTheName(self):
+        cache = FdCache()
+        self.write('a', b'data')
+        cache.read(join(self.tempdir, 'a'))
+        stats = []
+        originalStat = fdcache.stat
+        fdcache.stat = lambda path, **kwargs: stats.append((path, sorted(kwargs))) or originalStat(path, **kwargs)
+        try:
+            self.assertEqual(b'data', cache.read(join(self.tempdir, 'a')))
+        finally:
+            fdcache.stat = originalStat
+        self.assertEqual([('a', ['dir_fd'])], stats)
+
+    def testReplacedOrRemovedFileIsDetected(self):
+        cache = FdCache()
+        path = join(self.tempdir, 'a')
+        self.write('a', b'old')
+        self.assertEqual(b'old', cache.read(path))
+        self.write('new', b'new')
+        rename(join(self.tempdir, 'new'), path)
+        self.assertEqual(b'new', cache.read(path))
+        remove(path)
+        self.assertRaises(FileNotFoundError, lambda: cache.read(path))
+
+    def testReplacedHardlinkedFileIsDetected(self):
+        cache = FdCache()
+        path = join(self.tempdir, 'a')
+        self.write('a', b'old')
+        link(path, join(self.tempdir, 'keep'))
+        self.assertEqual(b'old', cache.read(path))
+        self.write('new', b'new')
+        rename(join(self.tempdir, 'new'), path)
+        self.assertEqual(b'new', cache.read(path))
+
+        other = StorageComponent(self.tempdir, binary=True)
+        s = StorageComponent(self.tempdir, binary=True, fdCache=cache)
+        other.addData(identifier='id:1', name='part', data=b'one')
+        self.assertEqual(b'one', s.getData(identifier='id:1', name='part'))
+        link(join(self.tempdir, 'id', '1', 'part'), join(self.tempdir, 'copy'))
+        other.addData(identifier='id:1', name='part', data=b'two')
+        self.assertEqual(b'two', s.getData(identifier='id:1', name='part'))
+
+    def testNeedsBinaryMode(self):
+        self.assertRaises(AssertionError, lambda: StorageComponent(self.tempdir, fdCache=FdCache()))
+
+    def testRecreatedDirectory(self):
+        cache = FdCache()
+        makedirs(join(self.tempdir, 'sub'))
+        self.write('sub/a', b'a')
+        self.assertEqual(b'a', cache.read(join(self.tempdir, 'sub', 'a')))
+        remove(join(self.tempdir, 'sub', 'a'))
+        rmtree(join(self.tempdir, 'sub'))
+        makedirs(join(self.tempdir, 'sub'))
+        self.write('sub/b', b'b')
+        self.assertEqual(b'b', cache.read(join(self.tempdir, 'sub', 'b')))
+
+    def testStorageComponent(self):
+        cache = FdCache()
+        s = StorageComponent(self.tempdir, partsRemovedOnDelete=['part'], binary=True, fdCache=cache)
+        s.addData(identifier='id:1', name='part', data=b'one\r\n')
+        self.assertEqual(b'one\r\n', s.getData(identifier='id:1', name='part'))
+        self.assertEqual(dict(directories=1, files=1), cache.stats())
+        s.addData(identifier='id:1', name='part', data=b'two')
+        self.assertEqual(dict(directories=1, files=0), cache.stats())
+        self.assertEqual(b'two', s.getData(identifier='id:1', name='part'))
+        self.assertEqual([b'two', None], s.getMany([('id:1', 'part'), ('id:2', 'part')]))
+        s.deleteData(identifier='id:1')
+        self.assertRaises(KeyError, lambda: s.getData(identifier='id:1', name='part'))
+
+    def testBinaryRange(self):
+        s = StorageComponent(self.tempdir, binary=True, fdCache=FdCache())
+        s.addData(identifier='id:1', name='part', data=b'0123456789')
+        self.assertEqual(b'234', s.getData(identifier='id:1', name='part', offset=2, length=3))
+        self.assertEqual(b'0123456789', s.getData(identifier='id:1', name='part'))
@@ -0,0 +1,76 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from unittest import TestCase
+from threading import Thread, Event
+from time import sleep
+
+from storage.groupsync import GroupSync, DirectorySyncer
+
+
+class GroupSyncTest(TestCase):
+    def testSingleCaller(self):
+        syncs = []
+        g = GroupSync(lambda: syncs.append(1))
+        g.sync()
+        g.sync()
+        self.assertEqual(2, len(syncs))
+
+    def testWaitingCallersShareOneSync(self):
+        syncs = []
+        started = Event()
+        proceed = Event()
+        def slowSync():
+            syncs.append(1)
+            started.set()
+            proceed.wait()
+        g = GroupSync(slowSync)
+        first = Thread(target=g.sync)
+        first.start()
+        started.wait()
+        others = [Thread(target=g.sync) for i in range(5)]
+        for t in others:
+            t.start()
+        sleep(0.05)
+        proceed.set()
+        for t in [first] + others:
+            t.join()
+        self.assertEqual(2, len(syncs))
+
+    def testFailingSyncIsRetriedByNextCaller(self):
+        results = [OSError('disk'), None]
+        def sync():
+            result = results.pop(0)
+            if result:
+                raise result
+        g = GroupSync(sync)
+        self.assertRaises(OSError, g.sync)
+        g.sync()
+        self.assertEqual([], results)
+
+    def testDirectorySyncerForgetsIdleDirectories(self):
+        syncer = DirectorySyncer()
+        syncer.sync('/tmp')
+        self.assertEqual({}, syncer._groups)
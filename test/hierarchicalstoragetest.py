@@ -33,6 +33,7 @@ from tempfile import mkdtemp
 from shutil import rmtree
 from os.path import isdir, join
 from os import getcwd
+from threading import Thread, Barrier
 
 from storage import HierarchicalStorage, Storage, HierarchicalStorageError
 
@@ -295,5 +296,58 @@ class HierarchicalStorageTest(TestCase):
         self.assertRaises(IOError, lambda: list(a))
         self.assertRaises(IOError, lambda: list(notexist))
 
-
+    def testPutMany(self):
+        s = Storage(self._tempdir)
+        f = HierarchicalStorage(s, split=lambda s: s.split('.'))
+        created = []
+        newStorage = s.newStorage
+        def newStorageSpy():
+            created.append(1)
+            return newStorage()
+        s.newStorage = newStorageSpy
+        results = []
+        for index, sink in f.putMany(['a.b.one', 'c.d', 'a.b.two', 'a..x', 'a.b.three']):
+            results.append((index, sink.__class__.__name__))
+            if not isinstance(sink, Exception):
+                sink.send(str(index))
+                sink.close()
+        self.assertEqual([(3, 'HierarchicalStorageError'), (0, 'Sink'), (2, 'Sink'), (4, 'Sink'), (1, 'Sink')], results)
+        self.assertEqual(4, len(created))
+        self.assertEqual('2', next(f.get('a.b.two')))
+        self.assertEqual('1', next(f.get('c.d')))
+
+    def testPutWhenDirectoryIsCreatedConcurrently(self):
+        class RacingStorage(Storage):
+            def get(self, name):
+                if name == 'sub' and not 'sub' in self:
+                    other = Storage()
+                    other.put('othername').close()
+                    Storage.put(self, 'sub', other)
+                    raise KeyError(name)
+                return Storage.get(self, name)
+        s = RacingStorage(self._tempdir)
+        f = HierarchicalStorage(s, split=lambda x: x.split('.'))
+        f.put('sub.name').close()
+        self.assertEqual(set(['sub.othername', 'sub.name']), set('.'.join(names) for names in s.walk()))
+
+    def testConcurrentPutsInNewDirectories(self):
+        f = HierarchicalStorage(Storage(self._tempdir), split=lambda x: x.split('.'), join=lambda l: '.'.join(l))
+        barrier = Barrier(8)
+        errors = []
+        def writer(n):
+            barrier.wait()
+            try:
+                for i in range(20):
+                    sink = f.put('a.b%s.c.name%s' % (i % 3, n))
+                    sink.send('data')
+                    sink.close()
+            except Exception as e:
+                errors.append(e)
+        threads = [Thread(target=writer, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([], errors)
+        self.assertEqual(24, len(list(f)))
 
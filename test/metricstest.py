@@ -0,0 +1,83 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from seecr.test import SeecrTestCase
+
+from storage import StorageComponent, Metrics
+
+
+class MetricsTest(SeecrTestCase):
+    def testRecord(self):
+        metrics = Metrics()
+        metrics.record('get', 0.0000005, bytesRead=10)
+        metrics.record('get', 0.003, bytesRead=5, error=True)
+        self.assertEqual({'get': dict(count=2, errors=1, seconds=0.0030005, bytesRead=15, bytesWritten=0, histogram={1: 1, 4096: 1})}, metrics.stats())
+        metrics.reset()
+        self.assertEqual({}, metrics.stats())
+
+    def testHooks(self):
+        calls = []
+        metrics = Metrics(hooks=[lambda *args: calls.append(args)])
+        metrics.record('put', 0.5, bytesWritten=3)
+        self.assertEqual([('put', 0.5, 0, 3, False)], calls)
+
+    def testFailingHookDoesNotMaskTheOperation(self):
+        def hook(*args):
+            raise RuntimeError('hook')
+        metrics = Metrics(hooks=[hook])
+        s = StorageComponent(self.tempdir, metrics=metrics)
+        s.addData('id:1', 'part', 'data')
+        self.assertRaises(KeyError, lambda: s.getData('id:2', 'part'))
+        self.assertEqual(1, metrics.stats()['put']['count'])
+
+    def testStorageComponent(self):
+        metrics = Metrics()
+        s = StorageComponent(self.tempdir, partsRemovedOnDelete=['part'], metrics=metrics)
+        s.addData(identifier='id:1', name='part', data='data')
+        s.addData('id:2', 'part', 'more data')
+        self.assertEqual('data', s.getData(identifier='id:1', name='part'))
+        self.assertRaises(KeyError, lambda: s.getData(identifier='id:3', name='part'))
+        self.assertEqual(['data', None], s.getMany([('id:1', 'part'), ('id:3', 'part')]))
+        self.assertEqual(['data'], list(s.yieldRecord('id:1', 'part')))
+        self.assertEqual(['id:1', 'id:2'], sorted(s.listIdentifiers()))
+        s.deletePart('id:1', 'part')
+        s.addData('id:3', 'part', 'é€')
+        self.assertEqual(['é€'], list(s.yieldRecord('id:3', 'part')))
+        stats = metrics.stats()
+        self.assertEqual((3, 18), (stats['put']['count'], stats['put']['bytesWritten']))
+        self.assertEqual((2, 1, 4), (stats['get']['count'], stats['get']['errors'], stats['get']['bytesRead']))
+        self.assertEqual(4, stats['getMany']['bytesRead'])
+        self.assertEqual((2, 9), (stats['stream']['count'], stats['stream']['bytesRead']))
+        self.assertEqual(1, stats['glob']['count'])
+        self.assertEqual(1, stats['delete']['count'])
+        self.assertEqual(3, sum(stats['put']['histogram'].values()))
+        self.assertEqual(3, stats['storage.put']['count'])
+        self.assertEqual(1, stats['storage.delete']['count'])
+        self.assertTrue(stats['storage.getFile']['count'] >= 3)
+
+    def testNoMetricsLeavesMethodsAlone(self):
+        s = StorageComponent(self.tempdir)
+        self.assertFalse('addData' in vars(s))
@@ -0,0 +1,237 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from unittest import TestCase
+from tempfile import mkdtemp
+from shutil import rmtree
+from os import listdir, pread
+from os.path import isdir, join, getsize
+
+from storage import PackStorage, HierarchicalStorage
+from storage.storage import DirectoryNotEmptyError, DURABILITY_FILE_AND_DIR
+
+
+class PackStorageTest(TestCase):
+    def setUp(self):
+        self._tempdir = mkdtemp()
+
+    def tearDown(self):
+        isdir(self._tempdir) and rmtree(self._tempdir)
+
+    def put(self, storage, name, data):
+        sink = storage.put(name)
+        sink.send(data)
+        sink.close()
+
+    def testPutAndGet(self):
+        s = PackStorage(self._tempdir)
+        self.put(s, 'mydata', 'some data of mine')
+        self.assertTrue('mydata' in s)
+        self.assertFalse('other' in s)
+        self.assertEqual('some data of mine', next(s.get('mydata')))
+        self.assertEqual(['segment-00000000.pack'], listdir(self._tempdir))
+
+    def testGetNotExisting(self):
+        s = PackStorage(self._tempdir)
+        try:
+            s.get('name')
+            self.fail()
+        except KeyError as e:
+            self.assertEqual("'name'", str(e))
+        self.assertRaises(IOError, lambda: s.getFile('name').read())
+
+    def testEmptyName(self):
+        s = PackStorage(self._tempdir)
+        try:
+            s.put('')
+            self.fail()
+        except KeyError as e:
+            self.assertEqual("'Empty name'", str(e))
+
+    def testOverwrite(self):
+        s = PackStorage(self._tempdir)
+        self.put(s, 'name', 'first')
+        self.put(s, 'name', 'second')
+        with s.get('name') as f:
+            self.assertEqual('second', f.read())
+
+    def testSubStorages(self):
+        s = PackStorage(self._tempdir)
+        sub = s.put('sub', s.newStorage())
+        self.assertEqual('sub', sub.name)
+        self.put(sub, 'name', 'data')
+        self.assertEqual('data', next(s.get('sub').get('name')))
+        self.assertEqual('data', next(s.getStorage('sub').getFile('name')))
+        try:
+            s.put('sub')
+            self.fail()
+        except KeyError as e:
+            self.assertEqual("'Key already exists: sub'", str(e))
+        try:
+            s.put('sub', s.newStorage())
+            self.fail()
+        except KeyError as e:
+            self.assertEqual("'Key already exists: sub'", str(e))
+
+    def testDeleteAndPurge(self):
+        s = PackStorage(self._tempdir)
+        sub = s.put('sub', s.newStorage())
+        self.put(sub, 'name', 'data')
+        self.assertRaises(DirectoryNotEmptyError, lambda: s.purge('sub'))
+        sub.purge('name')
+        self.assertFalse('name' in sub)
+        s.purge('sub')
+        self.assertFalse('sub' in s)
+        self.assertRaises(KeyError, lambda: s.purge('sub'))
+
+        sub = s.put('sub', s.newStorage())
+        self.put(sub, 'name', 'data')
+        s.delete('sub')
+        self.assertFalse('sub' in s)
+        self.assertRaises(KeyError, lambda: s.delete('sub'))
+
+    def testEnumerate(self):
+        s = PackStorage(self._tempdir)
+        self.put(s, 'name', 'data')
+        s.put('sub', s.newStorage())
+        self.assertEqual(['name', 'sub'], [item.name for item in s])
+
+    def testWalk(self):
+        s = PackStorage(self._tempdir)
+        self.put(s, 'name', 'data')
+        sub = s.put('sub', s.newStorage())
+        self.put(sub, 'one', 'data')
+        self.put(sub.put('subsub', s.newStorage()), 'two', 'data')
+        self.assertEqual(set([('name',), ('sub', 'one'), ('sub', 'subsub', 'two')]), set(s.walk()))
+        self.assertEqual(set([('one',), ('subsub', 'two')]), set(s.get('sub').walk()))
+
+    def testReopenRebuildsIndex(self):
+        s = PackStorage(self._tempdir)
+        self.put(s.put('sub', s.newStorage()), 'name', 'data')
+        self.put(s, 'gone', 'data')
+        s.delete('gone')
+        s = PackStorage(self._tempdir)
+        self.assertEqual(['sub'], [item.name for item in s])
+        self.assertEqual('data', next(s.get('sub').get('name')))
+
+    def testReopenIgnoresTornRecord(self):
+        s = PackStorage(self._tempdir)
+        self.put(s, 'name', 'data')
+        self.put(s, 'torn', 'x' * 100)
+        segment = join(self._tempdir, 'segment-00000000.pack')
+        size = getsize(segment)
+        with open(segment, 'r+b') as f:
+            f.truncate(size - 10)
+        s = PackStorage(self._tempdir)
+        self.assertEqual(['name'], [item.name for item in s])
+        self.put(s, 'next', 'more')
+        s = PackStorage(self._tempdir)
+        self.assertEqual(['name', 'next'], [item.name for item in s])
+
+    def testReopenCutsOffZeroFilledTail(self):
+        s = PackStorage(self._tempdir)
+        self.put(s, 'name', 'data')
+        segment = join(self._tempdir, 'segment-00000000.pack')
+        size = getsize(segment)
+        with open(segment, 'ab') as f:
+            f.write(b'\x00' * 64)
+        s = PackStorage(self._tempdir)
+        self.assertEqual(['name'], [item.name for item in s])
+        self.assertEqual(size, getsize(segment))
+
+    def testReopenCutsOffCorruptRecord(self):
+        s = PackStorage(self._tempdir)
+        self.put(s, 'name', 'data')
+        self.put(s, 'corrupt', 'x' * 100)
+        self.put(s, 'after', 'data')
+        segment = join(self._tempdir, 'segment-00000000.pack')
+        with open(segment, 'r+b') as f:
+            f.seek(getsize(segment) - 50)
+            f.write(b'y')
+        s = PackStorage(self._tempdir)
+        self.assertEqual(['name'], [item.name for item in s])
+
+    def testSegmentRollover(self):
+        s = PackStorage(self._tempdir, maxSegmentSize=100)
+        for i in range(5):
+            self.put(s, 'name%s' % i, 'x' * 60)
+        self.assertEqual(5, len(listdir(self._tempdir)))
+        s = PackStorage(self._tempdir, maxSegmentSize=100)
+        self.assertEqual(['x' * 60] * 5, [next(s.get('name%s' % i)) for i in range(5)])
+
+    def testCompact(self):
+        s = PackStorage(self._tempdir)
+        for i in range(3):
+            self.put(s, 'name', 'data%s' % i)
+        self.put(s.put('sub', s.newStorage()), 'other', 'more')
+        s.compact()
+        self.assertEqual(['segment-00000001.pack'], listdir(self._tempdir))
+        s = PackStorage(self._tempdir)
+        self.assertEqual('data2', next(s.get('name')))
+        self.assertEqual('more', next(s.get('sub').get('other')))
+
+    def testCompactKeepsSegmentsOpenForReaders(self):
+        s = PackStorage(self._tempdir)
+        self.put(s, 'name', 'data')
+        pack = s._pack
+        self.assertEqual(b'data', pack.read(('name',)))
+        size = getsize(join(self._tempdir, 'segment-00000000.pack'))
+        reading = pack._readFds[0]
+        reading.refs += 1
+        s.compact()
+        self.assertEqual(['segment-00000001.pack'], listdir(self._tempdir))
+        self.assertEqual(b'data', pread(reading.fd, 4, size - 4))
+        reading.release()
+        self.assertEqual('data', next(s.get('name')))
+
+    def testDurability(self):
+        s = PackStorage(self._tempdir, durability=DURABILITY_FILE_AND_DIR, maxSegmentSize=50)
+        self.put(s.put('sub', s.newStorage()), 'name', 'x' * 40)
+        self.put(s, 'other', 'y' * 40)
+        s = PackStorage(self._tempdir)
+        self.assertEqual('x' * 40, next(s.get('sub').get('name')))
+
+    def testBinaryMode(self):
+        s = PackStorage(self._tempdir, binary=True)
+        self.put(s.put('sub', s.newStorage()), 'name', b'\x00\xff')
+        self.assertEqual(b'\x00\xff', next(s.get('sub').get('name')))
+        buffer = bytearray(2)
+        with s.getStorage('sub').getFile('name') as f:
+            self.assertEqual(2, f.readinto(buffer))
+        self.assertEqual(b'\x00\xff', bytes(buffer))
+
+    def testWithHierarchicalStorage(self):
+        f = HierarchicalStorage(PackStorage(self._tempdir), split=lambda s: s.split('.'), join=lambda l: ".".join(l))
+        for name in ['a.b', 'a.c.file_one', 'a.c.file_two']:
+            sink = f.put(name)
+            sink.send(name)
+            sink.close()
+        self.assertEqual('a.c.file_one', next(f.get('a.c.file_one')))
+        self.assertTrue('a.c' in f)
+        self.assertEqual(set(['a.c.file_one', 'a.c.file_two']), set(f.glob('a.c.file')))
+        f.purge('a.c.file_one')
+        f.purge('a.c.file_two')
+        self.assertFalse('a.c' in f)
+        self.assertEqual(['a.b'], list(f))
@@ -0,0 +1,194 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from seecr.test import SeecrTestCase
+
+from os.path import join
+from random import Random
+
+from storage import PartsIndex, StorageComponent
+from storage.partsindex import SortedKeys
+
+
+class PartsIndexTest(SeecrTestCase):
+    def testAddAndRemove(self):
+        index = PartsIndex()
+        self.assertEqual((False, False), index.isAvailable('id:1', 'part'))
+        index.add('id:1', 'part')
+        index.add('id:1', 'apart')
+        index.add('id:1', 'part')
+        self.assertEqual(('apart', 'part'), index.parts('id:1'))
+        self.assertEqual((True, True), index.isAvailable('id:1', 'part'))
+        self.assertEqual((True, False), index.isAvailable('id:1', 'other'))
+        self.assertEqual((True, True), index.isAvailable('id:1', None))
+        self.assertTrue(('id:1', 'part') in index)
+        index.remove('id:1', 'part')
+        index.remove('id:1', 'apart')
+        index.remove('id:2', 'part')
+        self.assertEqual((True, False), index.isAvailable('id:1', 'part'))
+        self.assertEqual(1, len(index))
+
+    def testPurge(self):
+        index = PartsIndex()
+        index.add('id:1', 'part')
+        index.add('id:1', 'other')
+        index.purge('id:1', 'part')
+        self.assertEqual((True, False), index.isAvailable('id:1', 'part'))
+        index.purge('id:1', 'other')
+        self.assertEqual((False, False), index.isAvailable('id:1', 'other'))
+        self.assertEqual(0, len(index))
+
+    def testRebuild(self):
+        index = PartsIndex()
+        index.add('id:0', 'part')
+        index.rebuild([('id:1', 'a'), ('id:1', 'b'), ('id:2', 'a')])
+        self.assertEqual(('a', 'b'), index.parts('id:1'))
+        self.assertEqual((False, False), index.isAvailable('id:0', 'part'))
+
+    def testStorageComponentRebuildsIndexFromDisk(self):
+        StorageComponent(self.tempdir).addData('some:id', 'part', 'data')
+        index = PartsIndex()
+        s = StorageComponent(self.tempdir, partsIndex=index, partsRemovedOnDelete=['part'])
+        self.assertEqual(('part',), index.parts('some:id'))
+        self.assertEqual((True, True), s.isAvailable('some:id', 'part'))
+
+    def testRebuildKeepsNamesEndingLikeTemporaryFiles(self):
+        StorageComponent(self.tempdir).addData('rec:b', 'x,t', 'data')
+        index = PartsIndex()
+        s = StorageComponent(self.tempdir, partsIndex=index)
+        self.assertEqual(('x,t',), index.parts('rec:b'))
+        self.assertEqual('data', s.getData('rec:b', 'x,t'))
+
+    def testStorageComponentKeepsIndexInSync(self):
+        index = PartsIndex()
+        s = StorageComponent(self.tempdir, partsIndex=index, partsRemovedOnDelete=['part'])
+        s.addData('some:id', 'part', 'data')
+        s.addData('some:id', 'other', 'data')
+        self.assertEqual((True, True), s.isAvailable('some:id', 'other'))
+        self.assertEqual('data', s.getData('some:id', 'part'))
+        s.deleteData('some:id')
+        self.assertEqual((True, False), s.isAvailable('some:id', 'part'))
+        self.assertRaises(KeyError, lambda: s.getData('some:id', 'part'))
+        s.purge('some:id')
+        self.assertEqual((True, True), s.isAvailable('some:id', 'other'))
+        s.deletePart('some:id', 'other')
+        s.addData('some:id', 'part', 'data')
+        s.purge('some:id')
+        self.assertEqual((False, False), s.isAvailable('some:id', 'part'))
+        self.assertEqual([], list(s.listIdentifiers()))
+
+    def testIdentifiersArePrefixAndRangeScans(self):
+        index = PartsIndex()
+        for identifier, partname in [('b:1', 'x'), ('a:2', 'y'), ('a:1', 'x'), ('a:3', 'x'), ('ab', 'x'), ('c', 'x')]:
+            index.add(identifier, partname)
+        index.remove('a:3', 'x')
+        self.assertEqual(['a:1', 'a:2', 'ab', 'b:1', 'c'], list(index.identifiers()))
+        self.assertEqual(['a:1', 'a:2'], list(index.identifiers(prefix='a:')))
+        self.assertEqual(['a:1'], list(index.identifiers(prefix='a:', partname='x')))
+        self.assertEqual(['a:2', 'ab'], list(index.identifiers(prefix='a', after='a:1')))
+        self.assertEqual(['a:1', 'a:2', 'ab'], list(index.identifiers(prefix='a', after='0')))
+        self.assertEqual([], list(index.identifiers(prefix='a', after='b')))
+
+    def testPersistent(self):
+        path = join(self.tempdir, 'index')
+        index = PartsIndex(path=path)
+        self.assertTrue(index.needsRebuild())
+        index.rebuild([('id:1', 'part')])
+        index.add('id:2', 'part')
+        index.add('id:3', 'part')
+        index.purge('id:3', 'part')
+        index.remove('id:1', 'part')
+
+        index = PartsIndex(path=path)
+        self.assertTrue(index.needsRebuild())
+        self.assertEqual((True, False), index.isAvailable('id:1', 'part'))
+        self.assertEqual(['id:2'], list(index.identifiers()))
+        index.close()
+
+        index = PartsIndex(path=path)
+        self.assertFalse(index.needsRebuild())
+        self.assertEqual(['id:2'], list(index.identifiers()))
+        self.assertEqual(0, index._journalLength)
+        self.assertTrue(PartsIndex(path=path).needsRebuild())
+
+    def testPersistentIgnoresTornJournalLine(self):
+        path = join(self.tempdir, 'index')
+        index = PartsIndex(path=path)
+        index.add('id:1', 'part')
+        with open(path + '.journal', 'a') as f:
+            f.write('["add", "id:2", "pa')
+        index = PartsIndex(path=path)
+        self.assertEqual(['id:1'], list(index.identifiers()))
+
+    def testStorageComponentListsFromIndex(self):
+        path = join(self.tempdir, 'index')
+        store = join(self.tempdir, 'store')
+        StorageComponent(store).addData('a:1', 'part', 'data')
+        s = StorageComponent(store, partsIndex=PartsIndex(path=path))
+        s.addData('a:2', 'part', 'data')
+        s.addData('a:2', 'other', 'data')
+        s.addData('b:1', 'other', 'data')
+        self.assertEqual(['a:1', 'a:2'], list(s.listIdentifiers(identifierPrefix='a')))
+        self.assertEqual(['a:2', 'b:1'], list(s.listIdentifiers(partname='other')))
+        self.assertEqual(['b:1'], list(s.listIdentifiers(after='a:2')))
+        self.assertEqual([('a:2', 'other'), ('a:2', 'part')], list(s.glob(('a:2', None))))
+
+        StorageComponent(store).addData('c:1', 'part', 'data')
+        index = PartsIndex(path=path)
+        s = StorageComponent(store, partsIndex=index)
+        self.assertEqual(['a:1', 'a:2', 'b:1', 'c:1'], list(s.listIdentifiers()))
+        s.addData('c:2', 'part', 'data')
+        index.close()
+
+        index = PartsIndex(path=path)
+        self.assertFalse(index.needsRebuild())
+        s = StorageComponent(store, partsIndex=index)
+        self.assertEqual(['a:1', 'a:2', 'b:1', 'c:1', 'c:2'], list(s.listIdentifiers()))
+
+    def testListIdentifiersAfterWithoutIndex(self):
+        s = StorageComponent(self.tempdir)
+        for identifier in ['a:3', 'a:1', 'a:2']:
+            s.addData(identifier, 'part', 'data')
+            s.addData(identifier, 'other', 'data')
+        self.assertEqual(['a:2', 'a:3'], list(s.listIdentifiers(after='a:1')))
+
+    def testSortedKeys(self):
+        keys = SortedKeys()
+        expected = set()
+        random = Random(42)
+        for i in range(20000):
+            key = random.randint(0, 5000)
+            if random.random() < 0.3:
+                keys.remove(key)
+                expected.discard(key)
+            else:
+                keys.add(key)
+                expected.add(key)
+        self.assertEqual(sorted(expected), list(keys.iterFrom(0)))
+        self.assertEqual(len(expected), len(keys))
+        self.assertEqual([k for k in sorted(expected) if k > 2500], list(keys.iterFrom(2500, inclusive=False)))
+        self.assertEqual(2500 in expected, 2500 in keys)
+        self.assertEqual(sorted(expected)[:3], list(SortedKeys(sorted(expected)).iterFrom(-1))[:3])
+
@@ -0,0 +1,83 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+from seecr.test import SeecrTestCase
+
+from storage import ReadCache, StorageComponent
+
+
+class ReadCacheTest(SeecrTestCase):
+    def testGetAndPut(self):
+        cache = ReadCache()
+        self.assertEqual(None, cache.get('key'))
+        cache.put('key', 'data', cache.token())
+        self.assertEqual('data', cache.get('key'))
+        self.assertEqual(dict(hits=1, misses=1, evictions=0, entries=1, bytes=4), cache.stats())
+
+    def testEvictsLeastRecentlyUsedByEntries(self):
+        cache = ReadCache(maxEntries=2)
+        cache.put('a', 'A', cache.token())
+        cache.put('b', 'B', cache.token())
+        cache.get('a')
+        cache.put('c', 'C', cache.token())
+        self.assertEqual(None, cache.get('b'))
+        self.assertEqual('A', cache.get('a'))
+        self.assertEqual(1, cache.stats()['evictions'])
+
+    def testEvictsBySize(self):
+        cache = ReadCache(maxBytes=10)
+        cache.put('a', 'x' * 6, cache.token())
+        cache.put('b', 'y' * 6, cache.token())
+        self.assertEqual(None, cache.get('a'))
+        cache.put('c', 'z' * 11, cache.token())
+        self.assertEqual(None, cache.get('c'))
+        self.assertEqual(dict(entries=1, bytes=6), dict((k, v) for k, v in cache.stats().items() if k in ['entries', 'bytes']))
+
+    def testInvalidateRejectsStaleData(self):
+        cache = ReadCache()
+        token = cache.token()
+        cache.invalidate('a')
+        cache.put('a', 'stale', token)
+        self.assertEqual(None, cache.get('a'))
+        cache.put('a', 'fresh', cache.token())
+        cache.clear()
+        self.assertEqual(None, cache.get('a'))
+
+    def testStorageComponentUsesCache(self):
+        cache = ReadCache()
+        s = StorageComponent(self.tempdir, readCache=cache, partsRemovedOnDelete=['part'])
+        s.addData('id:1', 'part', 'data')
+        self.assertEqual('data', s.getData('id:1', 'part'))
+        self.assertEqual('data', s.getData('id:1', 'part'))
+        self.assertEqual('data', s.getStream('id:1', 'part').read())
+        self.assertEqual(2, cache.hits)
+        s.addData('id:1', 'part', 'new data')
+        self.assertEqual('new data', s.getData('id:1', 'part'))
+        s.deleteData('id:1')
+        self.assertRaises(KeyError, lambda: s.getData('id:1', 'part'))
+        s.addData('id:1', 'part', 'data')
+        s.getData('id:1', 'part')
+        s.purge('id:1')
+        self.assertRaises(KeyError, lambda: s.getData('id:1', 'part'))
@@ -0,0 +1,73 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os import stat, listdir
+from os.path import join, samestat
+
+from seecr.test import SeecrTestCase
+
+from storage import StorageComponent, relayout
+from storage.storagecomponent import DefaultStrategy, HashDistributeStrategy
+
+
+class RelayoutTest(SeecrTestCase):
+    def setUp(self):
+        SeecrTestCase.setUp(self)
+        self.source = join(self.tempdir, 'source')
+        self.target = join(self.tempdir, 'target')
+        self.strategy = HashDistributeStrategy(depth=3, width=1, hashName='blake2b')
+
+    def testDefaultToHashDistributed(self):
+        s = StorageComponent(self.source)
+        s.addData(identifier='ns:1', name='rdf', data='one')
+        s.addData(identifier='ns:2', name='rdf', data='two')
+        s.addData(identifier='other', name='xml', data='<x/>')
+        self.assertEqual(dict(linked=3, unchanged=0, removed=0), relayout(self.source, self.target, DefaultStrategy, self.strategy))
+        t = StorageComponent(self.target, strategy=self.strategy)
+        self.assertEqual('one', t.getData(identifier='ns:1', name='rdf'))
+        self.assertEqual([('ns:1', 'rdf'), ('ns:2', 'rdf'), ('other', 'xml')], sorted(t.glob(('', None))))
+        self.assertTrue(samestat(stat(join(self.source, 'ns', '1', 'rdf')), stat(join(self.target, *self.strategy.split(('ns:1', 'rdf'))))))
+
+    def testPassesAreIncremental(self):
+        s = StorageComponent(self.source, partsRemovedOnDelete=['rdf'])
+        s.addData(identifier='ns:1', name='rdf', data='one')
+        s.addData(identifier='ns:2', name='rdf', data='two')
+        relayout(self.source, self.target, DefaultStrategy, self.strategy, maxWorkers=1)
+        s.addData(identifier='ns:1', name='rdf', data='new')
+        s.addData(identifier='ns:3', name='rdf', data='three')
+        s.deletePart(identifier='ns:2', partname='rdf')
+        self.assertEqual(dict(linked=2, unchanged=0, removed=1), relayout(self.source, self.target, DefaultStrategy, self.strategy))
+        self.assertEqual(dict(linked=0, unchanged=2, removed=0), relayout(self.source, self.target, DefaultStrategy, self.strategy))
+        t = StorageComponent(self.target, strategy=self.strategy)
+        self.assertEqual('new', t.getData(identifier='ns:1', name='rdf'))
+        self.assertEqual(['ns:1', 'ns:3'], sorted(t.listIdentifiers()))
+
+    def testHashDistributedToDefault(self):
+        s = StorageComponent(self.source, strategy=HashDistributeStrategy())
+        s.addData(identifier='ns:1', name='rdf', data='one')
+        relayout(self.source, self.target, HashDistributeStrategy(), DefaultStrategy)
+        self.assertEqual(['ns'], listdir(self.target))
+        self.assertEqual('one', StorageComponent(self.target).getData(identifier='ns:1', name='rdf'))
@@ -0,0 +1,122 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os import utime, listdir
+from os.path import join
+from time import time, monotonic, sleep
+from zlib import crc32
+
+from seecr.test import SeecrTestCase
+
+from storage import StorageComponent, Scrubber, Metrics
+from storage.storage import CHECKSUMS_RECORD, CHECKSUMS_VERIFY, ChecksumError, readChecksum
+
+
+class ScrubberTest(SeecrTestCase):
+    def corrupt(self, *names):
+        with open(join(self.tempdir, *names), 'r+b') as f:
+            f.write(b'X')
+
+    def testChecksumRecordedOnClose(self):
+        s = StorageComponent(self.tempdir, checksums=CHECKSUMS_RECORD)
+        s.addData(identifier='id:1', name='part', data='data')
+        self.assertEqual(crc32(b'data'), readChecksum(join(self.tempdir, 'id', '1', 'part')))
+        self.assertEqual(None, readChecksum(join(self.tempdir, 'id', '1')))
+
+    def testVerifyOnRead(self):
+        s = StorageComponent(self.tempdir, checksums=CHECKSUMS_VERIFY)
+        s.addData(identifier='id:1', name='part', data='line\r\nline')
+        s.addData(identifier='id:2', name='part', data='data')
+        self.assertEqual('line\nline', s.getData(identifier='id:1', name='part'))
+        self.assertEqual(['line\nline'], list(s.getStream(identifier='id:1', partname='part')))
+        self.corrupt('id', '2', 'part')
+        self.assertRaises(ChecksumError, lambda: s.getData(identifier='id:2', name='part'))
+        self.assertRaises(ChecksumError, lambda: list(s.yieldRecord('id:2', 'part')))
+        self.assertRaises(ChecksumError, lambda: s.getMany([('id:1', 'part'), ('id:2', 'part')]))
+        self.assertRaises(ChecksumError, lambda: s.getMany([('id:1', 'part'), ('id:2', 'part')], maxWorkers=1))
+        self.assertEqual('Xata', StorageComponent(self.tempdir).getData(identifier='id:2', name='part'))
+
+    def testVerifyBinaryAndUnrecorded(self):
+        StorageComponent(self.tempdir, binary=True).addData(identifier='id:1', name='part', data=b'old')
+        s = StorageComponent(self.tempdir, binary=True, checksums=CHECKSUMS_VERIFY)
+        self.assertEqual(b'old', s.getData(identifier='id:1', name='part'))
+        s.addData(identifier='id:2', name='part', data=b'\x00\xff')
+        self.assertEqual(b'\x00\xff', s.getData(identifier='id:2', name='part'))
+
+    def testGetBufferVerifies(self):
+        s = StorageComponent(self.tempdir, binary=True, checksums=CHECKSUMS_VERIFY)
+        s.addData(identifier='id:1', name='part', data=b'data')
+        with s.getBuffer('id:1', 'part') as buffer:
+            self.assertEqual(b'data', buffer[:])
+        self.corrupt('id', '1', 'part')
+        self.assertRaises(ChecksumError, lambda: s.getBuffer('id:1', 'part'))
+
+    def testScrubber(self):
+        s = StorageComponent(self.tempdir, checksums=CHECKSUMS_RECORD)
+        for i in range(10):
+            s.addData(identifier='ns%s:1' % (i % 3), name='part', data='data %s' % i)
+        StorageComponent(self.tempdir).addData(identifier='other:1', name='part', data='unchecked')
+        self.corrupt('ns1', '1', 'part')
+        orphan = join(self.tempdir, 'ns0', '1', '.part,abcdef,t')
+        with open(orphan, 'w') as f:
+            f.write('partial')
+        utime(orphan, (time() - 7200, time() - 7200))
+        with open(join(self.tempdir, 'ns0', '1', '.new,abcdef,t'), 'w') as f:
+            f.write('in progress')
+        metrics = Metrics()
+        scrubber = Scrubber(self.tempdir, metrics=metrics)
+        report = scrubber.run()
+        self.assertEqual([join(self.tempdir, 'ns1', '1', 'part')], report['corrupt'])
+        self.assertEqual([orphan], report['orphaned'])
+        self.assertEqual(dict(directories=4, directoriesDone=4, files=4, bytes=27, verified=3, unchecked=1, corrupt=1, orphaned=1), scrubber.progress())
+        self.assertEqual(4, metrics.stats()['scrub']['count'])
+
+    def testRemoveOrphansInBackground(self):
+        StorageComponent(self.tempdir).addData(identifier='id:1', name='part', data='data')
+        orphan = join(self.tempdir, 'id', '1', '.part,abcdef,t')
+        open(orphan, 'w').close()
+        scrubber = Scrubber(self.tempdir, orphanAge=0, removeOrphans=True)
+        scrubber.start()
+        while scrubber.isRunning():
+            sleep(0.01)
+        scrubber.stop()
+        self.assertFalse(scrubber.isRunning())
+        self.assertEqual([orphan], scrubber.report()['orphaned'])
+        self.assertEqual(['part'], listdir(join(self.tempdir, 'id', '1')))
+
+    def testNamesEndingLikeTemporaryFilesAreKept(self):
+        s = StorageComponent(self.tempdir)
+        s.addData(identifier='rec:b', name='x,t', data='precious')
+        report = Scrubber(self.tempdir, orphanAge=0, removeOrphans=True).run()
+        self.assertEqual([], report['orphaned'])
+        self.assertEqual('precious', s.getData(identifier='rec:b', name='x,t'))
+
+    def testThrottle(self):
+        StorageComponent(self.tempdir).addData(identifier='id:1', name='part', data='x' * 2000)
+        StorageComponent(self.tempdir).addData(identifier='id:2', name='part', data='x' * 2000)
+        start = monotonic()
+        Scrubber(self.tempdir, maxBytesPerSecond=20000).run()
+        self.assertTrue(monotonic() - start > 0.09)
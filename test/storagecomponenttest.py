@@ -36,9 +36,16 @@
 from seecr.test import SeecrTestCase
 
 from storage.storagecomponent import StorageComponent, DefaultStrategy, HashDistributeStrategy
-from io import StringIO
+from storage import PackStorage, PartsIndex, ZlibCodec
+from storage import groupsync
+from hashlib import sha1
+from storage.storage import DURABILITY_FILE_AND_DIR
+from io import StringIO, BytesIO
 from weightless.core import compose, consume
 from os.path import join
+from os import listdir, remove
+from threading import Thread
+from socket import socketpair
 
 
 class StorageComponentTest(SeecrTestCase):
@@ -241,6 +248,15 @@ class StorageComponentTest(SeecrTestCase):
 
         self.assertRaises(KeyError, lambda: s.join("NA"))
 
+    def testHashDistributeStrategyParameters(self):
+        s = HashDistributeStrategy(depth=3, width=1)
+        self.assertEqual(("5", "8", "e", "58eb8a535f07b1f7b94cd6083e664137301048a7.rdf"), s.split(("AnIdentifier", "rdf")))
+        s = HashDistributeStrategy(depth=1, width=3, hashName='blake2b')
+        self.assertEqual(2, len(s.split(("AnIdentifier", "rdf"))))
+        self.assertEqual(3, len(s.split(("AnIdentifier", "rdf"))[0]))
+        self.assertRaises(ValueError, lambda: HashDistributeStrategy(hashName='unknown'))
+        self.assertRaises(AssertionError, lambda: HashDistributeStrategy(depth=20, width=3))
+
     def testGetData(self):
         consume(self.storageComponent.add("id_0", "partName", "The contents of the part"))
         self.assertEqual('The contents of the part', self.storageComponent.getData(identifier='id_0', name='partName'))
@@ -262,6 +278,305 @@ class StorageComponentTest(SeecrTestCase):
         self.assertEqual('data', self.storageComponent.getData(identifier='id_0', name='noot'))
         self.assertRaises(KeyError, lambda: self.storageComponent.getData('id_0', 'aap'))
 
+    def testPackStorage(self):
+        s = StorageComponent(self.tempdir, storageClass=PackStorage)
+        s.addData('some:thing:anId-123', 'somePartName', 'data')
+        s.addData('some:thing:anId-124', 'somePartName', 'other')
+        self.assertEqual('data', s.getData('some:thing:anId-123', 'somePartName'))
+        self.assertEqual((True, False), s.isAvailable('some:thing:anId-123', 'otherPart'))
+        self.assertEqual(set(['some:thing:anId-123', 'some:thing:anId-124']), set(s.listIdentifiers(identifierPrefix='some:thing')))
+        s.purge('some:thing:anId-123')
+        s.deletePart('some:thing:anId-123', 'somePartName')
+        s = StorageComponent(self.tempdir, storageClass=PackStorage)
+        self.assertEqual(['some:thing:anId-124'], list(s.listIdentifiers()))
+        self.assertEqual('other', s.getData('some:thing:anId-124', 'somePartName'))
+
+    def testBinaryMode(self):
+        s = StorageComponent(self.tempdir, binary=True)
+        s.addData('id:1', 'part', b'\x00data\r\n')
+        self.assertEqual(b'\x00data\r\n', s.getData('id:1', 'part'))
+        self.assertEqual([b'\x00data\r\n'], list(s.yieldRecord('id:1', 'part')))
+        with s.getStream('id:1', 'part') as stream:
+            buffer = bytearray(4)
+            self.assertEqual(4, stream.readinto(buffer))
+            self.assertEqual(b'\x00dat', bytes(buffer))
+
+    def testBinaryWriteUsesSendfileForRealFiles(self):
+        s = StorageComponent(self.tempdir, binary=True)
+        s.addData('id:1', 'part', b'\x00' * 100000)
+        with open(join(self.tempdir, 'out'), 'wb') as out:
+            out.write(b'head')
+            s.write(out, 'id:1', 'part')
+            out.write(b'tail')
+        with open(join(self.tempdir, 'out'), 'rb') as f:
+            self.assertEqual(b'head' + b'\x00' * 100000 + b'tail', f.read())
+        out = BytesIO()
+        s.write(out, 'id:1', 'part')
+        self.assertEqual(b'\x00' * 100000, out.getvalue())
+
+    def testBinaryWriteFallsBackWhenSendfileIsRefused(self):
+        s = StorageComponent(self.tempdir, binary=True)
+        data = bytes(range(256)) * 1000
+        s.addData('id:1', 'part', data)
+        with open(join(self.tempdir, 'out'), 'ab') as out:
+            out.write(b'head')
+            s.write(out, 'id:1', 'part')
+        with open(join(self.tempdir, 'out'), 'rb') as f:
+            self.assertEqual(b'head' + data, f.read())
+
+    def testBinaryWriteToNonBlockingSocket(self):
+        s = StorageComponent(self.tempdir, binary=True)
+        data = bytes(range(256)) * 16 * 1024
+        s.addData('id:1', 'part', data)
+        sink, source = socketpair()
+        sink.setblocking(False)
+        received = []
+        def receive():
+            while True:
+                chunk = source.recv(65536)
+                if not chunk:
+                    break
+                received.append(chunk)
+        reader = Thread(target=receive)
+        reader.start()
+        try:
+            s.write(sink, 'id:1', 'part')
+        finally:
+            sink.close()
+            reader.join()
+            source.close()
+        self.assertEqual(data, b''.join(received))
+
+    def testAddMany(self):
+        items = [('id:%s' % i, 'part', 'data%s' % i) for i in range(5)] + [('', 'part', 'data'), ('id:1', '', 'data')]
+        results = self.storageComponent.addMany(items, batchSize=2, fsync=True)
+        self.assertEqual([None] * 5, results[:5])
+        self.assertEqual(ValueError, type(results[5]))
+        self.assertEqual("Name ('id:1', '') not allowed: 'Empty name'", str(results[6]))
+        self.assertEqual('data3', self.storageComponent.getData('id:3', 'part'))
+        self.assertEqual(set('id:%s' % i for i in range(5)), set(self.storageComponent.listIdentifiers()))
+
+    def testFailedWriteCreatesNoPart(self):
+        s = self.storageComponent
+        s.addData('id:1', 'part', 'old')
+        self.assertRaises(TypeError, lambda: s.addData('id:1', 'part', b'bytes'))
+        self.assertRaises(TypeError, lambda: s.addData('id:2', 'part', b'bytes'))
+        results = s.addMany([('id:1', 'part', b'bytes'), ('id:3', 'part', b'bytes')])
+        self.assertEqual([TypeError, TypeError], [type(result) for result in results])
+        self.assertEqual('old', s.getData('id:1', 'part'))
+        self.assertRaises(KeyError, lambda: s.getData('id:2', 'part'))
+        self.assertEqual(['part'], listdir(join(self.tempdir, 'id', '1')))
+        self.assertEqual([], listdir(join(self.tempdir, 'id', '2')))
+        self.assertEqual([], listdir(join(self.tempdir, 'id', '3')))
+
+    def testAddManyWithFsync(self):
+        for kwargs in [dict(strategy=HashDistributeStrategy()), dict(storageClass=PackStorage)]:
+            s = StorageComponent(join(self.tempdir, list(kwargs)[0]), **kwargs)
+            self.assertEqual([None, None], s.addMany([('id:1', 'part', 'one'), ('id:2', 'part', 'two')], fsync=True))
+            self.assertEqual('two', s.getData('id:2', 'part'))
+            self.assertEqual(['id:1', 'id:2'], sorted(s.listIdentifiers()))
+
+    def testAddManyWithFsyncSyncsCreatedDirectories(self):
+        root = join(self.tempdir, 'store')
+        s = StorageComponent(root)
+        synced = []
+        originalFsync = groupsync.fsyncDirectory
+        groupsync.fsyncDirectory = lambda path: synced.append(path) or originalFsync(path)
+        try:
+            self.assertEqual([None], s.addMany([('new:1', 'part', 'data')], fsync=True))
+        finally:
+            groupsync.fsyncDirectory = originalFsync
+        self.assertEqual([join(root, 'new', '1', 'part'), join(root, 'new', '1'), join(root, 'new'), root], synced)
+
+    def testAddManyRecordsStorageErrorsPerItem(self):
+        s = self.storageComponent
+        results = s.addMany([('id:1', 'part', 'one'), ('id:2', 'pa\x00rt', 'two'), ('id:3', 'part', 'three')])
+        self.assertEqual([None, ValueError, None], [r if r is None else type(r) for r in results])
+        self.assertEqual('three', s.getData('id:3', 'part'))
+
+    def testDurability(self):
+        s = StorageComponent(self.tempdir, durability=DURABILITY_FILE_AND_DIR)
+        s.addData('some:id', 'part', 'data')
+        self.assertEqual('data', openread(join(self.tempdir, 'some', 'id', 'part')))
+
+    def testHashDistributeStrategyStoresIdentifier(self):
+        s = StorageComponent(self.tempdir, strategy=HashDistributeStrategy())
+        s.addData('AnIdentifier', 'rdf', 'data')
+        self.assertEqual('AnIdentifier', openread(join(self.tempdir, '58', 'eb', '58eb8a535f07b1f7b94cd6083e664137301048a7.')))
+        self.assertEqual((True, False), s.isAvailable('AnIdentifier', 'xml'))
+        self.assertEqual((True, True), s.isAvailable('AnIdentifier', 'rdf'))
+
+    def testHashDistributeStrategyListIdentifiers(self):
+        s = StorageComponent(self.tempdir, strategy=HashDistributeStrategy(), partsRemovedOnDelete=['rdf', 'xml'])
+        self.assertEqual([], list(s.listIdentifiers()))
+        s.addData('id:1', 'rdf', 'data')
+        s.addData('id:1', 'xml', 'data')
+        s.addData('id:2', 'xml', 'data')
+        s.addMany([('other:1', 'rdf', 'data')])
+        self.assertEqual(set(['id:1', 'id:2', 'other:1']), set(s.listIdentifiers()))
+        self.assertEqual(set(['id:1', 'other:1']), set(s.listIdentifiers(partname='rdf')))
+        self.assertEqual(set([('id:1', 'rdf'), ('id:1', 'xml'), ('id:2', 'xml')]), set(s.glob(('id:', None))))
+
+        s.purge('id:1')
+        self.assertEqual(set(['id:2', 'other:1']), set(s.listIdentifiers()))
+        self.assertEqual((False, False), s.isAvailable('id:1', 'rdf'))
+        s.purge('id:2')
+        s.purge('other:1')
+        self.assertEqual([], listdir(self.tempdir))
+
+    def testHashDistributeStrategyBackfillsIdentifiers(self):
+        store = join(self.tempdir, 'store')
+        s = StorageComponent(store, strategy=HashDistributeStrategy())
+        for identifier in ['id:1', 'id:2', 'id:3']:
+            s.addData(identifier, 'rdf', 'data')
+        hashes = sorted(sha1(identifier.encode('utf-8')).hexdigest() for identifier in ['id:1', 'id:2'])
+        for hash in hashes:
+            remove(join(store, hash[:2], hash[2:4], hash + '.'))
+        s = StorageComponent(store, strategy=HashDistributeStrategy(), partsIndex=PartsIndex(join(self.tempdir, 'index')))
+        self.assertEqual(['id:3'], list(s.listIdentifiers()))
+        self.assertEqual(hashes, sorted(s.unidentifiedHashes()))
+        self.assertEqual(2, s.backfillIdentifiers(['id:1', 'id:2', 'id:3', 'id:4']))
+        self.assertEqual([], list(s.unidentifiedHashes()))
+        self.assertEqual(['id:1', 'id:2', 'id:3'], sorted(s.listIdentifiers()))
+        self.assertEqual(0, s.backfillIdentifiers(['id:1']))
+
+    def testHashDistributeStrategyRegistersIdentifierAgainAfterPurge(self):
+        s = StorageComponent(self.tempdir, strategy=HashDistributeStrategy(), partsRemovedOnPurge=['rdf'])
+        s.addData('id:1', 'rdf', 'data')
+        s.purge('id:1')
+        self.assertEqual([], list(s.listIdentifiers()))
+        s.addData('id:1', 'rdf', 'data')
+        self.assertEqual(['id:1'], list(s.listIdentifiers()))
+
+    def testHashDistributeStrategyWithPartsIndex(self):
+        StorageComponent(self.tempdir, strategy=HashDistributeStrategy()).addData('id:1', 'rdf', 'data')
+        s = StorageComponent(self.tempdir, strategy=HashDistributeStrategy(), partsIndex=PartsIndex())
+        s.addData('id:2', 'rdf', 'data')
+        self.assertEqual(['id:1', 'id:2'], list(s.listIdentifiers()))
+
+    def testGetMany(self):
+        s = self.storageComponent
+        s.addData(identifier='id:1', name='part', data='one')
+        s.addData(identifier='id:2', name='part', data='two')
+        s.addData(identifier='id:2', name='other', data='other')
+        keys = [('id:2', 'part'), ('id:3', 'part'), ('id:1', 'part'), ('id:1', 'other'), ('id:2', 'other')]
+        self.assertEqual(['two', None, 'one', None, 'other'], s.getMany(keys))
+        self.assertEqual(['two', None, 'one', None, 'other'], s.getMany(keys, maxWorkers=1))
+        self.assertEqual([], s.getMany([]))
+        s.close()
+        self.assertEqual(['two', None, 'one', None, 'other'], s.getMany(keys))
+        s.close()
+
+    def testGetManyReturnsNoneForInvalidKeys(self):
+        s = self.storageComponent
+        s.addData(identifier='rec:a', name='part', data='data')
+        self.assertEqual(['data', None], s.getMany([('rec:a', 'part'), ('', 'part')]))
+        self.assertEqual([None], s.getMany([('rec:a', '')]))
+
+    def testGetManyFromThreadsWithDifferentWorkers(self):
+        s = self.storageComponent
+        for i in range(20):
+            s.addData(identifier='id:%s' % i, name='part', data=str(i))
+        keys = [('id:%s' % i, 'part') for i in range(20)]
+        errors = []
+        def read(maxWorkers):
+            try:
+                for i in range(20):
+                    self.assertEqual([str(i) for i in range(20)], s.getMany(keys, maxWorkers=maxWorkers))
+            except Exception as e:
+                errors.append(e)
+        threads = [Thread(target=read, args=(2 + n % 3,)) for n in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([], errors)
+        self.assertEqual([2, 3, 4], sorted(s._readExecutors))
+        s.close()
+
+    def testGetManyWithPartsIndexAndPackStorage(self):
+        s = StorageComponent(self.tempdir, storageClass=PackStorage, partsIndex=PartsIndex())
+        s.addData(identifier='id:1', name='part', data='one')
+        self.assertEqual([None, 'one'], s.getMany([('id:2', 'part'), ('id:1', 'part')]))
+
+    def testYieldRecordChunkSizes(self):
+        s = self.storageComponent
+        s.addData(identifier='id:1', name='part', data='x' * 20000)
+        self.assertEqual([4096, 8192, 7712], [len(d) for d in s.yieldRecord('id:1', 'part')])
+        self.assertEqual([10000, 10000], [len(d) for d in s.yieldRecord('id:1', 'part', chunkSize=10000)])
+
+    def testGetBuffer(self):
+        s = self.storageComponent
+        s.addData(identifier='id:1', name='part', data='data')
+        with s.getBuffer('id:1', 'part') as buffer:
+            self.assertEqual(b'da', buffer[:2])
+        s = StorageComponent(join(self.tempdir, 'pack'), storageClass=PackStorage)
+        s.addData(identifier='id:1', name='part', data='data')
+        self.assertEqual(b'data', bytes(s.getBuffer('id:1', 'part')))
+
+    def testAddStream(self):
+        s = self.storageComponent
+        self.assertEqual(dict(size=10), s.addStream('id:1', 'part', iter(['01234', '56789'])))
+        self.assertEqual('0123456789', s.getData('id:1', 'part'))
+        result = s.addStream('id:1', 'part', StringIO('x' * 100000), checksum='sha1')
+        self.assertEqual(dict(size=100000, checksum=sha1(b'x' * 100000).hexdigest()), result)
+        self.assertEqual('x' * 100000, s.getData('id:1', 'part'))
+
+    def testAddStreamAbortsOnError(self):
+        s = self.storageComponent
+        s.addData('id:1', 'part', 'old')
+        def chunks():
+            yield 'new'
+            raise RuntimeError('broken')
+        self.assertRaises(RuntimeError, lambda: s.addStream('id:1', 'part', chunks()))
+        self.assertEqual('old', s.getData('id:1', 'part'))
+        self.assertEqual(['part'], listdir(join(self.tempdir, 'id', '1')))
+
+    def testAddStreamBinaryCompressedAndPacked(self):
+        s = StorageComponent(self.tempdir, binary=True, storageClass=PackStorage, codecs={'part': ZlibCodec()})
+        self.assertEqual(dict(size=6, checksum=sha1(b'abcdef').hexdigest()), s.addStream('id:1', 'part', BytesIO(b'abcdef'), checksum='sha1'))
+        self.assertEqual(b'abcdef', s.getData('id:1', 'part'))
+
+    def testRangeReads(self):
+        s = StorageComponent(self.tempdir, binary=True)
+        s.addData('id:1', 'part', b'0123456789')
+        self.assertEqual(b'3456', s.getData('id:1', 'part', offset=3, length=4))
+        self.assertEqual(b'789', s.getData('id:1', 'part', offset=7))
+        self.assertEqual(b'', s.getData('id:1', 'part', offset=20))
+        self.assertEqual(b'01', s.getStream('id:1', 'part', length=2).read())
+        self.assertEqual([b'56', b'78'], list(s.yieldRecord('id:1', 'part', chunkSize=2, offset=5, length=4)))
+        self.assertEqual(10, s.size('id:1', 'part'))
+        self.assertRaises(KeyError, lambda: s.size('id:1', 'other'))
+        self.assertRaises(KeyError, lambda: s.getData('id:2', 'part', offset=1))
+
+    def testRangeReadsCompressedPackedAndText(self):
+        s = StorageComponent(self.tempdir, binary=True, storageClass=PackStorage, codecs={'zipped': ZlibCodec()})
+        s.addData('id:1', 'part', b'0123456789')
+        s.addData('id:1', 'zipped', b'0123456789' * 100)
+        self.assertEqual(b'3456', s.getData('id:1', 'part', offset=3, length=4))
+        self.assertEqual(10, s.size('id:1', 'part'))
+        self.assertEqual(b'9012', s.getData('id:1', 'zipped', offset=509, length=4))
+        self.assertEqual(b'90', s.getStream('id:1', 'zipped', offset=999).read() + s.getStream('id:1', 'zipped', offset=0, length=1).read())
+        self.assertEqual(1000, s.size('id:1', 'zipped'))
+        t = self.storageComponent
+        t.addData('id:1', 'part', 'abcdef')
+        self.assertEqual('abcdef', t.getData('id:1', 'part', offset=0))
+        self.assertRaises(ValueError, lambda: t.getData('id:1', 'part', offset=2, length=2))
+        self.assertRaises(ValueError, lambda: t.getStream('id:1', 'part', offset=2))
+        self.assertRaises(ValueError, lambda: list(t.yieldRecord('id:1', 'part', length=2)))
+
+    def testRangesAndSizeCountBytesOfTheData(self):
+        data = 'aé€𝄞'.encode('utf-8') * 10
+        s = StorageComponent(self.tempdir, binary=True, codecs={'zipped': ZlibCodec()})
+        t = StorageComponent(self.tempdir, codecs={'zipped': ZlibCodec()})
+        for name in ['part', 'zipped']:
+            s.addData('id:1', name, data)
+            self.assertEqual(len(data), s.size('id:1', name))
+            self.assertEqual(len(data), t.size('id:1', name))
+            self.assertEqual(data[1:7], s.getData('id:1', name, offset=1, length=6))
+            self.assertEqual(data[3:], b''.join(s.yieldRecord('id:1', name, offset=3)))
+            self.assertEqual(data.decode('utf-8'), t.getData('id:1', name))
+
 def openread(filename):
     with open(filename) as f:
         return f.read()
@@ -33,7 +33,7 @@
 from unittest import TestCase
 
 from storage import Storage
-from storage.storage import DirectoryNotEmptyError
+from storage.storage import DirectoryNotEmptyError, DURABILITY_FILE, DURABILITY_FILE_AND_DIR
 from tempfile import mkdtemp
 from shutil import rmtree
 from os.path import join, isdir, isfile
@@ -384,3 +384,136 @@ class StorageTest(TestCase):
         self.assertEqual("second", f.read(6))
         f.close()
 
+    def testBinaryMode(self):
+        s = Storage(self._tempdir, binary=True)
+        sink = s.put('mydata')
+        sink.send(b'\x00\xff\r\n')
+        sink.close()
+        with open(join(self._tempdir, 'mydata'), 'rb') as f:
+            self.assertEqual(b'\x00\xff\r\n', f.read())
+        self.assertEqual(b'\x00\xff\r\n', next(s.get('mydata')))
+        buffer = bytearray(10)
+        with s.getFile('mydata') as f:
+            self.assertEqual(4, f.readinto(memoryview(buffer)[2:]))
+        self.assertEqual(b'\x00\x00\x00\xff\r\n', bytes(buffer[:6]))
+
+    def testBinaryModeIsInherited(self):
+        s = Storage(self._tempdir, binary=True)
+        sub = s.put('sub', s.newStorage())
+        sink = sub.put('mydata')
+        sink.send(b'data')
+        sink.close()
+        self.assertEqual(b'data', next(s.get('sub').get('mydata')))
+        self.assertEqual(b'data', next(s.getStorage('sub').getFile('mydata')))
+
+    def testNewPartIsWrittenToTemporaryFile(self):
+        s = Storage(self._tempdir)
+        sink = s.put('mydata')
+        sink.send('data')
+        [tempname] = listdir(self._tempdir)
+        self.assertTrue(tempname.startswith('.mydata,'), tempname)
+        self.assertTrue(tempname.endswith(',t'), tempname)
+        self.assertFalse('mydata' in s)
+        sink.close()
+        self.assertEqual(['mydata'], listdir(self._tempdir))
+
+    def testDurability(self):
+        for durability in [DURABILITY_FILE, DURABILITY_FILE_AND_DIR]:
+            s = Storage(join(self._tempdir, durability), durability=durability)
+            sink = s.put('sub', s.newStorage()).put('mydata')
+            sink.send('data')
+            sink.close()
+            self.assertEqual('data', next(s.get('sub').get('mydata')))
+        self.assertRaises(AssertionError, lambda: Storage(self._tempdir, durability='always'))
+
+    def testWalk(self):
+        s = Storage(self._tempdir)
+        s.put('name').close()
+        sub = s.put('sub', s.newStorage())
+        sub.put('one').close()
+        sub.put('two/2').close()
+        sub.put('subsub', s.newStorage()).put('three').close()
+        s.put('empty', s.newStorage())
+        self.assertEqual(set([('name',), ('sub', 'one'), ('sub', 'two/2'), ('sub', 'subsub', 'three')]), set(s.walk()))
+        self.assertEqual(set([('one',), ('two/2',), ('subsub', 'three')]), set(s.get('sub').walk()))
+
+    def testUnfinishedSinksAreNotListed(self):
+        s = Storage(self._tempdir)
+        s.put('done').close()
+        sub = s.put('sub', s.newStorage())
+        sink = s.put('busy')
+        subSink = sub.put('busy')
+        self.assertEqual(['done', 'sub'], sorted(item.name for item in s))
+        self.assertEqual([], list(sub))
+        self.assertEqual([('done',)], list(s.walk()))
+        sink.close()
+        subSink.close()
+        self.assertEqual(set([('done',), ('busy',), ('sub', 'busy')]), set(s.walk()))
+
+    def testNamesEndingLikeTemporaryFilesAreListed(self):
+        s = Storage(self._tempdir)
+        s.put('a,t', s.newStorage()).put('x,t').close()
+        sink = s.put('.x')
+        self.assertEqual(['a,t'], [item.name for item in s])
+        self.assertEqual([('a,t', 'x,t')], list(s.walk()))
+        sink.close()
+        self.assertEqual(set([('a,t', 'x,t'), ('.x',)]), set(s.walk()))
+
+    def testWalkYieldsFilesOfOneDirectoryTogether(self):
+        s = Storage(self._tempdir)
+        for i in range(3):
+            sub = s.put('sub%s' % i, s.newStorage())
+            sub.put('subsub', s.newStorage()).put('deep').close()
+            for j in range(3):
+                sub.put('name%s' % j).close()
+        directories = [names[:-1] for names in s.walk()]
+        seen = []
+        for directory in directories:
+            if not seen or seen[-1] != directory:
+                self.assertFalse(directory in seen)
+                seen.append(directory)
+        self.assertEqual(6, len(seen))
+
+    def testConcurrentSinksForOnePart(self):
+        s = Storage(self._tempdir)
+        sink1 = s.put('mydata')
+        sink2 = s.put('mydata')
+        sink1.send('first')
+        sink2.send('second')
+        sink1.close()
+        self.assertEqual('first', next(s.get('mydata')))
+        sink2.close()
+        self.assertEqual('second', next(s.get('mydata')))
+        self.assertEqual(['mydata'], listdir(self._tempdir))
+
+
+    def testFileChunkSize(self):
+        s = Storage(self._tempdir)
+        sink = s.put('mydata')
+        sink.send('0123456789')
+        sink.close()
+        self.assertEqual(['0123456789'], list(s.getFile('mydata')))
+        f = s.getFile('mydata')
+        f.chunkSize = 4
+        self.assertEqual(['0123', '4567', '89'], list(f))
+
+    def testFileMmap(self):
+        s = Storage(self._tempdir)
+        sink = s.put('mydata')
+        sink.send('data')
+        sink.close()
+        with s.getFile('mydata').mmap() as buffer:
+            self.assertEqual(b'data', buffer[:])
+        s.put('empty').close()
+        self.assertEqual(b'', bytes(s.getFile('empty').mmap()))
+
+    def testSinkAbort(self):
+        s = Storage(self._tempdir)
+        sink = s.put('mydata')
+        sink.send('first')
+        sink.close()
+        sink = s.put('mydata')
+        sink.send('second')
+        sink.abort()
+        self.assertEqual('first', next(s.get('mydata')))
+        self.assertEqual(['mydata'], listdir(self._tempdir))
@@ -0,0 +1,175 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os.path import join
+
+from seecr.test import SeecrTestCase
+
+from storage import StripedStorageComponent, PartsIndex, WriteAheadLog
+
+
+class StripedStorageComponentTest(SeecrTestCase):
+    def setUp(self):
+        SeecrTestCase.setUp(self)
+        self.volumes = [join(self.tempdir, 'volume%s' % i) for i in range(3)]
+
+    def testSpreadsIdentifiersOverVolumes(self):
+        s = StripedStorageComponent(self.volumes[:2], partsRemovedOnDelete=['rdf'])
+        for i in range(100):
+            s.addData(identifier='id:%s' % i, name='rdf', data='data %s' % i)
+        counts = [len(list(s._volumes[volume].listIdentifiers())) for volume in self.volumes[:2]]
+        self.assertEqual(100, sum(counts))
+        self.assertTrue(min(counts) > 20, counts)
+        self.assertEqual('data 42', s.getData(identifier='id:42', name='rdf'))
+        self.assertEqual((True, True), s.isAvailable('id:42', 'rdf'))
+        self.assertEqual((True, False), s.isAvailable('id:42', 'xml'))
+        self.assertEqual((False, False), s.isAvailable('id:nope', 'rdf'))
+        self.assertRaises(KeyError, lambda: s.getData(identifier='id:nope', name='rdf'))
+        s.deleteData(identifier='id:42')
+        self.assertEqual((True, False), s.isAvailable('id:42', 'rdf'))
+
+    def testListingIsSortedAndMerged(self):
+        s = StripedStorageComponent(self.volumes)
+        identifiers = ['id:%03d' % i for i in range(50)]
+        for identifier in reversed(identifiers):
+            s.addData(identifier=identifier, name='rdf', data='data')
+        s.addData(identifier='id:000', name='xml', data='data')
+        self.assertEqual(identifiers, list(s.listIdentifiers()))
+        self.assertEqual(['id:000'], list(s.listIdentifiers(partname='xml')))
+        self.assertEqual([('id:000', 'rdf'), ('id:000', 'xml'), ('id:001', 'rdf')], list(s.glob(('id:00', None)))[:3])
+
+    def testAddVolumeMovesOnlyItsShare(self):
+        s = StripedStorageComponent(self.volumes[:2])
+        for i in range(300):
+            s.addData(identifier='id:%s' % i, name='rdf', data='data %s' % i)
+        moved = s.addVolume(self.volumes[2])
+        self.assertTrue(50 < moved < 150, moved)
+        self.assertEqual(moved, len(list(s._volumes[self.volumes[2]].listIdentifiers())))
+        self.assertEqual(300, len(list(s.listIdentifiers())))
+        for i in range(300):
+            identifier = 'id:%s' % i
+            self.assertEqual((True, True), s._volumes[s.volumeFor(identifier)].isAvailable(identifier, 'rdf'))
+        self.assertEqual('data 7', s.getData(identifier='id:7', name='rdf'))
+
+    def testUnhealthyVolumeIsSkipped(self):
+        s = StripedStorageComponent(self.volumes[:2])
+        owner = s.volumeFor('id:1')
+        s.setHealthy(owner, False)
+        s.addData(identifier='id:1', name='rdf', data='data')
+        self.assertEqual((True, True), s._volumes[s.volumeFor('id:1')].isAvailable('id:1', 'rdf'))
+        self.assertNotEqual(owner, s.volumeFor('id:1'))
+        self.assertEqual('data', s.getData(identifier='id:1', name='rdf'))
+        s.setHealthy(owner, True)
+        self.assertEqual(owner, s.volumeFor('id:1'))
+        self.assertEqual('data', s.getData(identifier='id:1', name='rdf'))
+        self.assertEqual(1, s.rebalance())
+        self.assertEqual((True, True), s._volumes[owner].isAvailable('id:1', 'rdf'))
+        self.assertEqual({self.volumes[0]: True, self.volumes[1]: True}, s.health())
+
+    def testRebalanceKeepsNewerPart(self):
+        s = StripedStorageComponent(self.volumes[:2])
+        owner = s.volumeFor('id:1')
+        s.setHealthy(owner, False)
+        s.addData(identifier='id:1', name='rdf', data='old')
+        s.setHealthy(owner, True)
+        s.addData(identifier='id:1', name='rdf', data='new')
+        self.assertEqual(0, s.rebalance())
+        self.assertEqual('new', s.getData(identifier='id:1', name='rdf'))
+        self.assertEqual(['id:1'], list(s.listIdentifiers()))
+
+    def testNewerWriteOnFallbackVolumeWins(self):
+        s = StripedStorageComponent(self.volumes[:2])
+        owner = s.volumeFor('id:1')
+        s.addData(identifier='id:1', name='rdf', data='old')
+        s.setHealthy(owner, False)
+        s.addData(identifier='id:1', name='rdf', data='new')
+        s.setHealthy(owner, True)
+        self.assertEqual('new', s.getData(identifier='id:1', name='rdf'))
+        self.assertEqual('new', s.getStream(identifier='id:1', partname='rdf').read())
+        self.assertEqual(1, s.rebalance())
+        self.assertEqual('new', s._volumes[owner].getData(identifier='id:1', name='rdf'))
+        self.assertEqual([owner], [volume for volume in self.volumes[:2] if s._volumes[volume].isAvailable('id:1', 'rdf') == (True, True)])
+
+    def testDeleteDuringOutageStaysDeleted(self):
+        s = StripedStorageComponent(self.volumes[:2], partsRemovedOnDelete=['rdf'])
+        owner = s.volumeFor('id:1')
+        s.addData(identifier='id:1', name='rdf', data='data')
+        s.addData(identifier='id:2', name='rdf', data='data')
+        s.setHealthy(owner, False)
+        s.deletePart('id:1', 'rdf')
+        s.deleteData(identifier='id:2')
+        self.assertEqual((True, True), s._volumes[owner].isAvailable('id:1', 'rdf'))
+        s.setHealthy(owner, True)
+        self.assertEqual((True, False), s.isAvailable('id:1', 'rdf'))
+        self.assertRaises(KeyError, lambda: s.getData(identifier='id:1', name='rdf'))
+        self.assertEqual(False, s.isAvailable('id:2', 'rdf')[1])
+        self.assertEqual(0, s.rebalance())
+        self.assertEqual([], list(s.listIdentifiers(partname='rdf')))
+
+    def testStatefulComponentsArePerVolume(self):
+        self.assertRaises(AssertionError, lambda: StripedStorageComponent(self.volumes, partsIndex=PartsIndex()))
+        self.assertRaises(AssertionError, lambda: StripedStorageComponent(self.volumes, writeAheadLog=WriteAheadLog(join(self.tempdir, 'wal'))))
+        volumeKwargs = lambda directory: dict(partsIndex=PartsIndex(directory + '.index'), writeAheadLog=WriteAheadLog(directory + '.wal'))
+        s = StripedStorageComponent(self.volumes, volumeKwargs=volumeKwargs)
+        identifiers = ['id:%02d' % i for i in range(20)]
+        for identifier in identifiers:
+            s.addData(identifier=identifier, name='rdf', data=identifier)
+        s.close()
+        s = StripedStorageComponent(self.volumes, volumeKwargs=volumeKwargs)
+        self.assertEqual(identifiers, list(s.listIdentifiers()))
+        for identifier in identifiers:
+            self.assertEqual(identifier, s._volumes[s.volumeFor(identifier)].getData(identifier, 'rdf'))
+        s.close()
+
+    def testReadsTheHomeVolumeOnly(self):
+        s = StripedStorageComponent(self.volumes)
+        s.addData(identifier='id:1', name='rdf', data='data')
+        checked = []
+        for directory, component in s._volumes.items():
+            component.isAvailable = lambda identifier, partname, directory=directory, original=component.isAvailable: checked.append(directory) or original(identifier, partname)
+        self.assertEqual('data', s.getData(identifier='id:1', name='rdf'))
+        self.assertEqual(set([s.volumeFor('id:1')]), set(checked))
+
+    def testTombstonesSurviveRestart(self):
+        s = StripedStorageComponent(self.volumes[:2], partsRemovedOnDelete=['rdf'])
+        owner = s.volumeFor('id:1')
+        s.addData(identifier='id:1', name='rdf', data='old')
+        s.addData(identifier='id:2', name='rdf', data='data')
+        s.setHealthy(owner, False)
+        s.addData(identifier='id:1', name='rdf', data='new')
+        s.deleteData(identifier='id:2')
+        s = StripedStorageComponent(self.volumes[:2], partsRemovedOnDelete=['rdf'])
+        self.assertEqual('new', s.getData(identifier='id:1', name='rdf'))
+        self.assertEqual(False, s.isAvailable('id:2', 'rdf')[1])
+        s._volumes[owner].addData(identifier='id:2', name='rdf', data='later')
+        s = StripedStorageComponent(self.volumes[:2], partsRemovedOnDelete=['rdf'])
+        self.assertEqual('later', s._volumes[owner].getData(identifier='id:2', name='rdf'))
+        s.setHealthy(owner, False)
+        s.deleteData(identifier='id:2')
+        s = StripedStorageComponent(self.volumes[:2], partsRemovedOnDelete=['rdf'])
+        self.assertEqual(False, s._volumes[owner].isAvailable('id:2', 'rdf')[1])
+        s.rebalance()
+        self.assertEqual('new', s._volumes[owner].getData(identifier='id:1', name='rdf'))
@@ -0,0 +1,238 @@
+## begin license ##
+#
+# "Storage" stores data in a reliable, extendable filebased storage
+# with great performance.
+#
+# Copyright (C) 2026 Seecr (Seek You Too B.V.) https://seecr.nl
+#
+# This file is part of "Storage"
+#
+# "Storage" is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# "Storage" is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with "Storage"; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+## end license ##
+
+
+from os import listdir
+from os.path import join, isfile, getsize
+from threading import Thread
+
+from seecr.test import SeecrTestCase
+
+from storage import StorageComponent, WriteAheadLog, PartsIndex, PackStorage
+from storage.storage import DURABILITY_NONE
+from storage.writeaheadlog import DELETED
+
+
+class WriteAheadLogTest(SeecrTestCase):
+    def setUp(self):
+        SeecrTestCase.setUp(self)
+        self.logdir = join(self.tempdir, 'wal')
+        self.storedir = join(self.tempdir, 'store')
+
+    def newComponent(self, **kwargs):
+        wal = WriteAheadLog(self.logdir, checkpointInterval=None, **kwargs)
+        return wal, StorageComponent(self.storedir, partsRemovedOnDelete=['part'], writeAheadLog=wal)
+
+    def testAddIsVisibleBeforeCheckpoint(self):
+        wal, s = self.newComponent()
+        s.addData(identifier='id:1', name='part', data='data')
+        self.assertFalse(isfile(join(self.storedir, 'id', '1', 'part')))
+        self.assertEqual('data', s.getData(identifier='id:1', name='part'))
+        self.assertEqual('data', s.getStream(identifier='id:1', partname='part').read())
+        self.assertEqual((True, True), s.isAvailable('id:1', 'part'))
+        self.assertEqual((True, False), s.isAvailable('id:1', 'other'))
+        wal.checkpoint()
+        self.assertTrue(isfile(join(self.storedir, 'id', '1', 'part')))
+        self.assertEqual(0, len(wal))
+        self.assertEqual('data', s.getData(identifier='id:1', name='part'))
+
+    def testDeleteIsVisibleBeforeCheckpoint(self):
+        wal, s = self.newComponent()
+        s.addData(identifier='id:1', name='part', data='data')
+        wal.checkpoint()
+        s.deleteData(identifier='id:1')
+        self.assertTrue(isfile(join(self.storedir, 'id', '1', 'part')))
+        self.assertEqual((True, False), s.isAvailable('id:1', 'part'))
+        self.assertRaises(KeyError, lambda: s.getData(identifier='id:1', name='part'))
+        self.assertRaises(IOError, lambda: s.getStream(identifier='id:1', partname='part').read())
+        wal.checkpoint()
+        self.assertFalse(isfile(join(self.storedir, 'id', '1', 'part')))
+
+    def testReplayAfterCrash(self):
+        wal, s = self.newComponent()
+        s.addData(identifier='id:1', name='part', data='one')
+        s.addData(identifier='id:2', name='part', data='two')
+        s.deleteData(identifier='id:2')
+        with open(join(self.logdir, listdir(self.logdir)[0]), 'ab') as f:
+            f.write(b'\x01\x00\x00')
+        wal, s = self.newComponent()
+        self.assertEqual('one', s.getData(identifier='id:1', name='part'))
+        self.assertEqual(DELETED, wal.get(('id:2', 'part')))
+        wal.close()
+        self.assertEqual([], listdir(self.logdir))
+        self.assertEqual('one', StorageComponent(self.storedir).getData(identifier='id:1', name='part'))
+        self.assertEqual((False, False), StorageComponent(self.storedir).isAvailable('id:2', 'part'))
+
+    def testBinaryParts(self):
+        wal = WriteAheadLog(self.logdir, checkpointInterval=None)
+        s = StorageComponent(self.storedir, binary=True, writeAheadLog=wal)
+        s.addData(identifier='id:1', name='part', data=b'\x00\xff')
+        self.assertEqual(b'\x00\xff', s.getData(identifier='id:1', name='part'))
+        wal.close()
+        self.assertEqual(b'\x00\xff', StorageComponent(self.storedir, binary=True).getData(identifier='id:1', name='part'))
+
+    def testListingAndPurgeCheckpointFirst(self):
+        wal, s = self.newComponent(durability=DURABILITY_NONE)
+        s.addData(identifier='id:1', name='part', data='one')
+        self.assertEqual(['id:1'], list(s.listIdentifiers()))
+        s.addData(identifier='id:2', name='part', data='two')
+        s.purge(identifier='id:2')
+        self.assertEqual(['id:1'], list(s.listIdentifiers()))
+        self.assertEqual(0, len(wal))
+
+    def testPurgeAndGlobCheckpointOnlyAffectedParts(self):
+        wal, s = self.newComponent(durability=DURABILITY_NONE)
+        s.addData(identifier='id:1', name='part', data='one')
+        s.addData(identifier='id:2', name='part', data='two')
+        s.addData(identifier='other:3', name='part', data='three')
+        s.purge(identifier='id:2')
+        self.assertEqual(2, len(wal))
+        self.assertEqual(['id:1'], list(s.listIdentifiers(identifierPrefix='id:')))
+        self.assertEqual(1, len(wal))
+        self.assertEqual(None, wal.get(('id:1', 'part')))
+
+        wal2 = WriteAheadLog(self.logdir, checkpointInterval=None)
+        s2 = StorageComponent(self.storedir, writeAheadLog=wal2)
+        self.assertEqual(['other:3'], [key[0] for key in wal2.keys()])
+        self.assertEqual((False, False), s2.isAvailable('id:2', 'part'))
+        self.assertEqual('one', s2.getData(identifier='id:1', name='part'))
+        self.assertEqual('three', s2.getData(identifier='other:3', name='part'))
+
+    def testPartialCheckpointDoesNotRelogPendingMutations(self):
+        wal, s = self.newComponent(durability=DURABILITY_NONE)
+        for i in range(100):
+            s.addData(identifier='id:%s' % i, name='part', data='x' * 100)
+        s.addData(identifier='gone:1', name='part', data='data')
+        [segment] = listdir(self.logdir)
+        size = getsize(join(self.logdir, segment))
+        s.purge(identifier='gone:1')
+        self.assertEqual([segment], listdir(self.logdir))
+        self.assertTrue(getsize(join(self.logdir, segment)) - size < 50)
+        self.assertTrue(wal.hasIdentifier('id:7'))
+        self.assertFalse(wal.hasIdentifier('gone:1'))
+
+        wal2, s2 = self.newComponent()
+        self.assertEqual(100, len(wal2))
+        self.assertEqual((False, False), s2.isAvailable('gone:1', 'part'))
+        wal2.close()
+        self.assertEqual([], listdir(self.logdir))
+        self.assertEqual((False, False), StorageComponent(self.storedir).isAvailable('gone:1', 'part'))
+
+    def testSegmentsAreRemovedOldestFirst(self):
+        wal, s = self.newComponent()
+        s.addData(identifier='id:1', name='part', data='one')
+        wal.checkpoint([('nothing', 'part')])
+        s.addData(identifier='id:2', name='part', data='two')
+        wal._openSegment(wal._segment + 1)
+        s.addData(identifier='id:1', name='part', data='newer')
+        wal.checkpoint([('id:1', 'part')])
+        self.assertEqual(2, len(listdir(self.logdir)))
+        wal2, s2 = self.newComponent()
+        self.assertEqual([('id:2', 'part')], wal2.keys())
+        self.assertEqual('newer', s2.getData(identifier='id:1', name='part'))
+
+    def testNewerWriteSurvivesCheckpoint(self):
+        written = []
+        wal, s = self.newComponent()
+        s.addData(identifier='id:1', name='part', data='old')
+        originalApply = wal._apply
+        def apply(key, data):
+            originalApply(key, data)
+            written.append(data)
+            if len(written) == 1:
+                s.addData(identifier='id:1', name='part', data='new')
+        wal._apply = apply
+        wal.checkpoint()
+        self.assertEqual('new', s.getData(identifier='id:1', name='part'))
+        wal.checkpoint()
+        self.assertEqual(['old', 'new'], written)
+        self.assertEqual('new', StorageComponent(self.storedir).getData(identifier='id:1', name='part'))
+
+    def testFailedApplyStaysLogged(self):
+        wal, s = self.newComponent()
+        s.addData(identifier='id:1', name='part', data='one')
+        s.addData(identifier='id:2', name='part', data='two')
+        originalApply = wal._apply
+        def apply(key, data):
+            if key == ('id:1', 'part'):
+                raise IOError('disk full')
+            return originalApply(key, data)
+        wal._apply = apply
+        self.assertRaises(IOError, wal.checkpoint)
+        self.assertEqual(1, len(wal))
+        self.assertEqual('one', s.getData(identifier='id:1', name='part'))
+        self.assertFalse(isfile(join(self.storedir, 'id', '1', 'part')))
+        self.assertTrue(isfile(join(self.storedir, 'id', '2', 'part')))
+
+        wal2 = WriteAheadLog(self.logdir, checkpointInterval=None)
+        s2 = StorageComponent(self.storedir, writeAheadLog=wal2)
+        self.assertEqual(1, len(wal2))
+        wal2.close()
+        self.assertEqual('one', StorageComponent(self.storedir).getData(identifier='id:1', name='part'))
+        self.assertEqual([], listdir(self.logdir))
+
+    def testCheckpointIntoPackStorage(self):
+        wal = WriteAheadLog(self.logdir, checkpointInterval=None)
+        s = StorageComponent(self.storedir, storageClass=PackStorage, writeAheadLog=wal)
+        s.addData(identifier='id:1', name='part', data='data')
+        wal.checkpoint()
+        self.assertEqual(0, len(wal))
+        self.assertEqual('data', s.getData(identifier='id:1', name='part'))
+
+    def testBackgroundCheckpointWhenFull(self):
+        wal = WriteAheadLog(self.logdir, checkpointInterval=60, maxEntries=2)
+        s = StorageComponent(self.storedir, writeAheadLog=wal)
+        s.addData(identifier='id:1', name='part', data='one')
+        s.addData(identifier='id:2', name='part', data='two')
+        for i in range(100):
+            if len(wal) == 0:
+                break
+            wal._thread.join(0.01)
+        self.assertEqual(0, len(wal))
+        wal.close()
+        self.assertEqual('two', StorageComponent(self.storedir).getData(identifier='id:2', name='part'))
+
+    def testConcurrentWriters(self):
+        wal, s = self.newComponent()
+        def write(n):
+            for i in range(50):
+                s.addData(identifier='id:%s:%s' % (n, i), name='part', data=str(i))
+        threads = [Thread(target=write, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(200, len(wal))
+        wal.close()
+        self.assertEqual('49', StorageComponent(self.storedir).getData(identifier='id:3:49', name='part'))
+
+    def testWithPartsIndex(self):
+        wal = WriteAheadLog(self.logdir, checkpointInterval=None)
+        s = StorageComponent(self.storedir, partsRemovedOnDelete=['part'], writeAheadLog=wal, partsIndex=PartsIndex())
+        s.addData(identifier='id:1', name='part', data='one')
+        self.assertEqual(['id:1'], list(s.listIdentifiers()))
+        self.assertEqual(1, len(wal))
+        s.deleteData(identifier='id:1')
+        self.assertEqual((True, False), s.isAvailable('id:1', 'part'))